@@ -0,0 +1,116 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+MAX_WORKERS = int(os.environ.get("BEAM_ANALYSIS_WORKERS", "2"))
+DEFAULT_DEBOUNCE = 0.15  # [s]
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the process-wide executor shared by all AnalysisWorkers (created on first use), so the
+    number of analyses running at once is bounded by MAX_WORKERS however many sessions are open
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="beam-analysis")
+        return _executor
+
+
+class AnalysisWorker:
+    """
+    Runs the analysis of one app session in the background.
+
+    Every submit() with new inputs starts a new generation. A job only starts once its inputs have been
+    stable for 'debounce' seconds, so rapid input changes are coalesced into one analysis, and a result
+    is only kept if no newer generation was submitted while it ran. 'result' always holds the last good
+    result, so the app can keep showing it while a new analysis is pending.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor | None = None, debounce: float = DEFAULT_DEBOUNCE):
+        self.executor = executor or get_executor()
+        self.debounce = debounce
+        self.generation = 0
+        self.key = None
+        self.result = None
+        self.result_generation = 0
+        self.error = None
+        self.error_generation = 0
+        self.discarded = 0
+        self._timer = None
+        self._future = None
+        self._done = threading.Condition()
+
+    def submit(self, key: str, func, *args, **kwargs) -> int:
+        """
+        Schedules func(*args, **kwargs) for the inputs identified by 'key' (e.g. a content hash) and
+        returns its generation. Submitting the same key as the latest submission does nothing.
+        Pending jobs of older generations are cancelled if they have not started yet.
+        """
+        with self._done:
+            if key == self.key:
+                return self.generation
+            if self.pending:
+                self.discarded += 1  # Superseded before it finished: its result (if any) is never kept
+            self.generation += 1
+            self.key = key
+            generation = self.generation
+            if self._timer is not None:
+                self._timer.cancel()
+            if self._future is not None:
+                self._future.cancel()
+            if self.debounce > 0:
+                self._timer = threading.Timer(self.debounce, self._dispatch, (generation, func, args, kwargs))
+                self._timer.daemon = True
+                self._timer.start()
+            else:
+                self._timer = None
+                self._future = self.executor.submit(self._run, generation, func, args, kwargs)
+        return generation
+
+    def _dispatch(self, generation: int, func, args: tuple, kwargs: dict):
+        with self._done:
+            if generation != self.generation:
+                return
+            self._future = self.executor.submit(self._run, generation, func, args, kwargs)
+
+    def _run(self, generation: int, func, args: tuple, kwargs: dict):
+        with self._done:
+            if generation != self.generation:
+                return  # Superseded while queued
+        try:
+            value = func(*args, **kwargs)
+        except Exception as error:
+            with self._done:
+                if generation == self.generation:
+                    self.error = error
+                    self.error_generation = generation
+                    self._done.notify_all()
+            return
+        with self._done:
+            if generation != self.generation:
+                return  # Stale: the inputs changed while it ran
+            self.result = value
+            self.result_generation = generation
+            self.error = None
+            self._done.notify_all()
+
+    @property
+    def pending(self) -> bool:
+        """
+        True while the latest submission has neither a result nor an error
+        """
+        return self.generation not in (self.result_generation, self.error_generation)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Waits up to 'timeout' seconds (forever if None) for the latest submission to finish.
+        Returns False if it is still pending.
+        """
+        with self._done:
+            return self._done.wait_for(lambda: not self.pending, timeout)
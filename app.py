@@ -1,10 +1,24 @@
+import io
+import time
 import streamlit as st
+import analysis_worker
+import beam2d
+import instrumentation
 import loadfactors
 import beams
+import design
 import app_functions
+import lazy_imports
 import plots
 
 
+# Heavy dependencies (PyNite, plotly, matplotlib, scipy) are imported on first use; start loading them now
+# so they are ready by the time the first analysis runs
+lazy_imports.prewarm(background=True)
+
+ANALYSIS_WAIT = 1.0  # [s] How long a rerun waits for its own analysis before showing the last good diagrams
+POLL_INTERVAL = 0.25  # [s]
+
 
 #Attribute inputs
 
@@ -45,8 +59,12 @@ if load_factor_details == "Advanced":
     alpha_D = max_min_dict[st.sidebar.selectbox(f"Dead load max/min:", options=list(max_min_dict.keys()))]
     alpha_E = max_min_dict[st.sidebar.selectbox(f"Earth load max/min:", options=list(max_min_dict.keys()))]
     alpha_factors = loadfactors.get_alpha_factors(material_type=material_type, alpha_D_max_min=alpha_D, earth_pressure_type=earth_pressure_type, alpha_E_max_min=alpha_E, L_span_type=LL_span_type)
+    all_permutations = target_combo == "max" and st.sidebar.checkbox("Envelope all max/min factor permutations (D, E, P)")
+    alpha_permutations = loadfactors.alpha_factor_permutations(material_type=material_type, earth_pressure_type=earth_pressure_type, L_span_type=LL_span_type) if all_permutations else None
 else:
     alpha_factors = loadfactors.get_alpha_factors()
+    alpha_permutations = None
+pattern_live = st.sidebar.checkbox("Pattern live load (L on each span on/off)")
 
 
 
@@ -55,7 +73,7 @@ else:
 # Support inputs
 st.sidebar.header("Support Inputs (SI units):")
 support_acc_dict = {}
-support_types = ["P", "R", "F", "Free"]
+support_types = ["P", "R", "F", "Free", "Spring", "Foundation"]
 num_supports = int(st.sidebar.number_input("Number of supports", value=2, step=1))
 for support in range(num_supports):
     st.sidebar.subheader(f"Support {support+1}")
@@ -68,6 +86,13 @@ for support in range(num_supports):
         
 
     sup_rest = st.sidebar.selectbox(f"Support {support+1} restraint:", options=support_types)
+    if sup_rest == "Spring":
+        spring_Ky = st.sidebar.number_input(f"Support {support+1} Ky (N/mm):", value=1000.0, min_value=0.0)
+        spring_Kr = st.sidebar.number_input(f"Support {support+1} Kr (Nmm/rad):", value=0.0, min_value=0.0)
+        sup_rest = f"Ky={spring_Ky:g}+Kr={spring_Kr:g}"
+    elif sup_rest == "Foundation":  # Winkler foundation from this location to the next foundation support or the end of the beam
+        modulus = st.sidebar.number_input(f"Support {support+1} foundation modulus (N/mm per mm):", value=10.0, min_value=0.0)
+        sup_rest = f"W={modulus:g}"
     st.sidebar.write("")
     support_acc_dict.update({float(sup_loc): sup_rest})
 
@@ -101,10 +126,37 @@ for load in range(num_loads):
     load_list_acc.append(inner_load_dict_acc)
 
 
-
-shear_plot = app_functions.get_shear_plots(list_attributes, support_acc_dict, load_list_acc, target_combo=target_combo, **alpha_factors)
-moment_plot = app_functions.get_moment_plots(list_attributes, support_acc_dict, load_list_acc, target_combo=target_combo, **alpha_factors)
-beam_visual = app_functions.get_beam_visual(list_attributes, support_acc_dict, load_list_acc)
+st.sidebar.header("Section Selection")
+catalog_file = st.sidebar.file_uploader("Section catalog (CSV):", type=["csv"])
+if catalog_file is not None:
+    steel_Fy = st.sidebar.number_input("Fy (MPa):", value=350.0)
+    deflection_limit = st.sidebar.number_input("Deflection limit (L / ...):", value=360.0)
+
+st.sidebar.header("Support Optimization")
+movable_supports = st.sidebar.multiselect("Supports to move:", options=list(support_acc_dict))
+layout_bounds = {}
+if movable_supports:
+    layout_objective = st.sidebar.selectbox("Minimize the peak:", options=["moment", "shear", "deflection"])
+    for loc in movable_supports:
+        layout_min = st.sidebar.number_input(f"Support at {loc:g} min location:", value=0.0, min_value=0.0, max_value=L)
+        layout_max = st.sidebar.number_input(f"Support at {loc:g} max location:", value=float(L), min_value=0.0, max_value=L)
+        layout_bounds.update({loc: (layout_min, layout_max)})
+    layout_budget = st.sidebar.number_input("Time budget (s):", value=2.0, min_value=0.1)
+
+
+# The analysis runs in a background worker (one per session, sharing a bounded thread pool): rapid input changes
+# are debounced into one run, results of superseded inputs are discarded and the last good diagrams stay on
+# screen until the new ones land. Unfactored load case results are also cached across sessions, so changing
+# alpha factors or the target combo only redoes the superposition.
+# Each session also keeps its stiffness factorization, so load-only edits are solved by back-substitution.
+if "analysis_worker" not in st.session_state:
+    st.session_state["analysis_worker"] = analysis_worker.AnalysisWorker()
+    st.session_state["beam_session"] = beam2d.BeamSession2D()
+worker = st.session_state["analysis_worker"]
+app_params = {"target_combo": target_combo, "alpha_permutations": alpha_permutations, "max_points": 80, "pattern_live": pattern_live, **alpha_factors}
+worker.submit(app_functions.get_app_results_key(list_attributes, support_acc_dict, load_list_acc, **app_params),
+              app_functions.get_app_results, list_attributes, support_acc_dict, load_list_acc, session=st.session_state["beam_session"], **app_params)
+worker.wait(timeout=ANALYSIS_WAIT)
 
 
 
@@ -112,15 +164,63 @@ beam_visual = app_functions.get_beam_visual(list_attributes, support_acc_dict, l
 
 st.title("Shear and bending moment diagrams for 2D loading")
 st.write("")
-if target_combo == "max":
-    st.write(f"The Max loading occurs at combo {shear_plot[1]}")
-    st.write("")
-
-st.header("Beam Visualization")
-st.write(beam_visual)
-st.header("Shear Diagram")
-st.write(shear_plot[0])
-st.header("Bending Moment Diagram")
-st.write(moment_plot[0])
-
-
+if worker.error is not None and not worker.pending:
+    st.error(f"Analysis failed: {worker.error}")
+elif worker.pending:
+    st.caption("Updating diagrams...")
+
+app_results = worker.result
+if app_results is not None:
+    shear_plot = app_results["shear_plot"]
+    moment_plot = app_results["moment_plot"]
+    if target_combo == "max":
+        st.write(f"The Max shear occurs at combo {shear_plot[1]} and the Max moment occurs at combo {moment_plot[1]}")
+        st.write("")
+
+    st.header("Beam Visualization")
+    st.image(app_results["beam_visual"])
+    st.header("Shear Diagram")
+    st.write(shear_plot[0])
+    st.header("Bending Moment Diagram")
+    st.write(moment_plot[0])
+
+if catalog_file is not None:
+    st.header("Section Selection")
+    try:
+        catalog = design.read_section_catalog(io.StringIO(catalog_file.getvalue().decode("utf-8")))
+        selected = app_functions.get_section_selection(list_attributes, support_acc_dict, load_list_acc, catalog, Fy=steel_Fy, deflection_limit=deflection_limit, **alpha_factors)
+    except ValueError as error:
+        st.error(str(error))
+    else:
+        if selected is None:
+            st.write("No section in the catalog satisfies the moment, shear and deflection checks.")
+        else:
+            st.write(f"Lightest section that works: {selected['Designation']} ({selected['Mass']:g} kg/m, utilization {selected['utilization']:.2f})")
+            st.dataframe([selected])
+
+if layout_bounds:
+    st.header("Support Optimization")
+    try:
+        layout = app_functions.get_support_optimization(list_attributes, support_acc_dict, load_list_acc, layout_bounds, layout_objective, layout_budget, **alpha_factors)
+    except ValueError as error:
+        st.error(str(error))
+    else:
+        moved = ", ".join(f"{loc:g} -> {location:.0f}" for loc, location in zip(layout_bounds, layout["locations"]))
+        status = "converged" if layout["converged"] else "stopped at the time budget"
+        st.write(f"Peak {layout_objective}: {layout['initial_objective']:.4g} -> {layout['objective']:.4g} with the supports moved {moved} "
+                 f"({layout['evaluations']} analyses in {layout['seconds']:.2f} s, {status})")
+        st.line_chart({"Peak": [entry["objective"] for entry in layout["history"]]})
+
+# Hidden unless the server runs with BEAM_INSTRUMENTATION=1 (or =memory to also track peak allocations)
+if instrumentation.is_enabled():
+    with st.expander("Diagnostics"):
+        st.write("Stage timings in this server process (seconds; peak allocation in bytes if tracked)")
+        st.dataframe([{"stage": name, **stats} for name, stats in instrumentation.summary().items()])
+        st.write(f"Result cache: {app_functions.RESULT_CACHE.stats()}")
+        st.write("Deferred imports (seconds to load):")
+        st.json(lazy_imports.import_report())
+
+# Poll for the pending result; any widget change interrupts this and reruns the script with the new inputs
+if worker.pending:
+    time.sleep(POLL_INTERVAL)
+    st.rerun()
@@ -1,8 +1,24 @@
+from __future__ import annotations
+import beam2d
 import beams
+import design
+import influence
+import instrumentation
 import plots
 import loadfactors
-from PyNite import FEModel3D
-import plotly.graph_objects as go
+import piecewise
+import result_cache
+import support_layout
+import lazy_imports
+
+PyNite = lazy_imports.lazy_import("PyNite")
+go = lazy_imports.lazy_import("plotly.graph_objects")
+matplotlib_figure = lazy_imports.lazy_import("matplotlib.figure")
+
+
+RESULT_DIRECTIONS = {"shear": "Fy", "moment": "Mz", "deflection": "dy"}
+PATTERN_POINTS = 500
+RESULT_CACHE = result_cache.ResultCache()
 
 
 def get_str_beam_data(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]]) -> dict:
@@ -21,7 +37,7 @@ def get_str_beam_data(attributes: dict[str, str], supports: dict[str, str], load
     structured_beam_data = beams.get_structured_beam_data_from_str_lib(attributes, support_floats, loads)
     return structured_beam_data
 
-def get_model(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], **kwargs) -> FEModel3D:
+def get_model(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], backend: str = "auto", **kwargs) -> PyNite.FEModel3D:
     """
     Build and analyze beam model.
 
@@ -29,69 +45,205 @@ def get_model(attributes: dict[str, str], supports: dict[str, str], loads: list[
     - attributes (dict): Dictionary containing beam attributes.
     - supports (dict): Dictionary containing support positions and types.
     - loads (list): List of dictionaries containing load data.
+    - backend (str): "pynite" for a PyNite FEModel3D, "2d" for the native 2D stiffness engine or "auto" (default)
+      for direct equilibrium on statically determinate beams and PyNite otherwise.
     - **kwargs: Additional keyword arguments to pass to the beam model builder.
 
     Returns:
     - BeamModel: Analyzed beam model.
     """
     structured_beam_data = get_str_beam_data(attributes, supports, loads)
-    model = beams.build_beam(structured_beam_data, 1, **kwargs)
-    model.analyze(check_statics=False)
+    model = beams.build_beam(structured_beam_data, 1, backend, **kwargs)
+    with instrumentation.stage("analyze"):
+        model.analyze(check_statics=False)
     return model
 
-def get_shear_plots(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], target_load_dir: str = "Fy", target_combo: str = "unfactored", **kwargs) -> tuple[go.Figure, str]:
+def get_case_model(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], backend: str = "auto", session: beam2d.BeamSession2D | None = None):
     """
-    Get shear force plots for beam.
+    Build and analyze beam model with one load combo per load case (unfactored).
 
     Args:
     - attributes (dict): Dictionary containing beam attributes.
     - supports (dict): Dictionary containing support positions and types.
     - loads (list): List of dictionaries containing load data.
-    - target_load_dir (str): Target load direction for shear force.
+    - backend (str): "pynite" for a PyNite FEModel3D, "2d" for the native 2D stiffness engine or "auto" (default)
+      for direct equilibrium on statically determinate beams and PyNite otherwise.
+    - session (beam2d.BeamSession2D): If given, the model is built with the native 2D engine by the session (the backend is ignored),
+      reusing its stiffness factorization while only the loads change.
+
+    Returns:
+    - BeamModel: Analyzed beam model.
+    """
+    structured_beam_data = get_str_beam_data(attributes, supports, loads)
+    if session is not None:
+        model = session.build(structured_beam_data, False)
+    else:
+        model = beams.build_beam(structured_beam_data, False, backend)
+    if not model.LoadCombos:
+        model.add_load_combo("D", {"D": 1.0})  # Unloaded beam: results are all zero
+    with instrumentation.stage("analyze"):
+        model.analyze(check_statics=False)
+    return model
+
+def get_case_results(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], backend: str = "auto", n_points: int = 500, max_points: int | None = None, session: beam2d.BeamSession2D | None = None) -> dict[str, dict]:
+    """
+    Analyze each load case once and extract the unfactored result arrays.
+    Results are cached in RESULT_CACHE by content hash of the beam data, so identical beams are only solved once.
+
+    Args:
+    - attributes (dict): Dictionary containing beam attributes.
+    - supports (dict): Dictionary containing support positions and types.
+    - loads (list): List of dictionaries containing load data.
+    - backend (str): "pynite", "2d" or "auto" (see get_case_model).
+    - n_points (int): Number of points in each result array.
+    - max_points (int): If given, sample adaptively instead (beams.extract_arrays_adaptive) with at most this many points,
+      always exact at supports and point loads.
+    - session (beam2d.BeamSession2D): Optional session to build the model with (see get_case_model).
+
+    Returns:
+    - dict: Result arrays keyed by load case for each result type in RESULT_DIRECTIONS
+      (e.g. {"shear": {"D": array, "L": array}, "moment": {...}, "deflection": {...}}), and for 2D engine models
+      "polynomials": the exact shear and moment diagram of each load case (see get_case_polynomials).
+    """
+    structured_beam_data = get_str_beam_data(attributes, supports, loads)
+    if session is not None:
+        backend = "2d"
+    key = result_cache.beam_data_key(structured_beam_data, backend=backend, n_points=n_points, max_points=max_points, results=RESULT_DIRECTIONS)
+
+    def solve_case_results():
+        model = get_case_model(attributes, supports, loads, backend, session)
+        case_results = {}
+        for result_type, direction in RESULT_DIRECTIONS.items():
+            if max_points is None:
+                case_results.update({result_type: beams.extract_arrays_all_combos(model, result_type, direction, n_points)})
+            else:
+                case_results.update({result_type: beams.extract_arrays_adaptive(model, structured_beam_data, result_type, direction, max_points)})
+        polynomials = get_case_polynomials(model)
+        if polynomials is not None:
+            case_results.update({"polynomials": polynomials})
+        return case_results
+
+    return RESULT_CACHE.get_or_compute(key, solve_case_results)
+
+def get_case_polynomials(model: PyNite.FEModel3D | beam2d.BeamModel2D) -> dict | None:
+    """
+    Get the exact shear and moment diagrams of each load case of an analyzed case model (see get_case_model).
+
+    Args:
+    - model (BeamModel): Analyzed beam model with one load combo per load case.
+
+    Returns:
+    - dict | None: {"shear": {case: PiecewisePolynomial}, "moment": {...}} for 2D engine models, None for PyNite models
+      (and unloaded beams), whose peaks can only be sampled.
+    """
+    if not isinstance(model, beam2d.BeamModel2D) or not model.case_names:
+        return None
+    return {result_type: beams.extract_polynomials_all_combos(model, result_type, RESULT_DIRECTIONS[result_type]) for result_type in ("shear", "moment")}
+
+def get_combo_extrema(case_polys: dict | None, target_combo: str, **kwargs) -> dict | None:
+    """
+    Get the exact peaks of a CSA S6 combo from the exact load case diagrams.
+
+    Args:
+    - case_polys (dict): Exact diagram of each load case (one entry of get_case_polynomials), or None.
     - target_combo (str): Target load combination.
-    - **kwargs: Additional keyword arguments.
+    - **kwargs: Alpha factors passed to loadfactors.CSA_S6_2019_combos.
+
+    Returns:
+    - dict | None: "max_value", "max_loc", "min_value" and "min_loc" (see piecewise.polynomial_envelope), or None
+      without 'case_polys' (the plot then annotates the sampled peaks).
+    """
+    if not case_polys:
+        return None
+    load_combos = loadfactors.CSA_S6_2019_combos(**kwargs)
+    return piecewise.polynomial_envelope(piecewise.superpose_polynomials(case_polys, {target_combo: load_combos[target_combo]}))
+
+def get_combo_arrays(case_arrays: dict, **kwargs) -> dict:
+    """
+    Get the CSA S6 combo result arrays by superposition of load case result arrays.
+
+    Args:
+    - case_arrays (dict): Result arrays keyed by load case (one entry of get_case_results).
+    - **kwargs: Alpha factors passed to loadfactors.CSA_S6_2019_combos.
+
+    Returns:
+    - dict: Result arrays keyed by combo name.
+    """
+    return loadfactors.superpose_case_arrays(case_arrays, loadfactors.CSA_S6_2019_combos(**kwargs))
+
+def _get_diagram_plot(result_type: str, attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], target_load_dir: str, target_combo: str = "unfactored",
+                      case_results: dict | None = None, alpha_permutations: dict | None = None, live_envelope: dict | None = None, **kwargs) -> tuple[go.Figure, str]:
+    """
+    Get the 'result_type' ("shear" or "moment") plot for beam (see get_shear_plots for the other arguments).
 
     Returns:
     - tuple: Plotly figure and target load combination.
     """
-    model= get_model(attributes, supports, loads, **kwargs)
-    shear_arrays = beams.extract_arrays_all_combos(model, "shear", target_load_dir)   
-    
-    if target_combo == "max":
-        target_combo = loadfactors.get_max_combo(shear_arrays, **kwargs)[0]
-    env_shear_x_y = loadfactors.load_combo_array(shear_arrays, target_combo)
-    plot = plots.beam_2D_plot_plotly(env_shear_x_y, "shear", target_load_dir, "kN", "mm")
+    if case_results is None:
+        model = get_case_model(attributes, supports, loads)
+        case_arrays = beams.extract_arrays_all_combos(model, result_type, target_load_dir)
+        case_polys = beams.extract_polynomials_all_combos(model, result_type, target_load_dir) if isinstance(model, beam2d.BeamModel2D) and model.case_names else None
+    else:
+        case_arrays = case_results[result_type]
+        case_polys = case_results.get("polynomials", {}).get(result_type)
+    if live_envelope is not None:
+        load_combos = loadfactors.CSA_S6_2019_combos(**kwargs)
+        load_combos = {combo: factors for combo, factors in load_combos.items() if combo != "unfactored"} if target_combo == "max" else {target_combo: load_combos[target_combo]}
+        result_envelope = loadfactors.envelope(influence.superpose_moving_load(case_arrays, live_envelope, result_type, load_combos))
+        plot = plots.beam_2D_envelope_plotly(result_envelope, result_type, target_load_dir, "kN", "mm")
+        return (plot, result_envelope["governing_combo"])
+    result_arrays = get_combo_arrays(case_arrays, **kwargs)
+    if target_combo == "max" and alpha_permutations:
+        result_envelope = loadfactors.permutation_envelope(case_arrays, alpha_permutations)
+        target_combo = result_envelope["governing_combo"]
+        plot = plots.beam_2D_envelope_plotly(result_envelope, result_type, target_load_dir, "kN", "mm")
+    elif target_combo == "max":
+        del result_arrays["unfactored"]
+        result_envelope = loadfactors.envelope(result_arrays)
+        target_combo = result_envelope["governing_combo"]
+        plot = plots.beam_2D_envelope_plotly(result_envelope, result_type, target_load_dir, "kN", "mm")
+    else:
+        env_x_y = loadfactors.load_combo_array(result_arrays, target_combo)
+        plot = plots.beam_2D_plot_plotly(env_x_y, result_type, target_load_dir, "kN", "mm", extrema=get_combo_extrema(case_polys, target_combo, **kwargs))
 
     return (plot, target_combo)
 
-def get_moment_plots(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], target_load_dir: str = "Mz", target_combo: str = "unfactored", **kwargs) -> tuple[go.Figure, str]:
+def get_shear_plots(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], target_load_dir: str = "Fy", target_combo: str = "unfactored", case_results: dict | None = None, alpha_permutations: dict | None = None, live_envelope: dict | None = None, **kwargs) -> tuple[go.Figure, str]:
     """
-    Get bending moment plots for beam.
+    Get shear force plots for beam.
 
     Args:
     - attributes (dict): Dictionary containing beam attributes.
     - supports (dict): Dictionary containing support positions and types.
     - loads (list): List of dictionaries containing load data.
-    - target_load_dir (str): Target load direction for bending moment.
+    - target_load_dir (str): Target load direction for shear force.
     - target_combo (str): Target load combination.
+    - case_results (dict): Optional output of get_case_results (shear in "Fy") to reuse instead of re-analyzing.
+    - alpha_permutations (dict): Optional alpha factor permutations (loadfactors.alpha_factor_permutations); with target_combo "max"
+      the envelope covers every combo of every permutation.
+    - live_envelope (dict): Optional live load envelope (see get_pattern_envelope) used as load case "L"; the plot is then the
+      envelope of the target combo (or of every combo for "max") over the live load envelope. 'case_results' must be given
+      at the same points, without the loads it replaces.
     - **kwargs: Additional keyword arguments.
 
     Returns:
     - tuple: Plotly figure and target load combination.
     """
-    model= get_model(attributes, supports, loads)
-    moment_arrays = beams.extract_arrays_all_combos(model, "moment", target_load_dir)   
-    if target_combo == "max":
-        env_moment_x_y = loadfactors.get_max_combo(moment_arrays, **kwargs)[1]
-    else:
-        env_moment_x_y = loadfactors.load_combo_array(moment_arrays, target_combo)
-    plot = plots.beam_2D_plot_plotly(env_moment_x_y, "moment", target_load_dir, "kN", "mm")
+    return _get_diagram_plot("shear", attributes, supports, loads, target_load_dir, target_combo, case_results, alpha_permutations, live_envelope, **kwargs)
 
-    return (plot, target_combo)
+def get_moment_plots(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], target_load_dir: str = "Mz", target_combo: str = "unfactored", case_results: dict | None = None, alpha_permutations: dict | None = None, live_envelope: dict | None = None, **kwargs) -> tuple[go.Figure, str]:
+    """
+    Get bending moment plots for beam (same arguments as get_shear_plots, 'target_load_dir' for bending moment
+    and 'case_results' with the moment in "Mz").
+
+    Returns:
+    - tuple: Plotly figure and target load combination.
+    """
+    return _get_diagram_plot("moment", attributes, supports, loads, target_load_dir, target_combo, case_results, alpha_permutations, live_envelope, **kwargs)
 
 
 
-def get_beam_visual(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]]) -> go.Figure:
+def get_beam_visual(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]]) -> matplotlib_figure.Figure:
     """
     Get 2D visualization of the beam.
 
@@ -101,9 +253,149 @@ def get_beam_visual(attributes: dict[str, str], supports: dict[str, str], loads:
     - loads (list): List of dictionaries containing load data.
 
     Returns:
-    - go.Figure: Plotly figure of the beam visualization.
+    - Figure: Matplotlib figure of the beam visualization.
     """
     structured_beam_data = get_str_beam_data(attributes, supports, loads)
     plot = plots.plot_beam_visualization(structured_beam_data)
     return plot
 
+def get_beam_visual_image(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], image_format: str = "png") -> bytes:
+    """
+    Get the 2D visualization of the beam rendered in memory (cached by content hash of the beam data).
+
+    Args:
+    - attributes (dict): Dictionary containing beam attributes.
+    - supports (dict): Dictionary containing support positions and types.
+    - loads (list): List of dictionaries containing load data.
+    - image_format (str): "png" or "svg".
+
+    Returns:
+    - bytes: The rendered image.
+    """
+    structured_beam_data = get_str_beam_data(attributes, supports, loads)
+    return plots.beam_visual_image(structured_beam_data, image_format)
+
+
+
+def get_section_selection(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], catalog: dict, **kwargs) -> dict | None:
+    """
+    Find the lightest section of a catalog that satisfies the factored moment, shear and deflection checks.
+    The beam (with a unit self weight case) is analyzed once and cached; every section is checked from those results.
+
+    Args:
+    - attributes (dict): Dictionary containing beam attributes.
+    - supports (dict): Dictionary containing support positions and types.
+    - loads (list): List of dictionaries containing load data.
+    - catalog (dict): Section catalog (see design.read_section_catalog).
+    - **kwargs: Keyword arguments of design.section_checks (Fy, deflection_limit, alpha factors, ...).
+
+    Returns:
+    - dict | None: Checks of the selected section (see design.select_section), or None if no section works.
+    """
+    structured_beam_data = get_str_beam_data(attributes, supports, loads)
+    n_points = kwargs.pop("n_points", 500)
+    self_weight = kwargs.pop("self_weight", True)
+    case_results = None  # On springs or a foundation every section is analyzed on its own (see design.section_checks)
+    if not beam2d.has_elastic_supports(structured_beam_data["Supports"]):
+        key = result_cache.beam_data_key(structured_beam_data, n_points=n_points, self_weight=self_weight, results="design")
+        case_results = RESULT_CACHE.get_or_compute(key, lambda: design.case_result_arrays(structured_beam_data, n_points, self_weight=self_weight))
+    return design.select_section(structured_beam_data, catalog, n_points=n_points, self_weight=self_weight, case_results=case_results, **kwargs)
+
+
+
+def get_pattern_envelope(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], n_points: int = 500, live_case: str = "L") -> dict:
+    """
+    Get the pattern live load envelope: the loads in 'live_case' applied span by span in every on/off pattern
+    (see influence.pattern_load_envelope). Cached in RESULT_CACHE by content hash of the beam data.
+
+    Args:
+    - attributes (dict): Dictionary containing beam attributes.
+    - supports (dict): Dictionary containing support positions and types.
+    - loads (list): List of dictionaries containing load data.
+    - n_points (int): Number of points in each envelope (the same points as get_case_results without max_points).
+    - live_case (str): Load case of the live loads.
+
+    Returns:
+    - dict: The envelope (see influence.pattern_load_envelope).
+    """
+    structured_beam_data = get_str_beam_data(attributes, supports, loads)
+    key = result_cache.beam_data_key(structured_beam_data, n_points=n_points, live_case=live_case, results="pattern")
+    return RESULT_CACHE.get_or_compute(key, lambda: influence.pattern_load_envelope(structured_beam_data, n_points, live_case))
+
+
+
+def get_support_optimization(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], bounds: dict[str, tuple[float, float]],
+                             result_type: str = "moment", time_budget: float = 2.0, **kwargs) -> dict:
+    """
+    Find the support locations that minimize the peak factored moment, shear or SLS deflection (see support_layout.optimize_supports).
+    Cached in RESULT_CACHE by content hash of the inputs, so reruns of the app do not repeat the search.
+
+    Args:
+    - attributes (dict): Dictionary containing beam attributes.
+    - supports (dict): Dictionary containing support positions and types.
+    - loads (list): List of dictionaries containing load data.
+    - bounds (dict): (min, max) location of each support to move, keyed by its current location.
+    - result_type (str): "moment", "shear" or "deflection".
+    - time_budget (float): Seconds the search may take.
+    - **kwargs: Alpha factors passed to loadfactors.CSA_S6_2019_combos.
+
+    Returns:
+    - dict: The optimal layout and the convergence history (see support_layout.optimize_supports).
+    """
+    structured_beam_data = get_str_beam_data(attributes, supports, loads)
+    float_bounds = {float(loc): (float(lo), float(hi)) for loc, (lo, hi) in bounds.items()}
+    key = result_cache.beam_data_key(structured_beam_data, bounds=float_bounds, result_type=result_type, time_budget=time_budget, results="layout", **kwargs)
+    return RESULT_CACHE.get_or_compute(key, lambda: support_layout.optimize_supports(structured_beam_data, float_bounds, result_type, time_budget, **kwargs))
+
+
+
+def get_app_results_key(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], **params) -> str:
+    """
+    Get a content hash of the app inputs, used to tell whether get_app_results needs to be re-run.
+
+    Args:
+    - attributes (dict): Dictionary containing beam attributes.
+    - supports (dict): Dictionary containing support positions and types.
+    - loads (list): List of dictionaries containing load data.
+    - **params: The other inputs of get_app_results (target combo, alpha factors, ...).
+
+    Returns:
+    - str: Hex digest of the inputs.
+    """
+    structured_beam_data = get_str_beam_data(attributes, supports, loads)
+    return result_cache.beam_data_key(structured_beam_data, name=structured_beam_data["Name"], **params)
+
+def get_app_results(attributes: dict[str, str], supports: dict[str, str], loads: list[dict[str, str]], target_combo: str = "max", alpha_permutations: dict | None = None, max_points: int = 80, session: beam2d.BeamSession2D | None = None, pattern_live: bool = False, **kwargs) -> dict:
+    """
+    Run the whole app pipeline (analysis, superposition and plots) without touching the Streamlit page,
+    so it can run in a background analysis_worker.AnalysisWorker.
+
+    Args:
+    - attributes (dict): Dictionary containing beam attributes.
+    - supports (dict): Dictionary containing support positions and types.
+    - loads (list): List of dictionaries containing load data.
+    - target_combo (str): Target load combination ("max" for the envelope).
+    - alpha_permutations (dict): Optional alpha factor permutations (see get_shear_plots).
+    - max_points (int): Maximum number of points in each adaptive result array (see get_case_results).
+    - session (beam2d.BeamSession2D): Optional session to build the model with (see get_case_model).
+    - pattern_live (bool): If True, the live loads (case "L") are applied span by span in every on/off pattern
+      (see get_pattern_envelope) and the plots are envelopes over the patterns; 'alpha_permutations' and
+      'max_points' are not used then (the results are sampled at PATTERN_POINTS points).
+    - **kwargs: Alpha factors passed to loadfactors.CSA_S6_2019_combos.
+
+    Returns:
+    - dict: "shear_plot" and "moment_plot" (the tuples of get_shear_plots and get_moment_plots) and "beam_visual"
+      (PNG bytes of get_beam_visual_image).
+    """
+    live_envelope = None
+    if pattern_live:
+        static_loads = [load for load in loads if load["Case"] != "L"]
+        live_envelope = get_pattern_envelope(attributes, supports, loads, PATTERN_POINTS)
+        case_results = get_case_results(attributes, supports, static_loads, "2d", PATTERN_POINTS) if static_loads else {"shear": {}, "moment": {}}
+        alpha_permutations = None
+    else:
+        case_results = get_case_results(attributes, supports, loads, max_points=max_points, session=session)
+    shear_plot = get_shear_plots(attributes, supports, loads, target_combo=target_combo, case_results=case_results, alpha_permutations=alpha_permutations, live_envelope=live_envelope, **kwargs)
+    moment_plot = get_moment_plots(attributes, supports, loads, target_combo=target_combo, case_results=case_results, alpha_permutations=alpha_permutations, live_envelope=live_envelope, **kwargs)
+    beam_visual = get_beam_visual_image(attributes, supports, loads)
+    return {"shear_plot": shear_plot, "moment_plot": moment_plot, "beam_visual": beam_visual}
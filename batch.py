@@ -0,0 +1,269 @@
+"""
+Batch analysis of beam files (in the beams.read_beam_file format, one or more beams per file separated by
+blank lines) across a pool of worker processes.
+
+Example:
+    python batch.py girders/ "more_girders/*.txt" --output results.jsonl --workers 8
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import beam2d
+import beams
+import instrumentation
+import lazy_imports
+import beam_parser
+import loadfactors
+import piecewise
+
+
+RESULT_DIRECTIONS = {"shear": "Fy", "moment": "Mz", "deflection": "dy"}
+SUMMARY_KEYS = ["max", "max_loc", "max_combo", "min", "min_loc", "min_combo", "governing_combo"]
+CSV_FIELDS = ["file", "line", "name", "status", "error", "seconds"] + [f"{result_type}_{key}" for result_type in RESULT_DIRECTIONS for key in SUMMARY_KEYS]
+
+_worker_settings = {}
+
+
+def iter_beam_files(paths: list[str], pattern: str = "*.txt") -> list[str]:
+    """
+    Returns the sorted, de-duplicated list of beam files for 'paths', where each path is a beam file,
+    a directory (all files matching 'pattern' in it) or a glob pattern
+    """
+    acc = []
+    for path in paths:
+        if os.path.isdir(path):
+            acc.extend(glob.glob(os.path.join(path, pattern)))
+        elif os.path.isfile(path):
+            acc.append(path)
+        else:
+            acc.extend(glob.glob(path))
+    return sorted(set(acc))
+
+
+def init_worker(settings: dict):
+    """
+    Process pool initializer: stores the analyze_beam_file settings once per worker process and
+    imports the solver dependencies that are otherwise loaded lazily on first use (scipy for the 2D
+    engine, PyNite unless the backend is "2d"), so the first file of each worker is not slowed down.
+    """
+    _worker_settings.update(settings)
+    lazy_imports.prewarm(["scipy.linalg"] + (["PyNite"] if settings.get("backend", "pynite") != "2d" else []))
+
+
+def analyze_beam(beam: beam_parser.BeamDefinition, backend: str = "pynite", n_points: int = 500, alpha_factors: dict | None = None, include_envelopes: bool = False,
+                 adaptive: bool = False, alpha_permutations: dict | None = None) -> dict:
+    """
+    Analyzes 'beam' and returns a JSON-serializable summary of the max/min envelopes (over the factored
+    CSA S6 combos) of shear, moment and deflection: peak values, their locations and governing combos.
+    If 'adaptive', the results are sampled with beams.extract_arrays_adaptive (at most n_points per result).
+    If 'alpha_permutations' (see loadfactors.alpha_factor_permutations) is given, the envelopes cover every combo
+    of every permutation (combo names are "{combo} ({permutation})") and 'alpha_factors' is ignored.
+    With the "2d" backend the peaks are exact (see piecewise); otherwise they are taken from the n_points samples.
+    """
+    summary = {}
+    model = beams.build_beam(beam, False, backend)
+    with instrumentation.stage("analyze"):
+        model.analyze(check_statics=False)
+    if alpha_permutations:
+        load_combos, _ = loadfactors.permutation_combos(alpha_permutations)
+    else:
+        load_combos = loadfactors.CSA_S6_2019_combos(**(alpha_factors or {}))
+        del load_combos["unfactored"]
+    for result_type, direction in RESULT_DIRECTIONS.items():
+        if adaptive:
+            case_arrays = beams.extract_arrays_adaptive(model, beam, result_type, direction, n_points)
+        else:
+            case_arrays = beams.extract_arrays_all_combos(model, result_type, direction, n_points)
+        enveloped = loadfactors.envelope(loadfactors.superpose_case_arrays(case_arrays, load_combos))
+        if isinstance(model, beam2d.BeamModel2D):
+            # Exact peaks from the piecewise polynomial diagrams instead of the sampled envelope
+            case_polys = model.case_polynomials(result_type, direction)
+            enveloped.update(piecewise.polynomial_envelope(piecewise.superpose_polynomials(case_polys, load_combos)))
+        result_summary = {key: enveloped[key] for key in ("max_value", "max_loc", "max_combo", "min_value", "min_loc", "min_combo", "governing_combo")}
+        if include_envelopes:
+            result_summary.update({"x": enveloped["x"].tolist(), "envelope_max": enveloped["max"].tolist(), "envelope_min": enveloped["min"].tolist(),
+                                   "max_combos": [enveloped["combos"][idx] for idx in enveloped["max_idx"]],
+                                   "min_combos": [enveloped["combos"][idx] for idx in enveloped["min_idx"]]})
+        summary[result_type] = result_summary
+    return summary
+
+
+def analyze_beam_file(file_name: str, **settings) -> list[dict]:
+    """
+    Analyzes every beam in 'file_name' (one or more beams separated by blank lines) and returns one
+    summary per beam (see analyze_beam; 'settings' are passed to it). Each beam is parsed and analyzed
+    on its own, so an error in one beam is returned in its summary and does not stop the others.
+    """
+    acc = []
+    for first_line, block in beam_parser.iter_beam_blocks(file_name):
+        start = time.perf_counter()
+        summary = {"file": file_name, "line": first_line, "name": None, "status": "ok", "error": None}
+        try:
+            beam = beam_parser.parse_beam(block, first_line, file_name)
+            summary["name"] = beam.name
+            summary.update(analyze_beam(beam, **settings))
+        except Exception as err:
+            summary.update({"status": "error", "error": f"{type(err).__name__}: {err}"})
+        summary["seconds"] = round(time.perf_counter() - start, 4)
+        acc.append(summary)
+    if not acc:
+        acc.append({"file": file_name, "line": None, "name": None, "status": "error", "error": "BeamParseError: no beam found", "seconds": 0.0})
+    return acc
+
+
+def _analyze_in_worker(file_name: str) -> list[dict]:
+    return analyze_beam_file(file_name, **_worker_settings)
+
+
+def summary_to_row(summary: dict) -> dict:
+    """
+    Flattens a beam summary from analyze_beam_file into a CSV row with the CSV_FIELDS columns
+    """
+    row = {key: summary.get(key) for key in ("file", "line", "name", "status", "error", "seconds")}
+    for result_type in RESULT_DIRECTIONS:
+        result_summary = summary.get(result_type, {})
+        for key in SUMMARY_KEYS:
+            row[f"{result_type}_{key}"] = result_summary.get(f"{key}_value" if key in ("max", "min") else key)
+    return row
+
+
+class ResultWriter:
+    """
+    Streams beam summaries to a CSV or JSON-lines file (chosen by the file extension or 'output_format')
+    """
+
+    def __init__(self, file_name: str, output_format: str | None = None):
+        self.output_format = output_format or ("csv" if file_name.lower().endswith(".csv") else "jsonl")
+        self.file = sys.stdout if file_name == "-" else open(file_name, "w", newline="")
+        if self.output_format == "csv":
+            self.csv_writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            self.csv_writer.writeheader()
+
+    def write(self, summary: dict):
+        if self.output_format == "csv":
+            self.csv_writer.writerow(summary_to_row(summary))
+        else:
+            self.file.write(json.dumps(summary) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def run_batch(file_names: list[str], writer: ResultWriter, workers: int | None = None, max_in_flight: int | None = None,
+              progress: bool = True, **settings) -> dict[str, int]:
+    """
+    Analyzes 'file_names' across a process pool and writes the summary of each beam to 'writer' as soon as its file finishes.
+    At most 'max_in_flight' files (default: 4 per worker) are queued at once to keep memory bounded.
+    'settings' are passed to analyze_beam (backend, n_points, alpha_factors, include_envelopes, adaptive, alpha_permutations).
+    A file whose worker fails (e.g. a worker process that crashed, which breaks the pool) gets one error summary;
+    a broken pool is replaced by a new one for the remaining files.
+
+    Returns the number of beams that were analyzed ("ok") and that failed ("error")
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 4 * workers
+    settings = {"backend": "pynite", "n_points": 500, "alpha_factors": {}, "include_envelopes": False, "adaptive": False, "alpha_permutations": None, **settings}
+    counts = {"ok": 0, "error": 0}
+    total = len(file_names)
+    finished_files = 0
+    pending_files = iter(file_names)
+    start = time.perf_counter()
+
+    def new_pool() -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(settings,))
+
+    executor = new_pool()
+    in_flight = {}  # future: (file name, the pool it was submitted to)
+    try:
+        for file_name in pending_files:
+            in_flight[executor.submit(_analyze_in_worker, file_name)] = (file_name, executor)
+            if len(in_flight) >= max_in_flight:
+                break
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                file_name, pool = in_flight.pop(future)
+                finished_files += 1
+                try:
+                    summaries = future.result()
+                except Exception as err:
+                    summaries = [{"file": file_name, "line": None, "name": None, "status": "error", "error": f"{type(err).__name__}: {err}", "seconds": 0.0}]
+                    if isinstance(err, BrokenProcessPool) and pool is executor:
+                        # Every file in flight on the broken pool fails; the remaining files get a new pool
+                        executor.shutdown(wait=False)
+                        executor = new_pool()
+                for summary in summaries:
+                    writer.write(summary)
+                    counts[summary["status"]] += 1
+                    if progress:
+                        message = summary["error"] if summary["status"] == "error" else f"{summary['seconds']:.3f} s"
+                        print(f"[{finished_files}/{total}] {summary['file']}:{summary['line']} {summary['name']}: {summary['status']} ({message}), "
+                              f"{time.perf_counter() - start:.1f} s elapsed", file=sys.stderr)
+                next_file = next(pending_files, None)
+                if next_file is not None:
+                    in_flight[executor.submit(_analyze_in_worker, next_file)] = (next_file, executor)
+    finally:
+        executor.shutdown(cancel_futures=True)
+    return counts
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze a directory or glob of beam files and stream the CSA S6 envelopes to CSV/JSONL.")
+    parser.add_argument("paths", nargs="+", help="Beam files, directories or glob patterns")
+    parser.add_argument("-o", "--output", default="-", help="Output file (.csv or .jsonl); '-' for stdout (default)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None, help="Output format (default: from the output file extension, else jsonl)")
+    parser.add_argument("--pattern", default="*.txt", help="File pattern used for directories (default: *.txt)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Maximum number of queued files (default: 4 per worker)")
+    parser.add_argument("--backend", choices=["pynite", "2d", "auto"], default="pynite",
+                        help="'auto': direct equilibrium for statically determinate beams, PyNite otherwise")
+    parser.add_argument("--n-points", type=int, default=500)
+    parser.add_argument("--adaptive", action="store_true", help="Sample adaptively (exact at supports and point loads) with at most --n-points per result")
+    parser.add_argument("--envelopes", action="store_true", help="Include the full envelope arrays and governing combos per point (JSONL)")
+    parser.add_argument("--quiet", action="store_true", help="Do not report progress on stderr")
+    parser.add_argument("--material-type", default="M2")
+    parser.add_argument("--earth-pressure-type", default="E1")
+    parser.add_argument("--live-load-span-type", default="Normal")
+    parser.add_argument("--alpha-D-min", action="store_true", help="Use the minimum dead load factor")
+    parser.add_argument("--alpha-E-min", action="store_true", help="Use the minimum earth pressure factor")
+    parser.add_argument("--alpha-P-min", action="store_true", help="Use the minimum prestress factor")
+    parser.add_argument("--vessel-collision", action="store_true", help="Use the vessel collision live load factor for ULS8")
+    parser.add_argument("--alpha-permutations", action="store_true", help="Envelope every max/min permutation of the D, E and P factors (ignores the --alpha-*-min options)")
+    args = parser.parse_args(argv)
+
+    alpha_factors = loadfactors.get_alpha_factors(material_type=args.material_type, alpha_D_max_min=int(args.alpha_D_min),
+                                                  earth_pressure_type=args.earth_pressure_type, alpha_E_max_min=int(args.alpha_E_min),
+                                                  alpha_P_max_min=int(args.alpha_P_min), L_span_type=args.live_load_span_type,
+                                                  L_vehicle_vessle=int(args.vessel_collision))
+    alpha_permutations = None
+    if args.alpha_permutations:
+        alpha_permutations = loadfactors.alpha_factor_permutations(material_type=args.material_type, earth_pressure_type=args.earth_pressure_type,
+                                                                   L_span_type=args.live_load_span_type, L_vehicle_vessle=int(args.vessel_collision))
+    file_names = iter_beam_files(args.paths, args.pattern)
+    if not file_names:
+        print("No beam files found.", file=sys.stderr)
+        return 1
+
+    writer = ResultWriter(args.output, args.format)
+    try:
+        counts = run_batch(file_names, writer, workers=args.workers, max_in_flight=args.max_in_flight, progress=not args.quiet,
+                           backend=args.backend, n_points=args.n_points, alpha_factors=alpha_factors, include_envelopes=args.envelopes,
+                           adaptive=args.adaptive, alpha_permutations=alpha_permutations)
+    finally:
+        writer.close()
+    print(f"Analyzed {counts['ok']} beams, {counts['error']} failed.", file=sys.stderr)
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
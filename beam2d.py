@@ -0,0 +1,880 @@
+import math
+import threading
+import numpy as np
+import loadfactors
+import beam_parser
+import piecewise
+import lazy_imports
+
+scipy_linalg = lazy_imports.lazy_import("scipy.linalg")
+
+
+RESTRAINT_DICT_2D = {"P": (True, True, False),
+                     "R": (False, True, False),
+                     "F": (True, True, True),
+                     "Free": (False, False, False)}
+
+TRANSVERSE_DIRECTIONS = {"Fy": "Fy", "FY": "Fy", "Mz": "Mz", "MZ": "Mz"}
+AXIAL_DIRECTIONS = {"Fx": "Fx", "FX": "Fx"}
+SPRING_DOFS = {"Kx": 0, "Ky": 1, "Kr": 2}
+
+FOUNDATION_SEGMENT_LENGTH = 0.1  # Foundation element length, times lambda (finer meshes only add round-off)
+FOUNDATION_MIN_SEGMENTS = 20  # Elements per Winkler foundation region
+FOUNDATION_MAX_SEGMENTS = 20000
+
+GAUSS_POINTS, GAUSS_WEIGHTS = np.polynomial.legendre.leggauss(3)
+
+
+def get_node_coords(support_locs: list[float], beam_len: float) -> np.ndarray:
+    """
+    Returns a sorted array of the node x-coordinates for the 2D model. Nodes are placed at the
+    start and end of the beam and at every support location (no duplicates), in the same way as
+    beams.get_node_locations.
+    """
+    return np.unique(np.array([0.0, float(beam_len), *[float(loc) for loc in support_locs]]))
+
+
+def element_stiffness(E: float, Iz: float, A: float, lengths: np.ndarray) -> np.ndarray:
+    """
+    Returns an array of shape (n_elements, 6, 6) with the local stiffness matrix of each 2D
+    Euler-Bernoulli frame element. DOFs are ordered (u_i, v_i, theta_i, u_j, v_j, theta_j).
+    """
+    Le = np.asarray(lengths, dtype=float)
+    k = np.zeros((len(Le), 6, 6))
+    ea = E * A / Le
+    k[:, 0, 0] = k[:, 3, 3] = ea
+    k[:, 0, 3] = k[:, 3, 0] = -ea
+
+    ei = E * Iz
+    k11 = 12 * ei / Le**3
+    k12 = 6 * ei / Le**2
+    k22 = 4 * ei / Le
+    k24 = 2 * ei / Le
+    bending = np.array([[k11, k12, -k11, k12],
+                        [k12, k22, -k12, k24],
+                        [-k11, -k12, k11, -k12],
+                        [k12, k24, -k12, k22]])  # (4, 4, n_elements)
+    rows, cols = np.ix_([1, 2, 4, 5], [1, 2, 4, 5])
+    k[:, rows, cols] = np.moveaxis(bending, -1, 0)
+    return k
+
+
+def foundation_stiffness(modulus: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Returns an array of shape (n_elements, 6, 6) with the consistent stiffness matrix of a Winkler
+    foundation of 'modulus' (force / length / length of beam) under each element, on the same DOFs
+    as element_stiffness
+    """
+    Le = np.asarray(lengths, dtype=float)
+    scale = np.asarray(modulus, dtype=float) * Le / 420
+    k = np.zeros((len(Le), 6, 6))
+    foundation = np.array([[156 + 0*Le, 22*Le, 54 + 0*Le, -13*Le],
+                           [22*Le, 4*Le**2, 13*Le, -3*Le**2],
+                           [54 + 0*Le, 13*Le, 156 + 0*Le, -22*Le],
+                           [-13*Le, -3*Le**2, -22*Le, 4*Le**2]]) * scale  # (4, 4, n_elements)
+    rows, cols = np.ix_([1, 2, 4, 5], [1, 2, 4, 5])
+    k[:, rows, cols] = np.moveaxis(foundation, -1, 0)
+    return k
+
+
+def foundation_node_coords(regions: list[tuple[float, float, float]], EI: float) -> np.ndarray:
+    """
+    Returns the node x-coordinates that split each Winkler foundation region (start, end, modulus) into
+    elements of about FOUNDATION_SEGMENT_LENGTH / lambda, where lambda = (modulus / (4 * EI))^(1/4), with
+    between FOUNDATION_MIN_SEGMENTS and FOUNDATION_MAX_SEGMENTS elements per region
+    """
+    acc = [np.zeros(0)]
+    for start, end, modulus in regions:
+        lam = (modulus / (4 * EI)) ** 0.25
+        n_segments = math.ceil((end - start) * lam / FOUNDATION_SEGMENT_LENGTH)
+        n_segments = min(max(n_segments, FOUNDATION_MIN_SEGMENTS), FOUNDATION_MAX_SEGMENTS)
+        acc.append(np.linspace(start, end, n_segments + 1))
+    return np.concatenate(acc)
+
+
+def foundation_integrals(node_coords: np.ndarray, modulus: np.ndarray, D: np.ndarray) -> list[list[piecewise.PiecewisePolynomial]]:
+    """
+    Returns, for each column of nodal displacements in 'D' (3 * n_nodes x n_cases), the first four integrals
+    from x = 0 of the Winkler foundation pressure (-modulus * v, with v the Hermite interpolation of the nodal
+    displacements in each element) as piecewise.PiecewisePolynomials on 'node_coords'. They add to the shear
+    and to the 1st to 3rd integrals of the load terms (see macaulay with k = 0 to 3).
+
+    Each integral is built element by element from the running value at the element start, so its cost and
+    round-off grow linearly with the number of elements. The pressure's consistent nodal loads are exactly
+    the foundation stiffness times 'D', so the diagrams close at the beam ends.
+    """
+    Le = np.diff(node_coords)
+    v = D[1::3]
+    theta = D[2::3]
+    a2 = (3 * (v[1:] - v[:-1]) / Le[:, None] - 2 * theta[:-1] - theta[1:]) / Le[:, None]
+    a3 = (2 * (v[:-1] - v[1:]) / Le[:, None] + theta[:-1] + theta[1:]) / Le[:, None]**2
+    coefs = -modulus[:, None, None] * np.stack([v[:-1], theta[:-1], a2, a3], axis=1)  # (n_elements, 4, n_cases)
+
+    levels = []
+    for _ in range(4):
+        integrated = np.zeros((len(Le), coefs.shape[1] + 1, coefs.shape[2]))
+        integrated[:, 1:] = coefs / np.arange(1, coefs.shape[1] + 1)[None, :, None]
+        increments = (integrated * Le[:, None, None] ** np.arange(coefs.shape[1] + 1)[None, :, None]).sum(axis=1)
+        integrated[:, 0] = np.cumsum(increments, axis=0) - increments
+        levels.append(integrated)
+        coefs = integrated
+    return [[piecewise.PiecewisePolynomial(node_coords, level[:, :, idx]) for level in levels] for idx in range(D.shape[1])]
+
+
+def hermite_shapes(xi: np.ndarray, Le: np.ndarray) -> np.ndarray:
+    """
+    Returns the cubic Hermite shape functions (v_i, theta_i, v_j, theta_j) evaluated at the
+    normalized element coordinate(s) 'xi', stacked on the last axis
+    """
+    return np.stack([1 - 3*xi**2 + 2*xi**3,
+                     Le * (xi - 2*xi**2 + xi**3),
+                     3*xi**2 - 2*xi**3,
+                     Le * (-xi**2 + xi**3)], axis=-1)
+
+
+def hermite_slopes(xi: np.ndarray, Le: np.ndarray) -> np.ndarray:
+    """
+    Returns the x-derivatives of the cubic Hermite shape functions at 'xi', stacked on the last axis
+    """
+    return np.stack([(-6*xi + 6*xi**2) / Le,
+                     1 - 4*xi + 3*xi**2,
+                     (6*xi - 6*xi**2) / Le,
+                     -2*xi + 3*xi**2], axis=-1)
+
+
+def get_load_arrays(loads: list[dict]) -> tuple:
+    """
+    Returns the loads in 'loads' (load dicts, as in beams.parse_loads) as the arrays taken by
+    load_terms_from_arrays: (load_type, direction, w1, w2, x1, x2)
+    """
+    is_point = [load["Type"] == "Point" for load in loads]
+    return (np.where(is_point, 0, 1).astype(int),
+            np.array([load["Direction"] for load in loads], dtype="U2"),
+            np.array([load["Magnitude"] if point else load["Start Magnitude"] for load, point in zip(loads, is_point)], dtype=float),
+            np.array([load["Magnitude"] if point else load["End Magnitude"] for load, point in zip(loads, is_point)], dtype=float),
+            np.array([load["Location"] if point else load["Start Location"] for load, point in zip(loads, is_point)], dtype=float),
+            np.array([load["Location"] if point else load["End Location"] for load, point in zip(loads, is_point)], dtype=float))
+
+
+def get_load_terms(loads: list[dict], beam_len: float) -> dict:
+    """
+    Returns the loads in 'loads' (load dicts, as in beams.parse_loads) as singularity (Macaulay)
+    function terms. See load_terms_from_arrays.
+    """
+    return load_terms_from_arrays(*get_load_arrays(loads), beam_len)
+
+
+def load_terms_from_arrays(load_type, direction, w1, w2, x1, x2, beam_len: float) -> dict:
+    """
+    Returns the loads described by the arrays (one entry per load, as in beam_parser.BeamLoads:
+    load_type 0 for point loads and 1 for distributed loads) as singularity (Macaulay) function terms.
+
+    Each term contributes c * <x - a>^n / n! to the shear (or axial force) along the beam:
+        n = -1: concentrated moment (stored as c = -Mz, it does not appear in the shear)
+        n = 0: point load
+        n = 1: uniform load intensity starting at 'a'
+        n = 2: load intensity slope starting at 'a'
+
+    Returns a dict with the "transverse" and "axial" terms, each a tuple of arrays (c, a, n)
+    """
+    load_type = np.asarray(load_type, dtype=int).reshape(-1)
+    direction = np.asarray(direction, dtype="U2").reshape(-1)
+    w1 = np.asarray(w1, dtype=float).reshape(-1)
+    w2 = np.asarray(w2, dtype=float).reshape(-1)
+    x1 = np.clip(np.asarray(x1, dtype=float).reshape(-1), 0.0, beam_len)
+    x2 = np.clip(np.asarray(x2, dtype=float).reshape(-1), 0.0, beam_len)
+
+    is_transverse = np.isin(direction, list(TRANSVERSE_DIRECTIONS))
+    is_axial = np.isin(direction, list(AXIAL_DIRECTIONS))
+    if not (is_transverse | is_axial).all():
+        bad = direction[~(is_transverse | is_axial)][0]
+        raise ValueError(f"Load direction '{bad}' is not an in-plane direction supported by the 2D backend.")
+    is_moment = np.isin(direction, [d for d, local in TRANSVERSE_DIRECTIONS.items() if local == "Mz"])
+    is_point = load_type == 0
+    if (is_moment & ~is_point).any():
+        raise ValueError("Distributed moments are not supported by the 2D backend.")
+
+    # Distributed loads: ordered start to end, zero length loads dropped
+    swap = x2 < x1
+    x1, x2, w1, w2 = np.where(swap, x2, x1), np.where(swap, x1, x2), np.where(swap, w2, w1), np.where(swap, w1, w2)
+    is_dist = ~is_point & (x2 > x1)
+    slope = np.divide(w2 - w1, x2 - x1, out=np.zeros_like(w1), where=is_dist)
+
+    def select(mask):
+        point = mask & is_point
+        dist = mask & is_dist
+        c = np.concatenate([np.where(is_moment[point], -w1[point], w1[point]), w1[dist], slope[dist], -w2[dist], -slope[dist]])
+        a = np.concatenate([x1[point], x1[dist], x1[dist], x2[dist], x2[dist]])
+        n_dist = int(dist.sum())
+        n = np.concatenate([np.where(is_moment[point], -1, 0), np.full(n_dist, 1), np.full(n_dist, 2), np.full(n_dist, 1), np.full(n_dist, 2)]).astype(int)
+        return (c, a, n)
+
+    return {"transverse": select(is_transverse), "axial": select(is_axial)}
+
+
+def macaulay(x: np.ndarray, terms: tuple, k: int, beam_len: float) -> np.ndarray:
+    """
+    Returns the k-th integral of the singularity function terms (c, a, n) evaluated at 'x':
+        sum(c * <x - a>^(n+k) / (n+k)!)
+
+    Terms located at the end of the beam are ignored and jumps are right-continuous so that
+    values at discontinuities match PyNite's sampling convention.
+    """
+    c, a, n = terms
+    x = np.atleast_1d(np.asarray(x, dtype=float))
+    p = n + k
+    keep = (p >= 0) & (a < beam_len * (1 - 1e-12))
+    if not np.any(keep):
+        return np.zeros(x.shape)
+    c, a, p = c[keep], a[keep], p[keep]
+    tol = 1e-10 * max(beam_len, 1.0)
+    d = x[None, :] - a[:, None]
+    active = d >= -tol
+    d = np.maximum(d, 0.0)
+    factorials = np.array([math.factorial(power) for power in p], dtype=float)
+    values = np.where(active, d ** p[:, None], 0.0) * (c / factorials)[:, None]
+    return values.sum(axis=0)
+
+
+def equivalent_nodal_loads(terms: dict, node_coords: np.ndarray) -> np.ndarray:
+    """
+    Returns the consistent (work-equivalent) nodal load vector of length 3 * n_nodes for the
+    load terms in 'terms'. For Euler-Bernoulli elements these are exactly the fixed end actions.
+    """
+    n_nodes = len(node_coords)
+    F = np.zeros(3 * n_nodes)
+    lengths = np.diff(node_coords)
+
+    for key, dof_offsets in (("transverse", (1, 2, 4, 5)), ("axial", (0, 3))):
+        c, a, n = terms[key]
+        dofs = np.array(dof_offsets)
+
+        # Concentrated forces and moments
+        for coef, loc, order in zip(c[n <= 0], a[n <= 0], n[n <= 0]):
+            e = min(max(np.searchsorted(node_coords, loc, side="right") - 1, 0), n_nodes - 2)
+            Le = lengths[e]
+            xi = (loc - node_coords[e]) / Le
+            if key == "axial":
+                shapes = np.array([1 - xi, xi])
+            elif order == 0:
+                shapes = hermite_shapes(xi, Le)
+            else:
+                shapes = -hermite_slopes(xi, Le)  # c = -Mz
+            np.add.at(F, 3 * e + dofs, coef * shapes)
+
+        # Distributed loads: integrate each element piece with Gauss quadrature
+        intensity_terms = (c[n >= 1], a[n >= 1], n[n >= 1] - 1)
+        if len(intensity_terms[0]) == 0:
+            continue
+        starts = np.unique(np.concatenate([intensity_terms[1], node_coords]))
+        starts = starts[(starts >= node_coords[0]) & (starts < node_coords[-1])]
+        ends = np.append(starts[1:], node_coords[-1])
+        mid = (starts + ends) / 2
+        half = (ends - starts) / 2
+        elements = np.clip(np.searchsorted(node_coords, mid, side="right") - 1, 0, n_nodes - 2)
+        Le = lengths[elements]
+        for g, wt in zip(GAUSS_POINTS, GAUSS_WEIGHTS):
+            xg = mid + half * g
+            w = macaulay(xg, intensity_terms, 0, node_coords[-1])
+            xi = (xg - node_coords[elements]) / Le
+            if key == "axial":
+                shapes = np.stack([1 - xi, xi], axis=-1)
+            else:
+                shapes = hermite_shapes(xi, Le)
+            contributions = (wt * half * w)[:, None] * shapes
+            np.add.at(F, 3 * elements[:, None] + dofs[None, :], contributions)
+    return F
+
+
+def factorize_banded(ab: np.ndarray, name: str) -> np.ndarray:
+    """
+    Returns the banded Cholesky factor of the upper banded stiffness matrix 'ab'.
+    Raises a ValueError if the matrix is singular (i.e. the beam 'name' is a mechanism).
+    """
+    try:
+        factor = scipy_linalg.cholesky_banded(ab)
+    except scipy_linalg.LinAlgError:
+        raise ValueError(f"Beam '{name}' is unstable: the stiffness matrix is singular.")
+    pivots = factor[-1] ** 2
+    if np.any(pivots <= 1e-10 * ab[-1]):
+        raise ValueError(f"Beam '{name}' is unstable: the stiffness matrix is singular.")
+    return factor
+
+
+def unit_point_loads(node_coords: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    Returns the (3 * n_nodes x n_positions) consistent nodal load vectors of a unit downward (-Fy)
+    point load at each of 'positions'
+    """
+    n_nodes = len(node_coords)
+    positions = np.clip(np.asarray(positions, dtype=float), node_coords[0], node_coords[-1])
+    elements = np.clip(np.searchsorted(node_coords, positions, side="right") - 1, 0, n_nodes - 2)
+    Le = np.diff(node_coords)[elements]
+    xi = (positions - node_coords[elements]) / Le
+    F = np.zeros((3 * n_nodes, len(positions)))
+    dofs = 3 * elements[:, None] + np.array([1, 2, 4, 5])[None, :]
+    F[dofs, np.arange(len(positions))[:, None]] = -hermite_shapes(xi, Le)
+    return F
+
+
+class Member2D:
+    """
+    Results for the single beam member of a solved BeamModel2D. The result methods mirror the
+    PyNite member methods used in this project (shear_array, moment_array, etc.) so that
+    beams.extract_arrays_all_combos works with either backend.
+    """
+
+    def __init__(self, model: "BeamModel2D"):
+        self.model = model
+
+    def L(self) -> float:
+        return self.model.L
+
+    def _combo_terms(self, key: str, combo_name: str) -> tuple:
+        factors = self.model.combo_factors(combo_name)
+        case_idx, c, a, n = self.model.result_terms[key]
+        return (c * factors[case_idx], a, n)
+
+    def _initial(self, key: str, combo_name: str) -> float:
+        return float(self.model.combo_factors(combo_name) @ self.model.initial_values[key])
+
+    def _foundation(self, x: np.ndarray, k: int, combo_name: str) -> np.ndarray | float:
+        # k-th integral of the Winkler foundation pressure for 'combo_name' (see foundation_integrals)
+        if not self.model.foundation_results:
+            return 0.0
+        polys = [self.model.foundation_results[case][k] for case in self.model.case_names]
+        return polys[0].scaled_sum(polys, self.model.combo_factors(combo_name))(x)
+
+    def shear(self, Direction: str, x, combo_name: str = "Combo 1"):
+        x = np.asarray(x, dtype=float)
+        if Direction == "Fz":
+            return np.zeros(x.shape) if x.ndim else 0.0
+        if Direction != "Fy":
+            raise ValueError(f"Direction must be 'Fy' or 'Fz'. {Direction} was given.")
+        values = macaulay(x, self._combo_terms("transverse", combo_name), 0, self.L()) + self._foundation(x, 0, combo_name)
+        return values if x.ndim else float(values[0])
+
+    def moment(self, Direction: str, x, combo_name: str = "Combo 1"):
+        x = np.asarray(x, dtype=float)
+        if Direction == "My":
+            return np.zeros(x.shape) if x.ndim else 0.0
+        if Direction != "Mz":
+            raise ValueError(f"Direction must be 'My' or 'Mz'. {Direction} was given.")
+        values = -macaulay(x, self._combo_terms("transverse", combo_name), 1, self.L()) - self._foundation(x, 1, combo_name)
+        return values if x.ndim else float(values[0])
+
+    def axial(self, x, combo_name: str = "Combo 1"):
+        x = np.asarray(x, dtype=float)
+        values = macaulay(x, self._combo_terms("axial", combo_name), 0, self.L())
+        return values if x.ndim else float(values[0])
+
+    def torque(self, x, combo_name: str = "Combo 1"):
+        x = np.asarray(x, dtype=float)
+        return np.zeros(x.shape) if x.ndim else 0.0
+
+    def deflection(self, Direction: str, x, combo_name: str = "Combo 1"):
+        x = np.asarray(x, dtype=float)
+        x_arr = np.atleast_1d(x)
+        if Direction == "dy":
+            EI = self.model.E * self.model.Iz
+            terms = self._combo_terms("transverse", combo_name)
+            values = (self._initial("v", combo_name) + self._initial("theta", combo_name) * x_arr
+                      + (macaulay(x_arr, terms, 3, self.L()) + self._foundation(x_arr, 3, combo_name)) / EI)
+        elif Direction == "dx":
+            EA = self.model.E * self.model.A
+            terms = self._combo_terms("axial", combo_name)
+            values = self._initial("u", combo_name) - macaulay(x_arr, terms, 1, self.L()) / EA
+        elif Direction == "dz":
+            values = np.zeros(x_arr.shape)
+        else:
+            raise ValueError(f"Direction must be 'dx', 'dy' or 'dz'. {Direction} was given.")
+        return values if x.ndim else float(values[0])
+
+    def polynomial(self, result_type: str, direction: str, combo_name: str = "Combo 1") -> piecewise.PiecewisePolynomial:
+        """
+        Returns the exact 'result_type' diagram ("shear", "moment", "axial", "torque" or "deflection") in
+        'direction' for 'combo_name' as a piecewise.PiecewisePolynomial
+        """
+        case_polys = self.model.case_polynomials(result_type, direction)
+        return piecewise.superpose_polynomials(case_polys, {combo_name: self.model.LoadCombos[combo_name]})[combo_name]
+
+    def shear_array(self, Direction: str, n_points: int, combo_name: str = "Combo 1") -> np.ndarray:
+        x_arr = np.linspace(0, self.L(), n_points)
+        return np.array([x_arr, self.shear(Direction, x_arr, combo_name)])
+
+    def moment_array(self, Direction: str, n_points: int, combo_name: str = "Combo 1") -> np.ndarray:
+        x_arr = np.linspace(0, self.L(), n_points)
+        return np.array([x_arr, self.moment(Direction, x_arr, combo_name)])
+
+    def axial_array(self, n_points: int, combo_name: str = "Combo 1") -> np.ndarray:
+        x_arr = np.linspace(0, self.L(), n_points)
+        return np.array([x_arr, self.axial(x_arr, combo_name)])
+
+    def torque_array(self, n_points: int, combo_name: str = "Combo 1") -> np.ndarray:
+        x_arr = np.linspace(0, self.L(), n_points)
+        return np.array([x_arr, self.torque(x_arr, combo_name)])
+
+    def deflection_array(self, Direction: str, n_points: int, combo_name: str = "Combo 1") -> np.ndarray:
+        x_arr = np.linspace(0, self.L(), n_points)
+        return np.array([x_arr, self.deflection(Direction, x_arr, combo_name)])
+
+
+class BeamModel2D:
+    """
+    A 2D (3 DOF per node) direct stiffness model of a beam described by a 'beam_data' dict.
+
+    Nodes are placed at the beam ends and supports only; member loads are applied through their
+    consistent nodal loads and the diagrams are recovered exactly from the reactions by
+    singularity functions. The global stiffness matrix is assembled directly in banded form
+    and factorized once (banded Cholesky) to solve all load cases together.
+
+    Spring supports add their stiffness to the diagonal. Winkler foundation regions are split into
+    many short elements (see foundation_node_coords) with a consistent foundation stiffness; the
+    bandwidth does not change, so the solve stays linear in the number of elements, and the
+    foundation pressure is added to the diagrams as a distributed load (see foundation_integrals).
+    """
+
+    def __init__(self, beam_data: dict):
+        self.Name = beam_data["Name"]
+        self.L = float(beam_data["L"])
+        self.E = float(beam_data["E"])
+        self.Iz = float(beam_data["Iz"])
+        self.A = float(beam_data["A"])
+        self.supports = {float(loc): sup for loc, sup in beam_data["Supports"].items()}
+        self.support_types = {loc: beam_parser.parse_support_type(sup) for loc, sup in self.supports.items()}
+        self.foundation = beam_parser.foundation_regions(self.supports, self.L)
+        self.node_coords = get_node_coords(list(self.supports.keys()), self.L)
+        if self.foundation:
+            # Foundation nodes that (up to round-off) coincide with a support or beam end are dropped
+            foundation_nodes = foundation_node_coords(self.foundation, self.E * self.Iz)
+            tol = 1e-9 * max(self.L, 1.0)
+            near = np.abs(foundation_nodes[:, None] - self.node_coords[None, :]).min(axis=1) <= tol
+            self.node_coords = np.unique(np.concatenate([self.node_coords, foundation_nodes[~near]]))
+        self.foundation_modulus = self.element_foundation_modulus()
+
+        case_loads = {}
+        for load in beam_data["Loads"]:
+            case_loads.setdefault(load["Case"], []).append(load)
+        self.case_names = list(case_loads)
+        self.case_loads = {case: get_load_arrays(loads) for case, loads in case_loads.items()}
+
+        self.LoadCombos = {}
+        self.combo_plan = None
+        self.factorizations = {}
+        self.Members = {self.Name: Member2D(self)}
+        self.reactions = {}
+        self.foundation_results = {}
+        self.solved = False
+
+    @classmethod
+    def from_definition(cls, beam: "beam_parser.BeamDefinition") -> "BeamModel2D":
+        """
+        Returns a BeamModel2D for a parsed beam_parser.BeamDefinition, taking the loads of each case
+        straight from its load arrays (no per-load dicts)
+        """
+        model = cls({"Name": beam.name, "L": beam.L, "E": beam.E, "Iz": beam.Iz, "A": beam.A, "Supports": beam.supports, "Loads": []})
+        loads = beam.loads
+        for case_id, case in enumerate(loads.case_names):
+            mask = loads.case_id == case_id
+            model.case_names.append(case)
+            model.case_loads[case] = (loads.load_type[mask], loads.direction[mask], loads.start_magnitude[mask],
+                                      loads.end_magnitude[mask], loads.start_location[mask], loads.end_location[mask])
+        return model
+
+    def add_load_combo(self, name: str, factors: dict[str, float]):
+        self.LoadCombos[name] = factors
+
+    def element_foundation_modulus(self) -> np.ndarray:
+        """
+        Returns the Winkler foundation modulus under each element (0.0 outside the foundation regions)
+        """
+        mid = (self.node_coords[:-1] + self.node_coords[1:]) / 2
+        modulus = np.zeros(len(mid))
+        for start, end, region_modulus in self.foundation:
+            modulus[(mid > start) & (mid < end)] = region_modulus
+        return modulus
+
+    def support_nodes(self) -> dict[float, int]:
+        """
+        Returns the node index of each support location
+        """
+        return {loc: int(np.searchsorted(self.node_coords, loc)) for loc in self.supports}
+
+    def spring_stiffness(self) -> np.ndarray:
+        """
+        Returns the spring stiffness at each of the 3 * n_nodes DOFs (0.0 where there is no spring)
+        """
+        springs = np.zeros((len(self.node_coords), 3))
+        for loc, idx in self.support_nodes().items():
+            for spring, dof in SPRING_DOFS.items():
+                springs[idx, dof] = self.support_types[loc][spring]
+        return springs.ravel()
+
+    def combo_factors(self, combo_name: str) -> np.ndarray:
+        """
+        Returns the load factor of each of the model's load cases for 'combo_name'
+        """
+        combo = self.LoadCombos[combo_name]
+        return np.array([float(combo.get(case, 0.0)) for case in self.case_names])
+
+    def geometry_key(self) -> tuple:
+        """
+        Returns a hashable key of everything the stiffness matrix depends on (length, section
+        properties and supports): models with the same key can share their factorizations
+        """
+        return (self.L, self.E, self.Iz, self.A, tuple(sorted(self.supports.items())))
+
+    def restrained_dofs(self, has_axial_load: bool = False) -> np.ndarray:
+        """
+        Returns a boolean array of length 3 * n_nodes marking the restrained DOFs.
+        If no support restrains the beam axially, the axial DOFs are fixed (only valid without axial loads).
+        """
+        restrained = np.zeros((len(self.node_coords), 3), dtype=bool)
+        for loc, idx in self.support_nodes().items():
+            restrained[idx] = RESTRAINT_DICT_2D[self.support_types[loc]["restraint"]]
+
+        if not restrained[:, 0].any() and not any(support["Kx"] > 0 for support in self.support_types.values()):
+            if has_axial_load:
+                raise ValueError(f"Beam '{self.Name}' has axial loads but no support restrains it axially.")
+            restrained[:, 0] = True
+        return restrained.ravel()
+
+    def banded_stiffness(self, free: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the free-DOF stiffness matrix in upper banded storage (for cholesky_banded) and
+        the full element stiffness array, both including the springs and the Winkler foundation
+        """
+        lengths = np.diff(self.node_coords)
+        k = element_stiffness(self.E, self.Iz, self.A, lengths)
+        if self.foundation:
+            k += foundation_stiffness(self.foundation_modulus, lengths)
+        n_elements = len(lengths)
+        element_dofs = 3 * np.arange(n_elements)[:, None] + np.arange(6)[None, :]
+
+        free_index = np.full(len(free), -1)
+        free_index[free] = np.arange(free.sum())
+        bandwidth = 5
+        ab = np.zeros((bandwidth + 1, free.sum()))
+
+        rows = free_index[element_dofs][:, :, None].repeat(6, axis=2)
+        cols = free_index[element_dofs][:, None, :].repeat(6, axis=1)
+        keep = (rows >= 0) & (cols >= 0) & (cols >= rows)
+        np.add.at(ab, (bandwidth + rows[keep] - cols[keep], cols[keep]), k[keep])
+        ab[bandwidth] += self.spring_stiffness()[free]
+        return ab, k
+
+    def factorize(self, has_axial_load: bool = False) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+        """
+        Returns the restrained DOFs, the element stiffness array and the banded Cholesky factor of the
+        free-DOF stiffness matrix (None if no DOF is free). They are kept in 'factorizations' (keyed by
+        'has_axial_load', which changes the restraints), so new load vectors only need back-substitution.
+        """
+        cached = self.factorizations.get(has_axial_load)
+        if cached is None:
+            restrained = self.restrained_dofs(has_axial_load)
+            free = ~restrained
+            ab, k = self.banded_stiffness(free)
+            factor = factorize_banded(ab, self.Name) if free.any() else None
+            cached = (restrained, k, factor)
+            self.factorizations[has_axial_load] = cached
+        return cached
+
+    def solve_nodal_loads(self, F: np.ndarray, has_axial_load: bool = False) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Solves the nodal load vectors in the columns of 'F' (3 * n_nodes x n_loads) with one banded
+        factorization (see factorize) and returns the nodal displacements D and the support reactions R
+        (same shape as 'F')
+        """
+        n_nodes = len(self.node_coords)
+        restrained, k, factor = self.factorize(has_axial_load)
+        free = ~restrained
+        D = np.zeros_like(F)
+        if factor is not None and F.shape[1]:
+            D[free] = scipy_linalg.cho_solve_banded((factor, False), F[free])
+
+        # Reactions from the element end forces: R = K * D - F (for springs this is -stiffness * D)
+        KD = np.zeros_like(F)
+        element_dofs = 3 * np.arange(n_nodes - 1)[:, None] + np.arange(6)[None, :]
+        np.add.at(KD, element_dofs, np.einsum("eij,ejc->eic", k, D[element_dofs]))
+        R = np.where((restrained | (self.spring_stiffness() > 0))[:, None], KD - F, 0.0)
+        return D, R
+
+    def analyze(self, check_statics: bool = False):
+        """
+        Solves all load cases in one banded solve and stores the reactions and result terms for every case
+        """
+        self.case_terms = {case: load_terms_from_arrays(*self.case_loads[case], self.L) for case in self.case_names}
+        initial, R = self.solve_cases()
+        self.store_results(initial, R)
+
+    def has_axial_load(self) -> bool:
+        return any(len(terms["axial"][0]) for terms in self.case_terms.values())
+
+    def solve_cases(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the displacements (u, v, theta) at x = 0 as a (3 x cases) array and the support
+        reactions as a (nodes x 3 x cases) array for every load case in 'case_terms'
+        """
+        n_nodes = len(self.node_coords)
+        F = np.zeros((3 * n_nodes, len(self.case_names)))
+        for idx, case in enumerate(self.case_names):
+            F[:, idx] = equivalent_nodal_loads(self.case_terms[case], self.node_coords)
+
+        D, R = self.solve_nodal_loads(F, self.has_axial_load())
+        if self.foundation:
+            self.foundation_results = dict(zip(self.case_names, foundation_integrals(self.node_coords, self.foundation_modulus, D)))
+        return D[:3], R.reshape(n_nodes, 3, -1)
+
+    def store_results(self, initial: np.ndarray, R: np.ndarray):
+        """
+        Stores the result terms (loads plus reactions), initial values and reactions of every case
+        from the output of solve_cases
+        """
+        support_nodes = sorted((idx, loc) for loc, idx in self.support_nodes().items() if is_point_support(self.support_types[loc]))
+        nodes = np.array([idx for idx, _ in support_nodes], dtype=int)
+        n_nodes = len(nodes)
+        empty = (np.zeros(0, dtype=int), np.zeros(0), np.zeros(0), np.zeros(0, dtype=int))
+        transverse = [empty]
+        axial = [empty]
+        node_orders = np.zeros(n_nodes, dtype=int)
+        for idx, case in enumerate(self.case_names):
+            c, a, n = self.case_terms[case]["transverse"]
+            transverse.append((np.full(len(c), idx), c, a, n))
+            transverse.append((np.full(n_nodes, idx), R[nodes, 1, idx], self.node_coords[nodes], node_orders))
+            transverse.append((np.full(n_nodes, idx), -R[nodes, 2, idx], self.node_coords[nodes], node_orders - 1))
+            c, a, n = self.case_terms[case]["axial"]
+            axial.append((np.full(len(c), idx), c, a, n))
+            axial.append((np.full(n_nodes, idx), R[nodes, 0, idx], self.node_coords[nodes], node_orders))
+        self.result_terms = {"transverse": tuple(np.concatenate(parts) for parts in zip(*transverse)),
+                             "axial": tuple(np.concatenate(parts) for parts in zip(*axial))}
+
+        self.initial_values = {"u": initial[0], "v": initial[1], "theta": initial[2]}
+        self.reactions = {case: {float(loc): tuple(R[idx, :, case_idx]) for idx, loc in support_nodes}
+                          for case_idx, case in enumerate(self.case_names)}
+        self.solved = True
+
+    def case_polynomials(self, result_type: str, direction: str) -> dict[str, piecewise.PiecewisePolynomial]:
+        """
+        Returns the exact 'result_type' diagram ("shear", "moment", "axial", "torque" or "deflection") in
+        'direction' of every load case as a piecewise.PiecewisePolynomial, keyed by load case name.
+        All the polynomials share their breakpoints (the beam ends, supports, point loads and
+        distributed load ends, plus every node on a Winkler foundation), so they can be combined
+        with piecewise.superpose_polynomials.
+        """
+        result_type = result_type.lower().strip()
+        key = "axial" if result_type == "axial" or direction == "dx" else "transverse"
+        case_idx, c, a, n = self.result_terms[key]
+        tol = 1e-10 * max(self.L, 1.0)
+        foundation = self.foundation_results if key == "transverse" else {}
+        breakpoints = np.unique(np.concatenate([[0.0, self.L], np.clip(self.result_terms["transverse"][2], 0.0, self.L),
+                                                np.clip(self.result_terms["axial"][2], 0.0, self.L),
+                                                self.node_coords if foundation else []]))
+        breakpoints = breakpoints[np.append(True, np.diff(breakpoints) > tol)]
+        breakpoints[-1] = self.L
+
+        if result_type == "shear" and direction == "Fy" or result_type == "axial":
+            k, scale = 0, 1.0
+        elif result_type == "moment" and direction == "Mz":
+            k, scale = 1, -1.0
+        elif result_type == "deflection" and direction == "dy":
+            k, scale = 3, 1.0 / (self.E * self.Iz)
+        elif result_type == "deflection" and direction == "dx":
+            k, scale = 1, -1.0 / (self.E * self.A)
+        elif (result_type, direction) in (("shear", "Fz"), ("moment", "My"), ("deflection", "dz")) or result_type == "torque":
+            k, scale = None, 0.0
+        else:
+            raise ValueError(f"Unsupported result type and direction: {result_type} {direction}.")
+
+        acc = {}
+        for idx, case in enumerate(self.case_names):
+            if k is None:
+                acc[case] = piecewise.PiecewisePolynomial(breakpoints, np.zeros((len(breakpoints) - 1, 1)))
+                continue
+            in_case = case_idx == idx
+            terms = [(scale * c[in_case], a[in_case], n[in_case] + k)]
+            if direction == "dy":
+                terms.append((np.array([self.initial_values["v"][idx], self.initial_values["theta"][idx]]), np.zeros(2), np.array([0, 1])))
+            elif direction == "dx":
+                terms.append((np.array([self.initial_values["u"][idx]]), np.zeros(1), np.array([0])))
+            acc[case] = piecewise.PiecewisePolynomial.from_terms(*(np.concatenate(parts) for parts in zip(*terms)), breakpoints)
+            if foundation:
+                acc[case] = acc[case].scaled_sum([acc[case], foundation[case][k].refine(breakpoints)], np.array([1.0, scale]))
+        return acc
+
+    def combo_reactions(self, combo_name: str) -> dict[float, tuple[float, float, float]]:
+        """
+        Returns the support reactions (FX, FY, MZ) for 'combo_name', keyed by support location
+        """
+        factors = self.combo_factors(combo_name)
+        acc = {}
+        for case_idx, case in enumerate(self.case_names):
+            for loc, rxn in self.reactions[case].items():
+                prev = acc.get(loc, (0.0, 0.0, 0.0))
+                acc[loc] = tuple(p + factors[case_idx] * r for p, r in zip(prev, rxn))
+        return acc
+
+
+def is_point_support(support: dict) -> bool:
+    """
+    Returns True if the parsed support type 'support' (see beam_parser.parse_support_type) has a rigid
+    restraint or a spring, i.e. it can have point reactions
+    """
+    return support["restraint"] != "Free" or any(support[spring] > 0 for spring in SPRING_DOFS)
+
+
+def has_elastic_supports(supports: dict[float, str]) -> bool:
+    """
+    Returns True if any of 'supports' ({location: support type}) is a spring or a Winkler foundation
+    """
+    return any(sup not in RESTRAINT_DICT_2D for sup in supports.values())
+
+
+def is_statically_determinate(supports: dict[float, str], has_axial_load: bool = False) -> bool:
+    """
+    Returns True if the in-plane reactions of a beam on 'supports' ({location: support type}) follow from
+    statics alone: a single fixed support (cantilever) or exactly two pinned/roller supports (simple span,
+    possibly with overhangs). With axial loads exactly one support must restrain the beam axially.
+    Beams on springs or a Winkler foundation are not.
+    """
+    if has_elastic_supports(supports):
+        return False
+    fixed = [loc for loc, sup in supports.items() if sup == "F"]
+    pins_rollers = [loc for loc, sup in supports.items() if sup in ("P", "R")]
+    if (len(fixed), len(pins_rollers)) not in ((1, 0), (0, 2)):
+        return False
+    return not has_axial_load or sum(RESTRAINT_DICT_2D[sup][0] for sup in supports.values()) == 1
+
+
+def is_determinate_beam(beam_data: "dict | beam_parser.BeamDefinition") -> bool:
+    """
+    Returns True if the beam in 'beam_data' (a beam data dict or a beam_parser.BeamDefinition) is
+    statically determinate (see is_statically_determinate)
+    """
+    if isinstance(beam_data, beam_parser.BeamDefinition):
+        supports = beam_data.supports
+        has_axial_load = bool(np.isin(beam_data.loads.direction, list(AXIAL_DIRECTIONS)).any())
+    else:
+        supports = beam_data["Supports"]
+        has_axial_load = any(load["Direction"] in AXIAL_DIRECTIONS for load in beam_data["Loads"])
+    return is_statically_determinate(supports, has_axial_load)
+
+
+def _load_effects_at(terms: tuple, x: float, k: int) -> np.ndarray:
+    # k-th integral of the load terms just past 'x' (every term with a <= x counts, including at the beam end)
+    c, a, n = terms
+    p = n + k
+    keep = (p >= 0) & (a <= x)
+    factorials = np.array([math.factorial(power) for power in p[keep]], dtype=float)
+    return float(np.sum(c[keep] * (x - a[keep]) ** p[keep] / factorials))
+
+
+class DeterminateBeamModel(BeamModel2D):
+    """
+    A BeamModel2D for statically determinate beams (see is_statically_determinate): the reactions come
+    from the two equilibrium equations and the deflection constants from the support conditions, so
+    no stiffness matrix is assembled or factorized. Results are the same as BeamModel2D.
+    """
+
+    def solve_cases(self) -> tuple[np.ndarray, np.ndarray]:
+        n_nodes = len(self.node_coords)
+        n_cases = len(self.case_names)
+        supported = [(idx, loc, self.supports[loc]) for idx, loc in enumerate(self.node_coords) if self.supports.get(loc, "Free") != "Free"]
+        R = np.zeros((n_nodes, 3, n_cases))
+        initial = np.zeros((3, n_cases))
+        EI = self.E * self.Iz
+        EA = self.E * self.A
+        end = self.node_coords[-1]
+
+        # Unknown reactions: (node index, DOF) pairs, and their shear / moment at the beam end per unit value
+        unknowns = []
+        for idx, loc, sup in supported:
+            unknowns.append((idx, 1, 1.0, end - loc))
+            if sup == "F":
+                unknowns.append((idx, 2, 0.0, -1.0))
+        A = np.array([[shear, moment] for _, _, shear, moment in unknowns]).T
+        axial_idx = [idx for idx, _, sup in supported if RESTRAINT_DICT_2D[sup][0]]
+        fixed = supported[0][2] == "F"
+
+        for case_idx, case in enumerate(self.case_names):
+            transverse = self.case_terms[case]["transverse"]
+            # Shear and moment just past the free end are zero: sum of loads and reactions
+            b = -np.array([_load_effects_at(transverse, end, 0), _load_effects_at(transverse, end, 1)])
+            for (idx, dof, _, _), value in zip(unknowns, np.linalg.solve(A, b)):
+                R[idx, dof, case_idx] = value
+            if axial_idx:
+                R[axial_idx[0], 0, case_idx] = -_load_effects_at(self.case_terms[case]["axial"], end, 0)
+
+            # Deflection constants v(0), theta(0) from the support conditions (the reaction terms included)
+            node_orders = np.zeros(n_nodes, dtype=int)
+            c, a, n = transverse
+            terms = (np.concatenate([c, R[:, 1, case_idx], -R[:, 2, case_idx]]), np.concatenate([a, self.node_coords, self.node_coords]),
+                     np.concatenate([n, node_orders, node_orders - 1]))
+            support_locs = np.array([loc for _, loc, _ in supported])
+            rows = [[1.0, loc] for loc in support_locs]
+            rhs = list(-macaulay(support_locs, terms, 3, end) / EI)
+            if fixed:
+                rows.append([0.0, 1.0])
+                rhs.append(-macaulay(support_locs, terms, 2, end)[0] / EI)
+            initial[1:, case_idx] = np.linalg.solve(np.array(rows), np.array(rhs))
+            if axial_idx:
+                c, a, n = self.case_terms[case]["axial"]
+                loc = self.node_coords[axial_idx[0]]
+                axial_terms = (np.append(c, R[axial_idx[0], 0, case_idx]), np.append(a, loc), np.append(n, 0))
+                initial[0, case_idx] = macaulay(np.array([loc]), axial_terms, 1, end)[0] / EA
+        return initial, R
+
+
+class BeamSession2D:
+    """
+    Builds the BeamModel2Ds of one interactive session. Successive models with the same geometry and
+    supports (see BeamModel2D.geometry_key) share their stiffness factorizations, so load-only edits are
+    solved by back-substitution alone. Any change to the length, section properties or supports starts
+    a new set of factorizations.
+    """
+
+    def __init__(self):
+        self.geometry_key = None
+        self.factorizations = {}
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    def build(self, beam_data: "dict | beam_parser.BeamDefinition", combos_bool: bool, plan_combos: bool = True, drop_dominated: bool = False, **kwargs) -> "BeamModel2D":
+        """
+        Returns the model of build_beam_2d (same arguments), sharing the session's factorizations
+        """
+        model = build_beam_2d(beam_data, combos_bool, plan_combos, drop_dominated, **kwargs)
+        with self._lock:
+            key = model.geometry_key()
+            if key != self.geometry_key:
+                self.geometry_key = key
+                self.factorizations = {}
+            elif self.factorizations:
+                self.reused += 1
+            model.factorizations = self.factorizations
+        return model
+
+
+def build_beam_2d(beam_data: "dict | beam_parser.BeamDefinition", combos_bool: bool, plan_combos: bool = True, drop_dominated: bool = False, **kwargs) -> BeamModel2D:
+    """
+    Returns a BeamModel2D for the data in 'beam_data' (same format as beams.build_beam, or a
+    beam_parser.BeamDefinition), with the same load combinations that beams.build_beam would register:
+    the CSA S6 2019 combos if 'combos_bool' (reduced by loadfactors.plan_load_combos if 'plan_combos'),
+    otherwise one combo per load case. Statically determinate beams get a DeterminateBeamModel.
+    """
+    model_class = DeterminateBeamModel if is_determinate_beam(beam_data) else BeamModel2D
+    if isinstance(beam_data, beam_parser.BeamDefinition):
+        model = model_class.from_definition(beam_data)
+    else:
+        model = model_class(beam_data)
+    if combos_bool:
+        combo_dict = loadfactors.CSA_S6_2019_combos(**kwargs)
+        if plan_combos:
+            model.combo_plan = loadfactors.plan_load_combos(combo_dict, model.case_names, drop_dominated)
+            model.LoadCombos = loadfactors.PlannedCombos(model.combo_plan)
+            combo_dict = model.combo_plan["combos"]
+        for combo in combo_dict:
+            model.add_load_combo(combo, combo_dict[combo])
+    else:
+        for load_case in model.case_names:
+            model.add_load_combo(load_case, {load_case: 1.0})
+    return model
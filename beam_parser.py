@@ -0,0 +1,320 @@
+from __future__ import annotations
+import math
+import re
+from typing import Iterator, Iterable
+import instrumentation
+import lazy_imports
+
+np = lazy_imports.lazy_import("numpy")
+
+
+ATTRIBUTE_NAMES = ("L", "E", "Iz", "Iy", "A", "J", "nu", "rho")
+SUPPORT_TYPES = ("P", "R", "F", "Free")
+SPRING_TYPES = ("Kx", "Ky", "Kr")
+FOUNDATION_TYPE = "W"
+LOAD_TYPES = ("Point", "Dist")
+LOAD_DIRECTIONS = ("Fx", "Fy", "Fz", "Mx", "My", "Mz", "FX", "FY", "FZ", "MX", "MY", "MZ")
+
+
+class BeamParseError(ValueError):
+    """
+    Raised for invalid beam text, with the file name, line and column (both 1-based) of the problem
+    """
+
+    def __init__(self, message: str, line: int, column: int, file_name: str | None = None):
+        self.message = message
+        self.line = line
+        self.column = column
+        self.file_name = file_name
+        super().__init__(f"{file_name or '<beam>'}:{line}:{column}: {message}")
+
+
+class BeamLoads:
+    """
+    The loads on a beam, stored as one NumPy array per field (struct of arrays).
+
+    load_type: 0 for point loads and 1 for distributed loads (see LOAD_TYPES)
+    direction: the load direction strings (e.g. "Fy")
+    start_magnitude, end_magnitude: load magnitudes (equal for point loads)
+    start_location, end_location: load locations (equal for point loads)
+    case_id: index of each load's case in 'case_names'
+    """
+    __slots__ = ("load_type", "direction", "start_magnitude", "end_magnitude", "start_location", "end_location", "case_id", "case_names")
+
+    def __init__(self, load_type, direction, start_magnitude, end_magnitude, start_location, end_location, case_id, case_names: list[str]):
+        self.load_type = np.asarray(load_type, dtype=np.int8)
+        self.direction = np.asarray(direction, dtype="U2")
+        self.start_magnitude = np.asarray(start_magnitude, dtype=float)
+        self.end_magnitude = np.asarray(end_magnitude, dtype=float)
+        self.start_location = np.asarray(start_location, dtype=float)
+        self.end_location = np.asarray(end_location, dtype=float)
+        self.case_id = np.asarray(case_id, dtype=np.int32)
+        self.case_names = case_names
+
+    def __len__(self) -> int:
+        return len(self.load_type)
+
+    def select(self, mask: np.ndarray) -> "BeamLoads":
+        """
+        Returns a new BeamLoads with only the loads where 'mask' is True (same case names)
+        """
+        return BeamLoads(self.load_type[mask], self.direction[mask], self.start_magnitude[mask], self.end_magnitude[mask],
+                         self.start_location[mask], self.end_location[mask], self.case_id[mask], self.case_names)
+
+    def to_dicts(self) -> list[dict]:
+        """
+        Returns the loads as a list of dicts in the format of beams.parse_loads
+        """
+        acc = []
+        for idx in range(len(self)):
+            case = self.case_names[self.case_id[idx]]
+            if self.load_type[idx] == 0:
+                acc.append({"Type": "Point", "Direction": str(self.direction[idx]), "Magnitude": float(self.start_magnitude[idx]),
+                            "Location": float(self.start_location[idx]), "Case": case})
+            else:
+                acc.append({"Type": "Dist", "Direction": str(self.direction[idx]),
+                            "Start Magnitude": float(self.start_magnitude[idx]), "End Magnitude": float(self.end_magnitude[idx]),
+                            "Start Location": float(self.start_location[idx]), "End Location": float(self.end_location[idx]), "Case": case})
+        return acc
+
+
+class BeamDefinition:
+    """
+    A parsed beam: its name, the attributes in ATTRIBUTE_NAMES, its supports and its loads (BeamLoads)
+    """
+    __slots__ = ("name", *ATTRIBUTE_NAMES, "supports", "loads")
+
+    def __init__(self, name: str, attributes: dict[str, float], supports: dict[float, str], loads: BeamLoads):
+        self.name = name
+        for attribute in ATTRIBUTE_NAMES:
+            setattr(self, attribute, attributes[attribute])
+        self.supports = supports
+        self.loads = loads
+
+    def to_beam_data(self) -> dict:
+        """
+        Returns the beam data dict used by beams.build_beam (same format as beams.get_structured_beam_data)
+        """
+        acc = {"Name": self.name}
+        acc.update({attribute: getattr(self, attribute) for attribute in ATTRIBUTE_NAMES})
+        acc.update({"Supports": dict(self.supports), "Loads": self.loads.to_dicts()})
+        return acc
+
+
+def parse_support_type(support_type: str) -> dict:
+    """
+    Returns the parts of a support type, joined with "+" in the beam text (e.g. "P", "Ky=5e4", "R+Kr=1e9" or "W=0.05"):
+        "restraint": the rigid support ("P", "R", "F" or "Free" if there is none)
+        "Kx", "Ky": translational spring stiffnesses [force / length] (0.0 if there is none)
+        "Kr": rotational spring stiffness [moment / radian] (0.0 if there is none)
+        "W": modulus of the Winkler foundation [force / length / length of beam] that starts at the support
+             and runs to the next "W" support or the end of the beam ("W=0" ends it), or None
+    Raises a ValueError for an invalid support type.
+    """
+    acc = {"restraint": "Free", "Kx": 0.0, "Ky": 0.0, "Kr": 0.0, "W": None}
+    rigid = None
+    for part in re.split(r"\+(?=\s*[A-Za-z])", support_type):  # "+" in an exponent (1e+9) does not split
+        name, sep, value = (piece.strip() for piece in part.partition("="))
+        if not sep:
+            if name not in SUPPORT_TYPES:
+                raise ValueError(f"unknown support type {name!r} (expected one of {', '.join(SUPPORT_TYPES)}, "
+                                 f"or {'=, '.join((*SPRING_TYPES, FOUNDATION_TYPE))}= with a stiffness)")
+            if rigid is not None:
+                raise ValueError(f"support type {support_type!r} has more than one rigid support")
+            rigid = name
+            continue
+        if name not in (*SPRING_TYPES, FOUNDATION_TYPE):
+            raise ValueError(f"unknown spring {name!r} (expected one of {', '.join((*SPRING_TYPES, FOUNDATION_TYPE))})")
+        try:
+            stiffness = float(value)
+        except ValueError:
+            raise ValueError(f"expected a number for the {name} stiffness, got {value!r}") from None
+        if not math.isfinite(stiffness) or stiffness < 0:
+            raise ValueError(f"the {name} stiffness must be zero or positive, got {value!r}")
+        acc[name] = stiffness
+    if rigid is not None:
+        acc["restraint"] = rigid
+    return acc
+
+
+def foundation_regions(supports: dict[float, str], beam_len: float) -> list[tuple[float, float, float]]:
+    """
+    Returns the Winkler foundation of a beam on 'supports' ({location: support type}, see parse_support_type)
+    as a list of (start, end, modulus), sorted and without zero modulus or zero length regions
+    """
+    starts = sorted((float(loc), modulus) for loc, sup in supports.items()
+                    if (modulus := parse_support_type(sup)["W"]) is not None)
+    acc = []
+    for idx, (start, modulus) in enumerate(starts):
+        end = starts[idx + 1][0] if idx + 1 < len(starts) else float(beam_len)
+        if modulus > 0 and end > start:
+            acc.append((start, min(end, float(beam_len)), modulus))
+    return acc
+
+
+def _split_fields(text: str) -> list[tuple[str, int]]:
+    """
+    Returns the comma separated fields of 'text' (whitespace stripped) with the 1-based column where each starts
+    """
+    acc = []
+    start = 0
+    for field in text.split(","):
+        stripped = field.strip()
+        acc.append((stripped, start + len(field) - len(field.lstrip()) + 1))
+        start += len(field) + 1
+    return acc
+
+
+def _to_float(field: str, column: int, line: int, what: str, file_name: str | None) -> float:
+    try:
+        return float(field)
+    except ValueError:
+        raise BeamParseError(f"expected a number for {what}, got {field!r}", line, column, file_name) from None
+
+
+def _split_tag(field: str, column: int, line: int, what: str, file_name: str | None) -> tuple[str, str]:
+    tag, sep, value = field.partition(":")
+    if not sep or not value.strip():
+        raise BeamParseError(f"expected '{what}', got {field!r}", line, column, file_name)
+    return tag.strip(), value.strip()
+
+
+def _raise_load_error(text: str, line: int, file_name: str | None):
+    """
+    Raises a BeamParseError with the column of the first invalid field of the load line 'text'
+    """
+    fields = _split_fields(text)
+    kind, load_dir = _split_tag(fields[0][0], fields[0][1], line, "POINT:direction' or 'DIST:direction", file_name)
+    kind = kind.title()
+    if kind not in LOAD_TYPES:
+        raise BeamParseError(f"unknown load type {kind!r} (expected POINT or DIST)", line, fields[0][1], file_name)
+    if load_dir not in LOAD_DIRECTIONS:
+        raise BeamParseError(f"unknown load direction {load_dir!r}", line, fields[0][1], file_name)
+    n_values = 2 if kind == "Point" else 4
+    if len(fields) != n_values + 2:
+        raise BeamParseError(f"expected {n_values + 2} fields for a {kind.upper()} load, got {len(fields)}", line, fields[-1][1], file_name)
+    case_tag, _ = _split_tag(fields[-1][0], fields[-1][1], line, "case:load_case", file_name)
+    if case_tag.lower() != "case":
+        raise BeamParseError(f"expected 'case:load_case', got {fields[-1][0]!r}", line, fields[-1][1], file_name)
+    for field, column in fields[1:-1]:
+        _to_float(field, column, line, f"{kind.upper()} load value", file_name)
+    raise BeamParseError(f"invalid load {text!r}", line, 1, file_name)
+
+
+@instrumentation.instrument()
+def parse_beam(lines: Iterable[str], first_line: int = 1, file_name: str | None = None) -> BeamDefinition:
+    """
+    Parses the lines of one beam (in the beams.read_beam_file format) in a single pass and returns a
+    BeamDefinition. Raises a BeamParseError with the line and column of the first invalid field.
+
+    'first_line': the line number of the first line in 'lines' (used for error messages)
+    """
+    name = None
+    attributes = {}
+    supports = {}
+    load_type, direction, start_mag, end_mag, start_loc, end_loc, case_id = [], [], [], [], [], [], []
+    case_names = []
+    case_index = {}
+    line_no = first_line - 1
+
+    for line_no, text in enumerate(lines, start=first_line):
+        text = text.rstrip("\r\n")
+        row = line_no - first_line
+        if row == 0:
+            name = _split_fields(text)[0][0]
+            continue
+
+        if row == 1:
+            fields = _split_fields(text)
+            values = [(field, column) for field, column in fields if field]
+            if not values:
+                raise BeamParseError("expected the beam length", line_no, 1, file_name)
+            if len(values) > len(ATTRIBUTE_NAMES):
+                raise BeamParseError(f"expected at most {len(ATTRIBUTE_NAMES)} beam attributes, got {len(values)}", line_no, values[len(ATTRIBUTE_NAMES)][1], file_name)
+            for attribute, (field, column) in zip(ATTRIBUTE_NAMES, values):
+                attributes[attribute] = _to_float(field, column, line_no, f"attribute '{attribute}'", file_name)
+        elif row == 2:
+            for field, column in _split_fields(text):
+                location, support_type = _split_tag(field, column, line_no, "support_loc:support_type", file_name)
+                if support_type not in SUPPORT_TYPES:
+                    try:
+                        parse_support_type(support_type)
+                    except ValueError as error:
+                        type_column = column + len(field) - len(field.split(":", 1)[1].lstrip())
+                        raise BeamParseError(str(error), line_no, type_column, file_name) from None
+                supports[_to_float(location, column, line_no, "support location", file_name)] = support_type
+        else:
+            # Fast path: plain split and float conversion; columns are only worked out for invalid lines
+            parts = text.split(",")
+            kind, _, load_dir = parts[0].partition(":")
+            kind = kind.strip().title()
+            load_dir = load_dir.strip()
+            case_tag, _, case = parts[-1].partition(":")
+            case = case.strip()
+            try:
+                if load_dir not in LOAD_DIRECTIONS or case_tag.strip().lower() != "case" or not case:
+                    raise ValueError
+                if kind == "Point" and len(parts) == 4:
+                    magnitude = float(parts[1])
+                    location = float(parts[2])
+                    values = (magnitude, magnitude, location, location)
+                elif kind == "Dist" and len(parts) == 6:
+                    values = (float(parts[1]), float(parts[2]), float(parts[3]), float(parts[4]))
+                else:
+                    raise ValueError
+            except ValueError:
+                _raise_load_error(text, line_no, file_name)
+            if case not in case_index:
+                case_index[case] = len(case_names)
+                case_names.append(case)
+            load_type.append(0 if kind == "Point" else 1)
+            direction.append(load_dir)
+            start_mag.append(values[0])
+            end_mag.append(values[1])
+            start_loc.append(values[2])
+            end_loc.append(values[3])
+            case_id.append(case_index[case])
+
+    if name is None or not attributes:
+        raise BeamParseError("incomplete beam: expected a name line and an attribute line", line_no + 1, 1, file_name)
+    for attribute in ATTRIBUTE_NAMES:
+        attributes.setdefault(attribute, 1.0)
+    loads = BeamLoads(load_type, direction, start_mag, end_mag, start_loc, end_loc, case_id, case_names)
+    return BeamDefinition(name, attributes, supports, loads)
+
+
+def iter_beam_blocks(file_name: str) -> Iterator[tuple[int, list[str]]]:
+    """
+    Streams the beams in 'file_name' as (first line number, lines) blocks without parsing them. Beams in
+    a multi-beam file are separated by one or more blank lines. Only one beam's lines are held in memory at a time.
+    """
+    with open(file_name, "r") as beam_file:
+        block = []
+        first_line = 1
+        for line_no, text in enumerate(beam_file, start=1):
+            if text.strip():
+                if not block:
+                    first_line = line_no
+                block.append(text)
+            elif block:
+                yield first_line, block
+                block = []
+        if block:
+            yield first_line, block
+
+
+def iter_beam_file(file_name: str) -> Iterator[BeamDefinition]:
+    """
+    Streams the beams in 'file_name' (see iter_beam_blocks), one BeamDefinition at a time
+    """
+    for first_line, block in iter_beam_blocks(file_name):
+        yield parse_beam(block, first_line, file_name)
+
+
+def read_beam_definition(file_name: str) -> BeamDefinition:
+    """
+    Returns the first beam in 'file_name' as a BeamDefinition
+    """
+    for beam in iter_beam_file(file_name):
+        return beam
+    raise BeamParseError("no beam found", 1, 1, file_name)
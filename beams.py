@@ -1,8 +1,17 @@
+from __future__ import annotations
+import functools
 import math
-from PyNite import FEModel3D
+import numpy as np
 import csv
 from utils import str_to_int, str_to_float, read_csv_file
+import instrumentation
 import loadfactors
+import beam2d
+import beam_parser
+import piecewise
+import lazy_imports
+
+PyNite = lazy_imports.lazy_import("PyNite")
 
 
 def beam_reactions_ss_cant(w: float, a: float, b: float) -> tuple[float, float]:
@@ -36,7 +45,7 @@ def fe_model_ss_cant(
     J:float,
     nu:float,
     rho:float,   
-) ->FEModel3D:
+) ->PyNite.FEModel3D:
     """
     Returns a Pynite.FEModel3D model of a simply supported beam with a canteliver on one end. Beam is under UDL loading
     
@@ -53,7 +62,7 @@ def fe_model_ss_cant(
     
     """
 
-    model=FEModel3D()
+    model=PyNite.FEModel3D()
 
     G = calc_shear_modulus(nu, E)
     model.add_material("default", E, G, nu, rho)
@@ -155,16 +164,22 @@ def euler_buckling_load(
 
 def parse_supports(support_list: list[str]) -> dict[float:str]:
     """
-    
+    Support types are "P", "R", "F" or "Free", springs "Kx=<stiffness>", "Ky=<stiffness>" (force / length)
+    and "Kr=<stiffness>" (moment / radian), and "W=<modulus>" for a Winkler foundation from that location
+    to the next "W" support or the end of the beam. Parts are joined with "+" (see beam_parser.parse_support_type).
+    Raises a ValueError for an invalid support type.
+
     # Example input
-    ['1000:P', '3800:R', '4800:F', '8000:R']
+    ['1000:P', '3800:R', '4800:F', '8000:R+Kr=1e9']
 
     # Example output
-    {1000: 'P', 3800: 'R', 4800: 'F', 8000: 'R'}
+    {1000: 'P', 3800: 'R', 4800: 'F', 8000: 'R+Kr=1e9'}
     """
     support_acc ={}
     for support in support_list:
         sup_loc, sup_type = support.split(":")
+        sup_type = sup_type.strip()
+        beam_parser.parse_support_type(sup_type)
         support_acc.update({str_to_float(sup_loc): sup_type})
     return support_acc
 
@@ -241,6 +256,7 @@ def parse_beam_attributes(attribute_list: list[float]) -> dict[str:float]:
             acc.update({attribute: 1})
     return acc
 
+@instrumentation.instrument()
 def get_structured_beam_data(data: list[list[str]]) ->dict:
     """
     Converts list of lists of raw data into dictionary of beam data in the following format
@@ -278,6 +294,7 @@ def get_structured_beam_data(data: list[list[str]]) ->dict:
 
     return acc
   
+@instrumentation.instrument()
 def get_structured_beam_data_from_str_lib(attributes:list, supports:dict, loads: list[dict]) ->dict:
     # Output
     # {'Name': 'Balcony transfer',
@@ -357,9 +374,57 @@ def get_node_locations(support_list:list[str], beam_len: float) -> dict[str, flo
     #         node_locations.update({f"N{idx+1}": str_to_float(beam_len)})
     # return node_locations
 
-def build_beam(beam_data: dict, combos_bool: bool, **kwargs) -> FEModel3D:
+def register_combo_aliases(solved_beam_model: PyNite.FEModel3D):
     """
-    Returns a beam finite element model for the data in 'beam_data'
+    Registers the original combo names of a planned PyNite model (see build_beam) in its node and member
+    results, pointing at the results of their reduced combo, so every CSA S6 combo name can be looked up
+    (e.g. model.Members[name].moment("Mz", x, "ULS6")) without being analyzed
+    """
+    aliases = {name: reduced for name, reduced in solved_beam_model.combo_plan["aliases"].items() if name != reduced}
+    members = list(solved_beam_model.Members.values())
+    members += [sub_member for member in members for sub_member in getattr(member, "sub_members", {}).values()]
+    for item in list(solved_beam_model.Nodes.values()) + members:
+        for results in vars(item).values():
+            if isinstance(results, dict) and results and all(reduced in results for reduced in aliases.values()):
+                results.update({name: results[reduced] for name, reduced in aliases.items()})
+
+
+@functools.cache
+def _planned_model_class() -> type:
+    # A PyNite.FEModel3D that registers its combo aliases after every analysis (defined on first use so
+    # that PyNite stays a lazy import)
+    class PlannedFEModel3D(PyNite.FEModel3D):
+        def analyze(self, *args, **kwargs):
+            super().analyze(*args, **kwargs)
+            register_combo_aliases(self)
+
+        def analyze_linear(self, *args, **kwargs):
+            super().analyze_linear(*args, **kwargs)
+            register_combo_aliases(self)
+
+    return PlannedFEModel3D
+
+
+@instrumentation.instrument()
+def build_beam(beam_data: dict | beam_parser.BeamDefinition, combos_bool: bool, backend: str = "pynite", plan_combos: bool = True,
+               drop_dominated: bool = False, **kwargs) -> PyNite.FEModel3D | beam2d.BeamModel2D:
+    """
+    Returns a beam finite element model for the data in 'beam_data' (a dict as below or a
+    beam_parser.BeamDefinition)
+
+    combos_bool: if True, the CSA S6 2019 combos (with the alpha factors in kwargs) are registered,
+        otherwise one combo per load case
+    plan_combos: if True (default), only the combos that differ for the beam's load cases are analyzed
+        (see loadfactors.plan_load_combos). The plan is stored as model.combo_plan, the extract functions
+        fan the results back out to every CSA S6 combo name and the model's combo lookups
+        (model.LoadCombos["ULS6"], member results for "ULS6") resolve the other names to their planned combo
+    drop_dominated: also drop dominated combos (only safe if all load case effects have the same sign)
+
+    backend: "pynite" (default) for a PyNite FEModel3D, "2d" for the native 2D stiffness
+        engine (beam2d.BeamModel2D) or "auto" for the 2D engine's direct equilibrium solution
+        (beam2d.DeterminateBeamModel) if the beam is statically determinate and PyNite otherwise.
+        Beams on spring supports or a Winkler foundation need the 2D engine ("auto" picks it).
+        All are solved with .analyze() and work with extract_arrays_all_combos
 
     beam data is a dictionary in the following format: 
     {'Name': 'Balcony transfer',
@@ -385,7 +450,19 @@ def build_beam(beam_data: dict, combos_bool: bool, **kwargs) -> FEModel3D:
     'End Location': 4800.0,
     'Case': 'Dead'}]}
     """
-    model=FEModel3D()
+    supports = beam_data.supports if isinstance(beam_data, beam_parser.BeamDefinition) else beam_data["Supports"]
+    if backend == "auto":
+        backend = "2d" if beam2d.is_determinate_beam(beam_data) or beam2d.has_elastic_supports(supports) else "pynite"
+    if backend == "2d":
+        return beam2d.build_beam_2d(beam_data, combos_bool, plan_combos, drop_dominated, **kwargs)
+    elif backend != "pynite":
+        raise ValueError(f"backend must be 'pynite', '2d' or 'auto'. {backend} was given.")
+    elif beam2d.has_elastic_supports(supports):
+        raise ValueError("Spring supports and Winkler foundations are only supported by the '2d' (or 'auto') backend.")
+    if isinstance(beam_data, beam_parser.BeamDefinition):
+        beam_data = beam_data.to_beam_data()
+
+    model = _planned_model_class()() if combos_bool and plan_combos else PyNite.FEModel3D()
 
     name = beam_data["Name"]
     L = beam_data["L"]
@@ -434,6 +511,10 @@ def build_beam(beam_data: dict, combos_bool: bool, **kwargs) -> FEModel3D:
 
     if combos_bool:
         combo_dict = loadfactors.CSA_S6_2019_combos(**kwargs)
+        if plan_combos:
+            model.combo_plan = loadfactors.plan_load_combos(combo_dict, load_cases, drop_dominated)
+            model.LoadCombos = loadfactors.PlannedCombos(model.combo_plan)
+            combo_dict = model.combo_plan["combos"]
         for combo in combo_dict:
             model.add_load_combo(combo, combo_dict[combo])
     else:
@@ -443,7 +524,7 @@ def build_beam(beam_data: dict, combos_bool: bool, **kwargs) -> FEModel3D:
     #model.analyze(check_statics=True)
     return model
 
-def load_beam_model(file_name: str, combos_bool :bool = False, **kwargs) -> FEModel3D:
+def load_beam_model(file_name: str, combos_bool :bool = False, backend: str = "pynite", **kwargs) -> PyNite.FEModel3D | beam2d.BeamModel2D:
     """
     Converts a beam data file int a FEModel3D ready for analysis.
 
@@ -464,11 +545,21 @@ def load_beam_model(file_name: str, combos_bool :bool = False, **kwargs) -> FEMo
 
     beam_txt = read_beam_file(file_name)
     beam_data = get_structured_beam_data(beam_txt)
-    model_beam = build_beam(beam_data, combos_bool, **kwargs)
+    model_beam = build_beam(beam_data, combos_bool, backend, **kwargs)
 
     return model_beam
 
-def extract_arrays_all_combos(solved_beam_model: FEModel3D, result_type: str, direction: str="Fy", n_points:int=500) -> dict:
+def expand_planned_results(solved_beam_model: PyNite.FEModel3D | beam2d.BeamModel2D, results: dict) -> dict:
+    """
+    Returns 'results' keyed by the model's combos, fanned back out to every original combo name if the
+    model's combos were planned by build_beam (see loadfactors.expand_combo_results)
+    """
+    plan = getattr(solved_beam_model, "combo_plan", None)
+    return loadfactors.expand_combo_results(results, plan) if plan else results
+
+
+@instrumentation.instrument()
+def extract_arrays_all_combos(solved_beam_model: PyNite.FEModel3D, result_type: str, direction: str="Fy", n_points:int=500) -> dict:
     """
     result_type: could take values of `"shear"`, `"moment"`, `"axial"`, `"deflection"`, or `"torque"`
     Direction: which could be any of the valid direction strings that PyNite accepts in the context of a certain result type (e.g. `"Fy"`, `"Fx"`, `"Fz"` [for shear] or `"Mx"`, `"My"`, `"Mz"` [for moment], `"dx"`, `"dy"`, `"dz"` [for deflection])
@@ -492,7 +583,109 @@ def extract_arrays_all_combos(solved_beam_model: FEModel3D, result_type: str, di
             array = solved_beam_model.Members[member_name].deflection_array(direction, n_points, combo_name)
 
         results.update({combo_name: array})
-    return results
+    return expand_planned_results(solved_beam_model, results)
+
+def get_discontinuities(beam_data: dict | beam_parser.BeamDefinition) -> np.ndarray:
+    """
+    Returns the sorted, unique x-coordinates (within the beam) where the diagrams of 'beam_data' can
+    jump or change slope: the beam ends, supports, point loads and distributed load ends
+    """
+    L = float(beam_data.L if isinstance(beam_data, beam_parser.BeamDefinition) else beam_data["L"])
+    if isinstance(beam_data, beam_parser.BeamDefinition):
+        locations = [list(beam_data.supports), beam_data.loads.start_location, beam_data.loads.end_location]
+    else:
+        load_locations = []
+        for load in beam_data["Loads"]:
+            if load["Type"] == "Point":
+                load_locations.append(load["Location"])
+            else:
+                load_locations.extend([load["Start Location"], load["End Location"]])
+        locations = [list(beam_data["Supports"]), load_locations]
+    return np.unique(np.clip(np.concatenate([[0.0, L]] + [np.asarray(locs, dtype=float) for locs in locations]), 0.0, L))
+
+
+def evaluate_result(solved_beam_model: PyNite.FEModel3D | beam2d.BeamModel2D, result_type: str, direction: str, x: np.ndarray, combo_name: str) -> np.ndarray:
+    """
+    Returns the 'result_type' results (see extract_arrays_all_combos) in 'direction' at the x-coordinates
+    'x' for 'combo_name'. The 2D backend is evaluated in one vectorized call, PyNite point by point.
+    """
+    member = solved_beam_model.Members[list(solved_beam_model.Members.keys())[0]]
+    result_type = result_type.lower().strip()
+    if result_type in ("axial", "torque"):
+        func = lambda x_point: getattr(member, result_type)(x_point, combo_name)
+    else:
+        func = lambda x_point: getattr(member, result_type)(direction, x_point, combo_name)
+    x = np.asarray(x, dtype=float)
+    if isinstance(solved_beam_model, beam2d.BeamModel2D):
+        return np.asarray(func(x), dtype=float)
+    return np.array([func(x_point) for x_point in x], dtype=float)
+
+
+@instrumentation.instrument()
+def extract_arrays_adaptive(solved_beam_model: PyNite.FEModel3D | beam2d.BeamModel2D, beam_data: dict | beam_parser.BeamDefinition, result_type: str,
+                            direction: str = "Fy", max_points: int = 80, rel_tol: float = 1e-3) -> dict:
+    """
+    Returns the same result arrays as extract_arrays_all_combos (keyed by combo, all with the same
+    x-coordinates) on adaptively chosen points instead of a uniform grid:
+
+    - points just left of and at every discontinuity in 'beam_data' (see get_discontinuities), so jumps
+        at supports and point loads are exact (the results are right-continuous)
+    - then, while fewer than 'max_points', the intervals where the midpoint value departs the most from
+        linear interpolation (relative to each combo's largest value, worst combo) are bisected, until
+        no interval exceeds 'rel_tol'
+
+    The discontinuity points are always kept, even beyond 'max_points'.
+    """
+    combo_names = list(solved_beam_model.LoadCombos.keys())
+    discontinuities = get_discontinuities(beam_data)
+    L = discontinuities[-1]
+    eps = 1e-6 * L
+    interior = discontinuities[(discontinuities > 0.0) & (discontinuities < L)]
+    segment_mids = (discontinuities[:-1] + discontinuities[1:]) / 2
+
+    def evaluate(x):
+        return np.array([evaluate_result(solved_beam_model, result_type, direction, x, combo) for combo in combo_names]).reshape(len(combo_names), len(x))
+
+    x_array = np.unique(np.concatenate([discontinuities, interior - eps, segment_mids]))
+    values = evaluate(x_array)
+    evaluated = {}  # Midpoints evaluated in an earlier round but not yet added
+
+    while len(x_array) < max_points:
+        smooth = np.diff(x_array) > 2 * eps
+        mids = ((x_array[:-1] + x_array[1:]) / 2)[smooth]
+        new = np.array([mid not in evaluated for mid in mids], dtype=bool)
+        if new.any():
+            new_values = evaluate(mids[new])
+            evaluated.update({mid: new_values[:, idx] for idx, mid in enumerate(mids[new])})
+        mid_values = np.array([evaluated[mid] for mid in mids]).T.reshape(len(combo_names), len(mids))
+        linear = ((values[:, :-1] + values[:, 1:]) / 2)[:, smooth]
+        scale = np.maximum(np.abs(values).max(axis=1), 1e-300)[:, None]
+        errors = (np.abs(mid_values - linear) / scale).max(axis=0) if len(combo_names) else np.zeros(len(mids))
+        refine = np.flatnonzero(errors > rel_tol)
+        if not len(refine):
+            break
+        refine = refine[np.argsort(-errors[refine])][:max_points - len(x_array)]
+        x_array = np.concatenate([x_array, mids[refine]])
+        values = np.concatenate([values, mid_values[:, refine]], axis=1)
+        order = np.argsort(x_array)
+        x_array, values = x_array[order], values[:, order]
+        for mid in mids[refine]:
+            del evaluated[mid]
+
+    return expand_planned_results(solved_beam_model, {combo_name: np.array([x_array, combo_values]) for combo_name, combo_values in zip(combo_names, values)})
+
+
+@instrumentation.instrument()
+def extract_polynomials_all_combos(solved_beam_model: beam2d.BeamModel2D, result_type: str, direction: str = "Fy") -> dict:
+    """
+    Returns the exact result diagram of every load combo of a solved 2D backend model as a
+    piecewise.PiecewisePolynomial, keyed by combo name (the exact counterpart of extract_arrays_all_combos).
+    Use .extrema() for the exact max/min and their locations, or call it at any x.
+    """
+    if not isinstance(solved_beam_model, beam2d.BeamModel2D):
+        raise TypeError("Exact piecewise polynomial results are only available for the '2d' backend.")
+    case_polys = solved_beam_model.case_polynomials(result_type, direction)
+    return expand_planned_results(solved_beam_model, piecewise.superpose_polynomials(case_polys, solved_beam_model.LoadCombos))
 
 # model =load_beam_model("test_data/example_beam_wb6.txt", True)
 # model.analyze()
@@ -0,0 +1,205 @@
+"""
+Performance benchmarks of the beam pipeline on synthetic beams: every stage (parse, build, analyze,
+extract, envelope and plot, plus Monte Carlo reliability sampling in scenarios with "n_trials") is timed
+separately and the results are written as JSON, optionally compared against a saved baseline.
+
+Example:
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json --tolerance 0.2
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+import beams
+import loadfactors
+import plots
+import reliability
+
+
+LOAD_CASES = list(loadfactors.CSA_S6_2019_combos()["ULS1"].keys())
+
+SCENARIOS = {
+    "small": {"n_supports": 2, "n_loads": 4, "n_cases": 2, "n_points": 200, "n_combos": None},
+    "medium": {"n_supports": 4, "n_loads": 20, "n_cases": 4, "n_points": 500, "n_combos": None},
+    "large": {"n_supports": 8, "n_loads": 100, "n_cases": 6, "n_points": 2000, "n_combos": None},
+    "many_combos": {"n_supports": 3, "n_loads": 20, "n_cases": 4, "n_points": 500, "n_combos": 100},
+    "reliability": {"n_supports": 2, "n_loads": 4, "n_cases": 2, "n_points": 200, "n_combos": None, "n_trials": 1_000_000},
+}
+
+STAGES = ["parse", "build", "analyze", "extract", "envelope", "plot_plotly", "plot_beam_visualization"]
+RELIABILITY_STAGE = "reliability"
+
+
+def synthetic_beam_rows(n_supports: int = 2, n_loads: int = 4, n_cases: int = 2, L: float = 20000.0, seed: int = 0) -> list[list[str]]:
+    """
+    Returns the raw rows (as returned by beams.read_beam_file) of a synthetic beam of length 'L' with
+    'n_supports' equally spaced supports (pinned, then rollers) and 'n_loads' point and distributed
+    loads spread over the first 'n_cases' load cases. The same arguments always give the same beam.
+    """
+    rng = np.random.default_rng(seed)
+    support_locs = np.linspace(0.0, L, max(n_supports, 2))
+    supports = [f"{loc:g}:{'P' if idx == 0 else 'R'}" for idx, loc in enumerate(support_locs)]
+    rows = [[f"Synthetic beam ({n_supports} supports, {n_loads} loads, {n_cases} cases)"],
+            [f"{L:g}", "200000", "6.48e9", "3.9e8", "43900", "1.19e7", "0.3", "7.85e-9"],
+            supports]
+    cases = LOAD_CASES[:max(min(n_cases, len(LOAD_CASES)), 1)]
+    for idx in range(n_loads):
+        case = f"case:{cases[idx % len(cases)]}"
+        if idx % 2:
+            start, end = np.sort(rng.uniform(0.0, L, 2))
+            magnitude = rng.uniform(-20.0, -1.0)
+            rows.append(["DIST:Fy", f"{magnitude:.6g}", f"{magnitude * rng.uniform(0.5, 1.5):.6g}", f"{start:.6g}", f"{end:.6g}", case])
+        else:
+            rows.append(["POINT:Fy", f"{rng.uniform(-50e3, -1e3):.6g}", f"{rng.uniform(0.0, L):.6g}", case])
+    return rows
+
+
+def synthetic_combos(n_combos: int, load_cases: list[str]) -> dict:
+    """
+    Returns 'n_combos' load combos on 'load_cases', taken from the CSA S6 2019 combos of every alpha
+    factor permutation (cycled with scaled factors once they run out)
+    """
+    combos, _ = loadfactors.permutation_combos(loadfactors.alpha_factor_permutations())
+    combos = [{case: factors.get(case, 0.0) for case in load_cases} for factors in combos.values()]
+    acc = {}
+    for idx in range(n_combos):
+        scale = 1.0 + 0.01 * (idx // len(combos))
+        acc[f"Combo {idx + 1}"] = {case: scale * factor for case, factor in combos[idx % len(combos)].items()}
+    return acc
+
+
+def _time(func, *args, **kwargs) -> tuple[float, object]:
+    start = time.perf_counter()
+    value = func(*args, **kwargs)
+    return time.perf_counter() - start, value
+
+
+def run_scenario(n_supports: int = 2, n_loads: int = 4, n_cases: int = 2, n_points: int = 500, n_combos: int | None = None,
+                 backend: str = "pynite", repeat: int = 5, seed: int = 0, n_trials: int | None = None) -> dict[str, dict[str, float]]:
+    """
+    Times every stage in STAGES 'repeat' times on the synthetic beam of synthetic_beam_rows and returns
+    {stage: {"min": seconds, "median": seconds}}. The beam uses the CSA S6 2019 combos (built with the
+    build_beam defaults, as in production), or 'n_combos' synthetic combos (see synthetic_combos) if given.
+    If 'n_trials' is given, the RELIABILITY_STAGE (reliability.reliability_analysis of the moments with 'n_trials' trials) is timed too.
+    """
+    rows = synthetic_beam_rows(n_supports, n_loads, n_cases, seed=seed)
+    timings = {stage: [] for stage in STAGES + ([RELIABILITY_STAGE] if n_trials else [])}
+    for _ in range(repeat):
+        elapsed, beam_data = _time(beams.get_structured_beam_data, rows)
+        timings["parse"].append(elapsed)
+
+        if n_combos is None:
+            elapsed, model = _time(beams.build_beam, beam_data, True, backend)
+        else:
+            def build():
+                model = beams.build_beam(beam_data, False, backend)
+                model.LoadCombos.clear()
+                load_cases = list(dict.fromkeys(load["Case"] for load in beam_data["Loads"]))
+                for combo_name, factors in synthetic_combos(n_combos, load_cases).items():
+                    model.add_load_combo(combo_name, factors)
+                return model
+            elapsed, model = _time(build)
+        timings["build"].append(elapsed)
+
+        elapsed, _ = _time(model.analyze, check_statics=False)
+        timings["analyze"].append(elapsed)
+
+        elapsed, arrays = _time(beams.extract_arrays_all_combos, model, "moment", "Mz", n_points)
+        timings["extract"].append(elapsed)
+
+        def envelope():
+            loadfactors.envelope_max(arrays)
+            if n_combos is None:
+                return loadfactors.get_max_combo(arrays)[1]
+            return arrays[loadfactors.envelope(arrays)["governing_combo"]]  # get_max_combo only knows the CSA combos
+        elapsed, max_array = _time(envelope)
+        timings["envelope"].append(elapsed)
+
+        elapsed, _ = _time(plots.beam_2D_plot_plotly, max_array, "moment", "Mz", "kN", "mm")
+        timings["plot_plotly"].append(elapsed)
+        elapsed, _ = _time(lambda: plots.render_figure(plots.plot_beam_visualization(beam_data)))
+        timings["plot_beam_visualization"].append(elapsed)
+
+        if n_trials:
+            case_model = beams.build_beam(beam_data, False, backend)
+            case_model.analyze(check_statics=False)
+            case_arrays = beams.extract_arrays_all_combos(case_model, "moment", "Mz", n_points)
+            resistance = {"nominal": 2.0 * np.abs(np.sum([values[1] for values in case_arrays.values()], axis=0)).max()}
+            elapsed, _ = _time(reliability.reliability_analysis, case_arrays, resistance, n_trials=n_trials, seed=seed)
+            timings[RELIABILITY_STAGE].append(elapsed)
+    return {stage: {"min": min(values), "median": statistics.median(values)} for stage, values in timings.items()}
+
+
+def run_benchmarks(scenarios: dict[str, dict] | None = None, backend: str = "pynite", repeat: int = 5) -> dict:
+    """
+    Runs every scenario in 'scenarios' (default: SCENARIOS) and returns the JSON-serializable results:
+    {"meta": {...}, "results": {scenario: {"params": {...}, "stages": {stage: {"min": s, "median": s}}}}}
+    """
+    scenarios = SCENARIOS if scenarios is None else scenarios
+    acc = {}
+    for name, params in scenarios.items():
+        acc[name] = {"params": {**params, "backend": backend, "repeat": repeat},
+                     "stages": run_scenario(**params, backend=backend, repeat=repeat)}
+    meta = {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    return {"meta": meta, "results": acc}
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float = 0.25, statistic: str = "min") -> list[dict]:
+    """
+    Returns one row per stage found in both 'results' and 'baseline' (outputs of run_benchmarks):
+    "scenario", "stage", "baseline", "current" (seconds), "ratio" (current / baseline) and
+    "regression" (True if the stage is more than 'tolerance' slower than the baseline)
+    """
+    acc = []
+    for name, scenario in results["results"].items():
+        baseline_stages = baseline["results"].get(name, {}).get("stages", {})
+        for stage, timing in scenario["stages"].items():
+            if stage not in baseline_stages:
+                continue
+            before = baseline_stages[stage][statistic]
+            after = timing[statistic]
+            ratio = after / before if before > 0 else float("inf")
+            acc.append({"scenario": name, "stage": stage, "baseline": before, "current": after, "ratio": ratio,
+                        "regression": ratio > 1.0 + tolerance})
+    return acc
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Time each stage of the beam pipeline on synthetic beams.")
+    parser.add_argument("-o", "--output", default=None, help="JSON file to write the results to (default: stdout)")
+    parser.add_argument("--baseline", default=None, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline (default: 0.25 = 25%%)")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="Scenarios to run (default: all)")
+    parser.add_argument("--backend", choices=["pynite", "2d", "auto"], default="pynite")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    scenarios = {name: SCENARIOS[name] for name in args.scenario} if args.scenario else SCENARIOS
+    results = run_benchmarks(scenarios, args.backend, args.repeat)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline, "r") as baseline_file:
+        baseline = json.load(baseline_file)
+    rows = compare_to_baseline(results, baseline, args.tolerance)
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['scenario']:>12} {row['stage']:>24} {row['baseline'] * 1e3:10.3f} ms -> {row['current'] * 1e3:10.3f} ms ({row['ratio']:.2f}x){flag}", file=sys.stderr)
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.fixture
+def make_beam_data():
+    """
+    Returns a factory of beam data dicts (the beams.build_beam format): make_beam_data(supports, loads, L, **properties),
+    a steel girder unless 'properties' override its Name, E, Iz, Iy, A, J, nu or rho
+    """
+    def factory(supports: dict, loads: list[dict] | None = None, L: float = 20000.0, **properties) -> dict:
+        return {'Name': 'Girder', 'L': L, 'E': 200e3, 'Iz': 6480e6, 'Iy': 1.0, 'A': 43900.0, 'J': 1.0, 'nu': 0.3, 'rho': 1.0,
+                **properties, 'Supports': supports, 'Loads': list(loads or [])}
+    return factory
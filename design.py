@@ -0,0 +1,145 @@
+"""
+Steel section selection: checks every section of a catalog (e.g. CSA W-shapes) against the factored
+moment and shear envelopes and the SLS deflection limit of a beam, and returns the lightest one that works.
+
+The beam is analyzed once. For a beam of uniform section on rigid supports the member forces do not depend
+on EI (whether it is statically determinate or not) and the deflections are proportional to 1/EI, so every
+section is checked from the same load case results. The self weight of each section is added by superposition
+of one unit self weight load case. On spring supports or a Winkler foundation the forces depend on EI, so each
+section is analyzed on its own.
+
+Units are N and mm (MPa for stresses), with the section mass in kg/m. Resistances follow CSA S16 for
+laterally supported Class 1 or 2 sections with stocky webs: Mr = phi * Zx * Fy and Vr = phi * d * w * 0.66 * Fy.
+"""
+import csv
+import numpy as np
+import beam2d
+import beams
+import loadfactors
+
+
+STEEL_E = 200000.0  # [MPa]
+PHI_STEEL = 0.9
+GRAVITY = 9.81e-3  # [N/mm per kg/m]
+SELF_WEIGHT_CASE = "Self weight"
+CATALOG_FIELDS = ("Designation", "Mass", "A", "Ix", "Zx", "d", "w")
+
+
+def read_section_catalog(source) -> dict[str, np.ndarray]:
+    """
+    Returns the sections in the CSV 'source' (a file name or an open text file) as one array per column
+    (at least CATALOG_FIELDS: "Designation", "Mass" [kg/m], "A" [mm2], "Ix" [mm4], "Zx" [mm3],
+    "d" and "w" (depth and web thickness) [mm]). Other numeric columns are kept as well.
+    """
+    if isinstance(source, str):
+        with open(source, "r", newline="") as catalog_file:
+            return read_section_catalog(catalog_file)
+    rows = list(csv.DictReader(source))
+    if not rows:
+        raise ValueError("The section catalog is empty.")
+    missing = [field for field in CATALOG_FIELDS if field not in rows[0]]
+    if missing:
+        raise ValueError(f"The section catalog is missing the columns: {', '.join(missing)}.")
+    acc = {"Designation": np.array([row["Designation"].strip() for row in rows])}
+    for field in rows[0]:
+        if field == "Designation":
+            continue
+        try:
+            acc[field] = np.array([float(row[field]) for row in rows])
+        except ValueError:
+            if field in CATALOG_FIELDS:
+                raise ValueError(f"The section catalog column '{field}' must be numeric.") from None
+    return acc
+
+
+def case_result_arrays(beam_data: dict, n_points: int = 500, backend: str = "auto", self_weight: bool = True) -> dict[str, dict]:
+    """
+    Analyzes 'beam_data' once and returns the unfactored shear ("Fy"), moment ("Mz") and deflection ("dy")
+    result arrays keyed by load case, as in app_functions.get_case_results. If 'self_weight', the results
+    of a downward unit (1 N/mm) distributed load over the whole beam are included as SELF_WEIGHT_CASE.
+    """
+    loads = list(beam_data["Loads"])
+    if self_weight:
+        loads.append({"Type": "Dist", "Direction": "Fy", "Start Magnitude": -1.0, "End Magnitude": -1.0,
+                      "Start Location": 0.0, "End Location": float(beam_data["L"]), "Case": SELF_WEIGHT_CASE})
+    model = beams.build_beam({**beam_data, "Loads": loads}, False, backend)
+    model.analyze(check_statics=False)
+    return {result_type: beams.extract_arrays_all_combos(model, result_type, direction, n_points)
+            for result_type, direction in (("shear", "Fy"), ("moment", "Mz"), ("deflection", "dy"))}
+
+
+def _factored_peaks(case_arrays: dict, load_combos: dict, self_weights: np.ndarray) -> np.ndarray:
+    """
+    Returns the peak absolute factored value over every combo in 'load_combos' and every point, for each
+    of the self weights [N/mm] in 'self_weights' (which are factored as dead load)
+    """
+    load_cases = [case for case in case_arrays if case != SELF_WEIGHT_CASE]
+    factors = loadfactors.combo_factor_matrix(load_combos, load_cases)
+    n_points = len(next(iter(case_arrays.values()))[1])
+    stacked = np.array([np.asarray(case_arrays[case][1], dtype=float) for case in load_cases]).reshape(len(load_cases), n_points)
+    base = factors @ stacked
+    if SELF_WEIGHT_CASE not in case_arrays:
+        return np.full(len(self_weights), np.abs(base).max(initial=0.0))
+    dead_factors = np.array([float(combo.get("D", 0.0)) for combo in load_combos.values()])
+    unit = np.asarray(case_arrays[SELF_WEIGHT_CASE][1], dtype=float)
+    acc = np.zeros(len(self_weights))
+    for combo_base, dead_factor in zip(base, dead_factors):  # One (sections x points) block per combo keeps the temporaries small
+        values = np.multiply.outer(dead_factor * self_weights, unit)
+        values += combo_base
+        np.abs(values, out=values)
+        np.maximum(acc, values.max(axis=1, initial=0.0), out=acc)
+    return acc
+
+
+def section_checks(beam_data: dict, catalog: dict[str, np.ndarray], Fy: float = 350.0, deflection_limit: float = 360.0, deflection_combo: str = "SLS2",
+                   n_points: int = 500, backend: str = "auto", self_weight: bool = True, case_results: dict | None = None, **kwargs) -> dict[str, np.ndarray]:
+    """
+    Checks every section in 'catalog' (see read_section_catalog) used as the beam in 'beam_data' and returns one array per
+    key: "Designation", "Mass", "Mf", "Mr", "Vf", "Vr" (envelope of the factored ULS demands and the resistances),
+    "deflection" (peak deflection under 'deflection_combo', by default the SLS2 live load combo), "deflection_allowed"
+    (L / 'deflection_limit'), "utilization" (the highest demand / capacity ratio) and "ok".
+    'kwargs' are the alpha factors passed to loadfactors.CSA_S6_2019_combos.
+
+    The beam is analyzed once (with its own E and Iz) unless 'case_results' (the output of case_result_arrays)
+    is given; forces are reused for every section and deflections are scaled by E * Iz / (STEEL_E * Ix).
+    Beams on spring supports or a Winkler foundation are analyzed once per section ('case_results' is ignored).
+    """
+    load_combos = loadfactors.CSA_S6_2019_combos(**kwargs)
+    uls_combos = {name: factors for name, factors in load_combos.items() if name.startswith("ULS")}
+    deflection_combos = {deflection_combo: load_combos[deflection_combo]}
+    self_weights = catalog["Mass"] * GRAVITY if self_weight else np.zeros(len(catalog["Mass"]))
+
+    if beam2d.has_elastic_supports(beam_data["Supports"]):
+        Mf, Vf, deflection = np.zeros((3, len(self_weights)))
+        for idx, Ix in enumerate(catalog["Ix"]):
+            section_results = case_result_arrays({**beam_data, "E": STEEL_E, "Iz": float(Ix)}, n_points, backend, self_weight)
+            Mf[idx] = _factored_peaks(section_results["moment"], uls_combos, self_weights[idx:idx + 1])[0]
+            Vf[idx] = _factored_peaks(section_results["shear"], uls_combos, self_weights[idx:idx + 1])[0]
+            deflection[idx] = _factored_peaks(section_results["deflection"], deflection_combos, self_weights[idx:idx + 1])[0]
+    else:
+        if case_results is None:
+            case_results = case_result_arrays(beam_data, n_points, backend, self_weight)
+        Mf = _factored_peaks(case_results["moment"], uls_combos, self_weights)
+        Vf = _factored_peaks(case_results["shear"], uls_combos, self_weights)
+        reference_deflection = _factored_peaks(case_results["deflection"], deflection_combos, self_weights)
+        deflection = reference_deflection * float(beam_data["E"]) * float(beam_data["Iz"]) / (STEEL_E * catalog["Ix"])
+
+    Mr = PHI_STEEL * catalog["Zx"] * Fy
+    Vr = PHI_STEEL * catalog["d"] * catalog["w"] * 0.66 * Fy
+    deflection_allowed = np.full(len(Mr), float(beam_data["L"]) / deflection_limit)
+    utilization = np.max([Mf / Mr, Vf / Vr, deflection / deflection_allowed], axis=0)
+    return {"Designation": catalog["Designation"], "Mass": catalog["Mass"], "Mf": Mf, "Mr": Mr, "Vf": Vf, "Vr": Vr,
+            "deflection": deflection, "deflection_allowed": deflection_allowed, "utilization": utilization, "ok": utilization <= 1.0}
+
+
+def select_section(beam_data: dict, catalog: dict[str, np.ndarray], **kwargs) -> dict | None:
+    """
+    Returns the checks (see section_checks, same keyword arguments) of the lightest section in 'catalog' that
+    satisfies every check, as a dict of scalars, or None if no section works
+    """
+    checks = section_checks(beam_data, catalog, **kwargs)
+    passing = np.flatnonzero(checks["ok"])
+    if not len(passing):
+        return None
+    idx = passing[np.argmin(checks["Mass"][passing])]
+    return {key: values[idx].item() for key, values in checks.items()}
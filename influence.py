@@ -0,0 +1,281 @@
+import hashlib
+import numpy as np
+import beam_parser
+import beam2d
+import beams
+import loadfactors
+import result_cache
+
+
+# Influence lines by content hash of the beam geometry, stations and load positions (the loads do not matter),
+# so repeated moving load envelopes of the same beam only solve them once. In memory only: they can be large.
+INFLUENCE_CACHE = result_cache.ResultCache(max_entries=16, cache_dir=None)
+
+# CSA S6 CL-625 design truck: axle loads [N] and axle spacings [mm], front axle first
+CL_625_TRUCK = {"Name": "CL-625", "Axle Loads": [50e3, 125e3, 125e3, 175e3, 150e3], "Axle Spacings": [3600.0, 1200.0, 6600.0, 6600.0]}
+
+
+def get_axle_offsets(vehicle: dict) -> np.ndarray:
+    """
+    Returns the distance of each axle of 'vehicle' behind its front axle
+    """
+    return np.concatenate([[0.0], np.cumsum(np.asarray(vehicle["Axle Spacings"], dtype=float))])
+
+
+def influence_lines(beam_data: dict, stations: np.ndarray, load_positions: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Returns the shear ("Fy") and moment ("Mz") influence lines of the beam in 'beam_data' for a unit
+    downward point load, as (stations x load_positions) arrays. Only the beam geometry and supports
+    in 'beam_data' are used (its loads are ignored).
+
+    All load positions are solved together with one banded factorization of the 2D stiffness matrix
+    (see beam2d). Results follow the same sign and discontinuity conventions as the beam diagrams.
+    Spring supports are fine; beams on a Winkler foundation are not supported.
+    """
+    model = beam2d.BeamModel2D({**beam_data, "Loads": []})
+    if model.foundation:
+        raise ValueError("Influence lines are not available for beams on a Winkler foundation.")
+    stations = np.asarray(stations, dtype=float)
+    load_positions = np.asarray(load_positions, dtype=float)
+    L = model.L
+    n_nodes = len(model.node_coords)
+
+    _, R = model.solve_nodal_loads(beam2d.unit_point_loads(model.node_coords, load_positions))
+    R = R.reshape(n_nodes, 3, -1)
+    tol = 1e-10 * max(L, 1.0)
+
+    # Singularity functions of the reactions (at the nodes) and of the unit load (at each position)
+    node_offsets = stations[:, None] - model.node_coords[None, :]
+    node_active = (node_offsets >= -tol) & (model.node_coords[None, :] < L * (1 - 1e-12))
+    node_ramp = np.where(node_active, np.maximum(node_offsets, 0.0), 0.0)
+    load_offsets = stations[:, None] - load_positions[None, :]
+    load_active = (load_offsets >= -tol) & (load_positions[None, :] < L * (1 - 1e-12))
+    load_ramp = np.where(load_active, np.maximum(load_offsets, 0.0), 0.0)
+
+    shear = node_active @ R[:, 1, :] - load_active
+    moment = -(node_ramp @ R[:, 1, :] - load_ramp) + node_active @ R[:, 2, :]
+    return {"x": stations, "positions": load_positions, "shear": shear, "moment": moment}
+
+
+def influence_lines_key(beam_data: dict, stations: np.ndarray, load_positions: np.ndarray) -> str:
+    """
+    Returns the INFLUENCE_CACHE key of the influence lines of 'beam_data' (geometry and supports only) at 'stations'
+    for unit loads at 'load_positions'
+    """
+    digests = [hashlib.sha256(np.ascontiguousarray(values, dtype=float).tobytes()).hexdigest() for values in (stations, load_positions)]
+    return result_cache.beam_data_key({**beam_data, "Loads": []}, stations=digests[0], load_positions=digests[1], results="influence")
+
+
+def cached_influence_lines(beam_data: dict, stations: np.ndarray, load_positions: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Returns influence_lines (same arguments) from INFLUENCE_CACHE, solving them only for a new geometry,
+    stations or load positions. The returned arrays are shared and must be treated as read-only.
+    """
+    key = influence_lines_key(beam_data, stations, load_positions)
+    return INFLUENCE_CACHE.get_or_compute(key, lambda: influence_lines(beam_data, stations, load_positions))
+
+
+def vehicle_positions(vehicle: dict, beam_len: float, step: float, reverse: bool = False) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the front axle positions (every 'step' from the vehicle entering to leaving the beam), the
+    positions of every axle at each of them (n_positions x n_axles) and the axle loads.
+    If 'reverse', the vehicle travels from x = L towards x = 0.
+    """
+    offsets = get_axle_offsets(vehicle)
+    axle_loads = np.asarray(vehicle["Axle Loads"], dtype=float)
+    n_steps = int(np.ceil((beam_len + offsets[-1]) / step))
+    front_positions = np.linspace(0.0, beam_len + offsets[-1], n_steps + 1)
+    if reverse:
+        axle_positions = beam_len - front_positions[:, None] + offsets[None, :]
+    else:
+        axle_positions = front_positions[:, None] - offsets[None, :]
+    return front_positions, axle_positions, axle_loads
+
+
+def moving_load_envelope(beam_data: dict, vehicles: list[dict], n_points: int = 500, step: float | None = None) -> dict:
+    """
+    Returns the max/min shear ("Fy") and moment ("Mz") envelopes of each vehicle in 'vehicles' moving
+    across the beam in both directions, at n_points stations (the same x-coordinates as
+    beams.extract_arrays_all_combos). Axle loads are positive downwards. 'step' is the distance
+    between vehicle positions (default: L / (n_points - 1)).
+
+    The influence lines are computed once per beam geometry (see cached_influence_lines), exactly at every axle
+    position needed, and every vehicle position is then evaluated in one vectorized product with the axle loads.
+
+    Returns a dict with "x" and, for "shear" and "moment", "{result}_max" and "{result}_min" arrays
+    plus the governing vehicle name and direction ("{result}_max_vehicle", "{result}_min_vehicle") at each station
+    """
+    L = float(beam_data["L"])
+    stations = np.linspace(0, L, n_points)
+    step = step or L / max(n_points - 1, 1)
+
+    sweeps = []
+    for vehicle in vehicles:
+        for reverse in (False, True):
+            _, axle_positions, axle_loads = vehicle_positions(vehicle, L, step, reverse)
+            on_beam = (axle_positions >= 0.0) & (axle_positions <= L)
+            sweeps.append((f"{vehicle['Name']} ({'reverse' if reverse else 'forward'})", axle_positions, axle_loads, on_beam))
+
+    all_positions = np.unique(np.concatenate([np.clip(positions, 0.0, L).ravel() for _, positions, _, _ in sweeps]))
+    lines = cached_influence_lines(beam_data, stations, all_positions)
+
+    acc = {"x": stations}
+    for result_type in ("shear", "moment"):
+        line = lines[result_type]
+        maxima = []
+        minima = []
+        for _, axle_positions, axle_loads, on_beam in sweeps:
+            position_idx = np.searchsorted(all_positions, np.clip(axle_positions, 0.0, L))
+            effects = (line[:, position_idx] * np.where(on_beam, axle_loads[None, :], 0.0)[None, :, :]).sum(axis=2)
+            maxima.append(effects.max(axis=1))
+            minima.append(effects.min(axis=1))
+        maxima = np.array(maxima)
+        minima = np.array(minima)
+        names = np.array([name for name, _, _, _ in sweeps])
+        acc.update({f"{result_type}_max": maxima.max(axis=0), f"{result_type}_min": minima.min(axis=0),
+                    f"{result_type}_max_vehicle": names[maxima.argmax(axis=0)], f"{result_type}_min_vehicle": names[minima.argmin(axis=0)]})
+    return acc
+
+
+def span_boundaries(supports: dict[float, str], beam_len: float) -> np.ndarray:
+    """
+    Returns the sorted x-coordinates that bound the spans of a beam on 'supports': the beam ends and every
+    support with a rigid restraint or a spring (overhangs count as spans)
+    """
+    locs = [float(loc) for loc, sup in supports.items() if beam2d.is_point_support(beam_parser.parse_support_type(sup))]
+    return np.unique(np.clip([0.0, float(beam_len), *locs], 0.0, float(beam_len)))
+
+
+def span_load_cases(beam_data: dict, live_case: str = "L", w: float | None = None) -> list[dict]:
+    """
+    Returns the loads of 'live_case' in 'beam_data' split at the span boundaries (see span_boundaries), each
+    in load case "{live_case} span {n}" (n from 1). Distributed loads are cut at the supports with their
+    magnitude interpolated; a point load on a support belongs to the span on its right.
+    If 'w' is given, a uniform downward load 'w' (force / length) over every span is used instead.
+    """
+    boundaries = span_boundaries(beam_data["Supports"], beam_data["L"])
+    acc = []
+    for idx, (start, end) in enumerate(zip(boundaries[:-1], boundaries[1:])):
+        case = f"{live_case} span {idx + 1}"
+        if w is not None:
+            acc.append({"Type": "Dist", "Direction": "Fy", "Start Magnitude": -w, "End Magnitude": -w, "Start Location": start, "End Location": end, "Case": case})
+            continue
+        for load in beam_data["Loads"]:
+            if load["Case"] != live_case:
+                continue
+            if load["Type"] == "Point":
+                if start <= load["Location"] < end or (idx == len(boundaries) - 2 and load["Location"] == end):
+                    acc.append({**load, "Case": case})
+                continue
+            x1, x2 = load["Start Location"], load["End Location"]
+            lo, hi = max(min(x1, x2), start), min(max(x1, x2), end)
+            if hi <= lo:
+                continue
+            magnitude = lambda x: load["Start Magnitude"] + (load["End Magnitude"] - load["Start Magnitude"]) * (x - x1) / (x2 - x1)
+            acc.append({**load, "Start Magnitude": magnitude(lo), "End Magnitude": magnitude(hi), "Start Location": lo, "End Location": hi, "Case": case})
+    return acc
+
+
+def all_patterns(n_spans: int) -> np.ndarray:
+    """
+    Returns every span on/off pattern (except all off) as a (2^n_spans - 1 x n_spans) boolean array
+    """
+    codes = np.arange(1, 2**n_spans)
+    return (codes[:, None] >> np.arange(n_spans)[None, :]) & 1 == 1
+
+
+def standard_patterns(n_spans: int) -> np.ndarray:
+    """
+    Returns the usual design patterns as a boolean (patterns x n_spans) array: all spans loaded, the two
+    checkerboards (alternate spans) and, for each pair of adjacent spans, both loaded plus every other span
+    beyond them (the pattern for the hogging moment over the support between them)
+    """
+    spans = np.arange(n_spans)
+    acc = [np.ones(n_spans, dtype=bool), spans % 2 == 0, spans % 2 == 1]
+    for left in range(n_spans - 1):
+        right = left + 1
+        acc.append(np.where(spans <= left, (left - spans) % 2 == 0, (spans - right) % 2 == 0))
+    return np.unique(np.array(acc), axis=0)
+
+
+def _pattern_names(masks: np.ndarray) -> np.ndarray:
+    # "1+3" for spans 1 and 3 loaded, "none" if no span is
+    unique, inverse = np.unique(masks, axis=0, return_inverse=True)
+    names = np.array(["+".join(str(idx + 1) for idx in np.flatnonzero(mask)) or "none" for mask in unique])
+    return names[inverse.reshape(-1)]
+
+
+def pattern_load_envelope(beam_data: dict, n_points: int = 500, live_case: str = "L", w: float | None = None,
+                          patterns: np.ndarray | None = None, backend: str = "2d") -> dict:
+    """
+    Returns the max/min shear ("Fy"), moment ("Mz") and deflection ("dy") envelopes of the 'live_case' loads
+    of 'beam_data' applied span by span in every on/off pattern, at n_points stations (the same x-coordinates
+    as beams.extract_arrays_all_combos). Spans and per-span loads are those of span_load_cases ('w' included).
+
+    The live load of each span is analyzed once, as its own load case of one model (one factorization), and
+    patterns are evaluated by superposition. With 'patterns' None the envelope covers all 2^n patterns
+    exactly without enumerating them: at each station the max is the sum of the positive span effects
+    (and the min of the negative ones), so the governing pattern loads exactly those spans. A boolean
+    (patterns x spans) array, e.g. standard_patterns or all_patterns, restricts the envelope to those patterns.
+
+    Returns a dict with "x", "spans" (start, end of each span) and, for "shear", "moment" and "deflection",
+    "{result}_max" and "{result}_min" arrays plus the governing pattern ("{result}_max_pattern",
+    "{result}_min_pattern": loaded span numbers such as "1+3") at each station. The max/min arrays work
+    with live_load_case_arrays and superpose_moving_load like a moving load envelope.
+    """
+    boundaries = span_boundaries(beam_data["Supports"], beam_data["L"])
+    n_spans = len(boundaries) - 1
+    cases = [f"{live_case} span {idx + 1}" for idx in range(n_spans)]
+    model = beams.build_beam({**beam_data, "Loads": span_load_cases(beam_data, live_case, w)}, False, backend)
+    model.analyze(check_statics=False)
+
+    acc = {"x": np.linspace(0, float(beam_data["L"]), n_points), "spans": np.column_stack([boundaries[:-1], boundaries[1:]])}
+    for result_type, direction in (("shear", "Fy"), ("moment", "Mz"), ("deflection", "dy")):
+        arrays = beams.extract_arrays_all_combos(model, result_type, direction, n_points) if model.LoadCombos else {}
+        responses = np.array([np.asarray(arrays[case][1], dtype=float) if case in arrays else np.zeros(n_points) for case in cases])
+        if patterns is None:
+            acc.update({f"{result_type}_max": np.where(responses > 0, responses, 0.0).sum(axis=0),
+                        f"{result_type}_min": np.where(responses < 0, responses, 0.0).sum(axis=0),
+                        f"{result_type}_max_pattern": _pattern_names((responses > 0).T),
+                        f"{result_type}_min_pattern": _pattern_names((responses < 0).T)})
+            continue
+        masks = np.asarray(patterns, dtype=bool)
+        effects = masks.astype(float) @ responses  # (patterns x stations)
+        max_idx = effects.argmax(axis=0)
+        min_idx = effects.argmin(axis=0)
+        names = _pattern_names(masks)
+        points = np.arange(n_points)
+        acc.update({f"{result_type}_max": effects[max_idx, points], f"{result_type}_min": effects[min_idx, points],
+                    f"{result_type}_max_pattern": names[max_idx], f"{result_type}_min_pattern": names[min_idx]})
+    return acc
+
+
+def live_load_case_arrays(live_envelope: dict, result_type: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the max and min live load envelopes of 'result_type' ("shear" or "moment") from
+    moving_load_envelope (or pattern_load_envelope) as result arrays (2xN: x-coordinates in index 0, results in index 1), in the
+    same format as the load case arrays used by loadfactors.superpose_case_arrays
+    """
+    x_array = live_envelope["x"]
+    return np.array([x_array, live_envelope[f"{result_type}_max"]]), np.array([x_array, live_envelope[f"{result_type}_min"]])
+
+
+def superpose_moving_load(case_arrays: dict, live_envelope: dict, result_type: str, load_combos: dict, live_case: str = "L") -> dict:
+    """
+    Returns the factored result arrays for every combo in 'load_combos' with the moving load envelope
+    (or pattern_load_envelope) used as load case 'live_case', keyed by "{combo} (L max)" and "{combo} (L min)".
+    Since the live load factors are not negative, loadfactors.envelope of the returned arrays gives the
+    max/min factored envelopes.
+
+    'case_arrays': the static load case result arrays, keyed by load case name, with the same x-coordinates.
+        Static loads in 'live_case' (if any) are added to the moving load envelopes.
+    """
+    live_max, live_min = live_load_case_arrays(live_envelope, result_type)
+    acc = {}
+    for label, live_array in (("L max", live_max), ("L min", live_min)):
+        if live_case in case_arrays:
+            live_array = np.array([live_array[0], live_array[1] + np.asarray(case_arrays[live_case][1])])
+        combo_arrays = loadfactors.superpose_case_arrays({**case_arrays, live_case: live_array}, load_combos)
+        for combo_name, combo_array in combo_arrays.items():
+            acc.update({f"{combo_name} ({label})": combo_array})
+    return acc
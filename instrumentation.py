@@ -0,0 +1,175 @@
+"""
+Stage-level instrumentation of the beam pipeline: wall time, call counts and (optionally) peak memory
+allocation per stage, kept in a rolling in-process registry and optionally appended to a JSON-lines log.
+
+Instrumentation is off unless BEAM_INSTRUMENTATION=1 (or enable() is called). While it is off an
+instrumented function costs one flag check per call. Memory tracking uses tracemalloc, which slows
+everything down noticeably, so it is only switched on by enable(memory=True) or BEAM_INSTRUMENTATION=memory.
+Peak allocations are process-wide: concurrent stages in other threads are included.
+"""
+import functools
+import os
+import threading
+import time
+from collections import deque
+import lazy_imports
+
+json = lazy_imports.lazy_import("json")
+tracemalloc = lazy_imports.lazy_import("tracemalloc")
+
+
+RECENT_RECORDS = 1000
+
+_enabled = False
+_memory = False
+_log_file = None
+_lock = threading.Lock()
+_stats = {}
+_recent = deque(maxlen=RECENT_RECORDS)
+_local = threading.local()
+
+
+def enable(memory: bool = False, log_file: str | None = None):
+    """
+    Turns instrumentation on. If 'memory', peak allocations are tracked with tracemalloc.
+    If 'log_file', one JSON line per stage call is appended to it.
+    """
+    global _enabled, _memory, _log_file
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _log_file = log_file
+    _enabled = True
+
+
+def disable():
+    """
+    Turns instrumentation off (the recorded stats are kept) and stops tracemalloc if enable() started it
+    """
+    global _enabled, _memory
+    _enabled = False
+    if _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _memory = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """
+    Clears the recorded stats and recent records
+    """
+    with _lock:
+        _stats.clear()
+        _recent.clear()
+
+
+def _memory_stack() -> list:
+    if not hasattr(_local, "memory_stack"):
+        _local.memory_stack = []
+    return _local.memory_stack
+
+
+def _record(name: str, seconds: float, peak_bytes: int | None):
+    record = {"stage": name, "seconds": seconds, "peak_bytes": peak_bytes, "time": time.time(), "thread": threading.current_thread().name}
+    with _lock:
+        stats = _stats.setdefault(name, {"calls": 0, "total": 0.0, "max": 0.0, "peak_bytes": None})
+        stats["calls"] += 1
+        stats["total"] += seconds
+        stats["max"] = max(stats["max"], seconds)
+        if peak_bytes is not None:
+            stats["peak_bytes"] = max(stats["peak_bytes"] or 0, peak_bytes)
+        _recent.append(record)
+        if _log_file is not None:
+            try:
+                with open(_log_file, "a") as log:
+                    log.write(json.dumps(record) + "\n")
+            except OSError:
+                pass  # The log is best effort; the record is still in the registry
+
+
+class stage:
+    """
+    Context manager that records the wall time (and peak allocation if memory tracking is on) of
+    the code it wraps under 'name'. Does nothing while instrumentation is off.
+    """
+    __slots__ = ("name", "_start", "_active", "_tracked")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._active = False
+        self._tracked = False
+
+    def __enter__(self):
+        self._active = _enabled
+        if self._active:
+            self._tracked = _memory and tracemalloc.is_tracing()
+            if self._tracked:
+                current, peak = tracemalloc.get_traced_memory()
+                stack = _memory_stack()
+                if stack:
+                    stack[-1][1] = max(stack[-1][1], peak)
+                tracemalloc.reset_peak()
+                stack.append([current, 0])
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self._active:
+            return False
+        seconds = time.perf_counter() - self._start
+        peak_bytes = None
+        if self._tracked and tracemalloc.is_tracing():
+            stack = _memory_stack()
+            _, peak = tracemalloc.get_traced_memory()
+            start_current, inner_peak = stack.pop()
+            peak = max(peak, inner_peak)
+            peak_bytes = max(peak - start_current, 0)
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+        _record(self.name, seconds, peak_bytes)
+        return False
+
+
+def instrument(name: str | None = None):
+    """
+    Decorator that records every call of the decorated function as a stage (see stage), named
+    'name' or "module.function". While instrumentation is off the only overhead is one flag check.
+    """
+    def decorator(func):
+        stage_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with stage(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summary() -> dict[str, dict]:
+    """
+    Returns {stage: {"calls", "total", "mean", "max" (seconds), "peak_bytes"}} sorted by total time, slowest first
+    """
+    with _lock:
+        items = [(name, dict(stats)) for name, stats in _stats.items()]
+    items.sort(key=lambda item: item[1]["total"], reverse=True)
+    return {name: {**stats, "mean": stats["total"] / stats["calls"]} for name, stats in items}
+
+
+def recent(n: int | None = None) -> list[dict]:
+    """
+    Returns the last 'n' (default: all kept) stage records, oldest first
+    """
+    with _lock:
+        records = list(_recent)
+    return records if n is None else records[-n:]
+
+
+_setting = os.environ.get("BEAM_INSTRUMENTATION", "").strip().lower()
+if _setting in ("1", "true", "on", "memory"):
+    enable(memory=_setting == "memory", log_file=os.environ.get("BEAM_INSTRUMENTATION_LOG") or None)
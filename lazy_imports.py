@@ -0,0 +1,119 @@
+"""
+Deferred imports of the heavy dependencies (numpy, scipy, PyNite, plotly, matplotlib), so that light
+workflows (e.g. a loadfactors calculation or parsing a beam file) start in milliseconds.
+
+    go = lazy_imports.lazy_import("plotly.graph_objects")
+
+'go' is a placeholder module that imports plotly.graph_objects on first attribute access. Modules that
+use lazy imports in annotations need 'from __future__ import annotations'. A server can call prewarm()
+at boot to pay the import cost before the first request, and import_report() shows what has been
+loaded and how long each import took.
+
+Run this file to print the cold import time of every app module (each in a fresh interpreter).
+"""
+import importlib
+import sys
+import threading
+import time
+import types
+
+
+APP_MODULES = ["loadfactors", "beam_parser", "beam2d", "beams", "design", "influence", "reliability", "support_layout", "plots", "app_functions", "batch"]
+
+_lazy_modules = {}
+_load_times = {}
+_lock = threading.Lock()
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Placeholder for a module that is imported on first attribute access. The real module's namespace
+    is then copied in, so later attribute lookups are as fast as on the module itself.
+    """
+
+    def __getattr__(self, attr: str):
+        module = _load(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self.__name__!r}>"
+
+
+def _load(name: str) -> types.ModuleType:
+    module = sys.modules.get(name)
+    if module is None:
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        with _lock:
+            _load_times.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Returns the module 'name' if it is already imported, otherwise a placeholder that imports it on
+    first use (an ImportError is raised then, not here)
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    with _lock:
+        if name not in _lazy_modules:
+            _lazy_modules[name] = _LazyModule(name)
+        return _lazy_modules[name]
+
+
+def prewarm(names: list[str] | None = None, background: bool = False) -> dict[str, float] | threading.Thread:
+    """
+    Imports the modules in 'names' (default: every module registered with lazy_import) and returns the
+    seconds each one took (0.0 if it was already loaded). If 'background', the imports run in a
+    daemon thread, which is returned instead.
+    """
+    if background:
+        thread = threading.Thread(target=prewarm, args=(names,), name="prewarm-imports", daemon=True)
+        thread.start()
+        return thread
+    with _lock:
+        names = list(_lazy_modules) if names is None else names
+    acc = {}
+    for name in names:
+        already_loaded = name in sys.modules
+        start = time.perf_counter()
+        module = _lazy_modules.get(name)
+        if module is not None:
+            module.__dict__.update(_load(name).__dict__)
+        else:
+            _load(name)
+        acc[name] = 0.0 if already_loaded else time.perf_counter() - start
+    return acc
+
+
+def import_report() -> dict[str, dict]:
+    """
+    Returns {module name: {"loaded": bool, "seconds": import time or None}} for every module
+    registered with lazy_import
+    """
+    with _lock:
+        names = list(_lazy_modules)
+        load_times = dict(_load_times)
+    return {name: {"loaded": name in sys.modules, "seconds": load_times.get(name)} for name in names}
+
+
+def cold_import_times(modules: list[str] | None = None) -> dict[str, float]:
+    """
+    Returns the seconds it takes to import each of 'modules' (default: APP_MODULES) in a fresh
+    interpreter, i.e. the cold start cost of a process that only needs that module
+    """
+    import subprocess  # Only needed for the report
+
+    acc = {}
+    for name in APP_MODULES if modules is None else modules:
+        code = f"import time; start = time.perf_counter(); import {name}; print(time.perf_counter() - start)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        acc[name] = float(output.split()[-1])
+    return acc
+
+
+if __name__ == "__main__":
+    for module_name, seconds in cold_import_times(sys.argv[1:] or None).items():
+        print(f"{module_name:>16} {seconds * 1e3:9.1f} ms")
@@ -1,3 +1,10 @@
+from __future__ import annotations
+import instrumentation
+import lazy_imports
+
+np = lazy_imports.lazy_import("numpy")
+
+
 
 
 def CSA_S6_2019_combos(alpha_D = 1.2, alpha_E = 1.25, alpha_P = 1.05, alpha_L_1 = 1.7, alpha_L_2 = 1.6, alpha_L_3 = 1.4, alpha_L_8 = 0):
@@ -133,36 +140,92 @@ def factor_loads(D_load: float = 0., D: float = 0.,
                 A_load: float = 0., A: float = 0.,
                 H_load: float = 0., H: float = 0.              
                 ):
-    
+    """
+    Returns the factored load effect: the sum of each load effect ("D_load", ...) times its load factor ("D", ...).
+    The load effects may be scalars or NumPy arrays. For many effects and combos at once, use factor_effects.
+    """
     return D*D_load + E*E_load + P*P_load + L*L_load + K*K_load + W*W_load + V*V_load + S*S_load + EQ*EQ_load + F*F_load + A*A_load + H*H_load
 
-def max_factored_load(loads: dict, load_combos: dict):
-    results = []
-    cmb_list = list(load_combos.keys())
+def stack_case_effects(effects: dict | np.ndarray, load_cases: list[str] | None = None) -> tuple[np.ndarray, list[str]]:
+    """
+    Returns the load effects in 'effects' as one (cases x ...) float array and the load case names of its rows.
 
-    for combo in load_combos.values():
-        results.append(factor_loads(**loads, **combo))
-        
-        
-    max_index = max(range(len(results)), key=results.__getitem__)
-    max_result = results[max_index]
-    max_cmb = cmb_list[max_index]
+    'effects': a mapping of load case name -> scalar or array of load effects (all of the same shape),
+        or an array whose first axis is the load cases named in 'load_cases'
+    """
+    if isinstance(effects, dict):
+        load_cases = list(effects.keys()) if load_cases is None else load_cases
+        return np.array([np.asarray(effects.get(case, 0.0), dtype=float) for case in load_cases]), load_cases
+    stacked = np.asarray(effects, dtype=float)
+    if load_cases is None or len(load_cases) != stacked.shape[0]:
+        raise ValueError("'load_cases' must name each row of an array of load effects.")
+    return stacked, list(load_cases)
 
-    return max_result, max_cmb
-     
-def min_factored_load(loads: dict, load_combos: dict):
-    results = []
-    cmb_list = list(load_combos.keys())
 
-    for combo in load_combos.values():
-        results.append(factor_loads(**loads, **combo))
-        
-        
-    min_index = min(range(len(results)), key=results.__getitem__)
-    min_result = results[min_index]
-    min_cmb = cmb_list[min_index]
+def factor_effects(effects: dict | np.ndarray, load_combos: dict, load_cases: list[str] | None = None) -> np.ndarray:
+    """
+    Returns the factored load effects for every combo in 'load_combos' as a (combos x ...) array, in one
+    product of the combo factor matrix and the stacked load effects (see stack_case_effects)
+    """
+    stacked, load_cases = stack_case_effects(effects, load_cases)
+    return np.tensordot(combo_factor_matrix(load_combos, load_cases), stacked, axes=1)
+
+
+@instrumentation.instrument()
+def factored_extremes(effects: dict | np.ndarray, load_combos: dict, load_cases: list[str] | None = None) -> dict:
+    """
+    Returns the max and min factored load effects over all combos in 'load_combos' for every element of
+    'effects' (see stack_case_effects), and the index of the governing combo of each (the first combo on ties).
+    Combos are applied one at a time, so memory stays proportional to the number of load effects.
+
+    Returns a dict with "combos" (the combo names), "max", "max_idx", "min" and "min_idx"
+    """
+    if not load_combos:
+        raise ValueError("No load combos given.")
+    stacked, load_cases = stack_case_effects(effects, load_cases)
+    factors = combo_factor_matrix(load_combos, load_cases)
+    max_values = min_values = None
+    for combo_idx, combo_factors in enumerate(factors):
+        factored = np.tensordot(combo_factors, stacked, axes=1)
+        if max_values is None:
+            max_values, min_values = factored.copy(), factored.copy()
+            max_idx = np.zeros(factored.shape, dtype=int)
+            min_idx = np.zeros(factored.shape, dtype=int)
+            continue
+        higher = factored > max_values
+        lower = factored < min_values
+        max_values = np.where(higher, factored, max_values)
+        min_values = np.where(lower, factored, min_values)
+        max_idx = np.where(higher, combo_idx, max_idx)
+        min_idx = np.where(lower, combo_idx, min_idx)
+    return {"combos": list(load_combos.keys()), "max": max_values, "max_idx": max_idx, "min": min_values, "min_idx": min_idx}
+
+
+def _case_effects(loads: dict) -> dict:
+    # factor_loads style keys ("D_load") to load case names ("D")
+    return {key[:-len("_load")] if key.endswith("_load") else key: value for key, value in loads.items()}
+
+
+def max_factored_load(loads: dict, load_combos: dict):
+    """
+    Returns the max factored load effect over 'load_combos' and its combo name, where 'loads' holds the
+    load effects keyed as in factor_loads ("D_load", ...). If the load effects are arrays, returns an
+    array of max values and an array of combo names (one per element).
+    """
+    extremes = factored_extremes(_case_effects(loads), load_combos)
+    if np.ndim(extremes["max"]) == 0:
+        return float(extremes["max"]), extremes["combos"][int(extremes["max_idx"])]
+    return extremes["max"], np.array(extremes["combos"])[extremes["max_idx"]]
+
 
-    return min_result, min_cmb   
+def min_factored_load(loads: dict, load_combos: dict):
+    """
+    Returns the min factored load effect over 'load_combos' and its combo name (see max_factored_load)
+    """
+    extremes = factored_extremes(_case_effects(loads), load_combos)
+    if np.ndim(extremes["min"]) == 0:
+        return float(extremes["min"]), extremes["combos"][int(extremes["min_idx"])]
+    return extremes["min"], np.array(extremes["combos"])[extremes["min_idx"]]
 
 # def envelope_max(results_arrays:dict) -> list[list[float], list[float]]:
 #     """
@@ -185,6 +248,43 @@ def min_factored_load(loads: dict, load_combos: dict):
         
 
 
+@instrumentation.instrument()
+def envelope(result_arrays: dict) -> dict:
+    """
+    Returns the max and min envelopes of all the result arrays in 'result_arrays' in one pass,
+    together with the combo that governs at each point and overall.
+
+    'result_arrays': a dict of factored result arrays for an action on a specific framing member,
+        keyed by load combo name. The result array values are a 2xN array where the x-coordinates
+        are in index 0 and the y-coordinates are in index 1
+
+    Returns a dict with:
+        "x": x-coordinates, "combos": the combo names (in the order of the indices below)
+        "max", "min": the envelope curves
+        "max_idx", "min_idx": the index of the governing combo at each point
+        "max_value", "max_loc", "max_combo" (and the same for "min"): the overall extreme value, its location and its combo
+        "governing_value", "governing_loc", "governing_combo": whichever of the overall max/min has the larger magnitude
+    """
+    combo_names = list(result_arrays.keys())
+    x_array = np.asarray(result_arrays[combo_names[0]][0])
+    stacked = np.array([np.asarray(result_arrays[combo][1], dtype=float) for combo in combo_names])
+
+    max_idx = stacked.argmax(axis=0)
+    min_idx = stacked.argmin(axis=0)
+    points = np.arange(stacked.shape[1])
+    max_curve = stacked[max_idx, points]
+    min_curve = stacked[min_idx, points]
+
+    acc = {"x": x_array, "combos": combo_names, "max": max_curve, "min": min_curve, "max_idx": max_idx, "min_idx": min_idx}
+    for key, curve, combo_idx, point in (("max", max_curve, max_idx, max_curve.argmax()), ("min", min_curve, min_idx, min_curve.argmin())):
+        acc.update({f"{key}_value": float(curve[point]), f"{key}_loc": float(x_array[point]), f"{key}_combo": combo_names[combo_idx[point]]})
+
+    governing = "max" if abs(acc["max_value"]) >= abs(acc["min_value"]) else "min"
+    acc.update({"governing_value": acc[f"{governing}_value"], "governing_loc": acc[f"{governing}_loc"], "governing_combo": acc[f"{governing}_combo"]})
+    return acc
+
+
+@instrumentation.instrument()
 def envelope_max(result_arrays: dict) -> list[list[float]]:
     """
     Returns the maximum factored array across all factored result arrays in 'result_arrays'.
@@ -193,39 +293,17 @@ def envelope_max(result_arrays: dict) -> list[list[float]]:
         keyed by load combo name. The result array values are a Nx2 array where the x-coordinates
         are in index 0 and the y-coordinates are in index 1
     """
-    stacked_results = []
-    for result_array in result_arrays.values():
-        stacked_results.append(result_array[1])
-        x_array = result_array[0]
-
-    enveloped = []
-    for idx, _ in enumerate(x_array):
-        result_elems = []
-        for result_array in stacked_results:
-            result_elems.append(result_array[idx])
-        enveloped.append(max(result_elems))
-    return [x_array, enveloped]
+    enveloped = envelope(result_arrays)
+    return [list(enveloped["x"]), list(enveloped["max"])]
 
 
+@instrumentation.instrument()
 def envelope_min(results_arrays:dict) -> list[list[float], list[float]]:
     """
     Outputs the X-coordinates and the min Factored load at each coord, each in their own list
     """
-
-    combo_names = list(results_arrays.keys())
-    x_points = list(results_arrays[combo_names[0]][0])
-    values = []
-    for combo in combo_names:
-        values.append(results_arrays[combo][1])
-    min_array = []
-    for idx, x_point in enumerate(x_points):
-        min_at_idx = []
-        for value in values:
-            min_at_idx.append(value[idx])
-        # print(f"{min_at_idx=}")
-        min_array.append(min(min_at_idx))
-    # print(f"{min_array=}")
-    return [x_points, min_array]
+    enveloped = envelope(results_arrays)
+    return [list(enveloped["x"]), list(enveloped["min"])]
     # S6_combos = CSA_S6_2019_combos()
     # all_cases = {"D": "D_load", "E": "E_load", "P": "P_load", "L": "L_load", "K": "K_load", "W": "W_load", "V": "V_load", "S": "S_load", "EQ": "EQ_load", "F": "F_load", "A": "A_load", "H": "H_load"}
     # combo_names = list(results_arrays.keys())
@@ -244,6 +322,173 @@ def envelope_min(results_arrays:dict) -> list[list[float], list[float]]:
     # return [x_points, acc_min_factored_load]
 
 
+def combo_factor_matrix(load_combos: dict, load_cases: list[str]) -> np.ndarray:
+    """
+    Returns the (combos x cases) array of load factors for 'load_combos' (e.g. from CSA_S6_2019_combos),
+    with rows in the order of 'load_combos' and columns in the order of 'load_cases'.
+    Load cases that do not appear in a combo get a factor of 0.
+    """
+    return np.array([[combo.get(case, 0) for case in load_cases] for combo in load_combos.values()], dtype=float).reshape(len(load_combos), len(load_cases))
+
+
+def plan_load_combos(load_combos: dict, load_cases: list[str], drop_dominated: bool = False) -> dict:
+    """
+    Returns a reduced set of 'load_combos' to analyze for a beam that only has 'load_cases':
+
+    - factors for load cases that are not in 'load_cases' are dropped
+    - combos that are then identical are merged into the first of them (the others become aliases)
+    - if 'drop_dominated', a combo is also dropped when another combo of the same limit state (the name
+        without its number, e.g. "ULS") has a factor at least as large for every load case. This is only
+        safe when every load case effect has the same sign (e.g. all gravity loads on a simple span).
+
+    Returns a dict with:
+        "combos": the reduced combos to analyze, keyed by the name of their first original combo
+        "aliases": every original combo name (in order) mapped to the reduced combo with the same results,
+            or for dominated combos to the reduced combo that dominates them
+        "dominated": the dropped original combo names mapped to a reduced combo that dominates them
+    """
+    factors = combo_factor_matrix(load_combos, load_cases)
+    combos = {}
+    aliases = {}
+    by_factors = {}
+    for combo_name, combo_factors in zip(load_combos, factors):
+        signature = tuple(combo_factors)
+        if signature not in by_factors:
+            by_factors[signature] = combo_name
+            combos.update({combo_name: {case: float(factor) for case, factor in zip(load_cases, combo_factors)}})
+        aliases.update({combo_name: by_factors[signature]})
+
+    dominated = {}
+    if drop_dominated:
+        names = list(combos)
+        reduced = combo_factor_matrix(combos, load_cases)
+        states = [name.rstrip("0123456789") for name in names]
+        for idx, name in enumerate(names):
+            for other_idx, other in enumerate(names):
+                if other_idx != idx and other not in dominated and states[idx] == states[other_idx] and (reduced[other_idx] >= reduced[idx]).all():
+                    dominated.update({name: other})
+                    break
+        for name, other in dominated.items():
+            while other in dominated:  # Dominance is transitive: point to a combo that is kept
+                other = dominated[other]
+            dominated.update({name: other})
+            del combos[name]
+        for combo_name, reduced_name in list(aliases.items()):
+            if reduced_name in dominated:
+                aliases.update({combo_name: dominated[reduced_name]})
+                dominated.update({combo_name: dominated[reduced_name]})
+    return {"combos": combos, "aliases": aliases, "dominated": dominated}
+
+
+def expand_combo_results(results: dict, plan: dict) -> dict:
+    """
+    Returns 'results' (keyed by the reduced combo names of a plan from plan_load_combos) fanned back
+    out to the original combo names, in their original order. Dominated combos get the (conservative)
+    results of the combo that dominates them. The results of aliased combos are shared, not copied.
+    """
+    return {combo_name: results[reduced_name] for combo_name, reduced_name in plan["aliases"].items()}
+
+
+class PlannedCombos(dict):
+    """
+    A dict of the reduced combos of 'plan' (from plan_load_combos) that also looks up every original combo
+    name: combos["ULS6"] returns the reduced combo that "ULS6" is an alias of. Only the reduced combos are
+    iterated, so an analysis still only solves those.
+    """
+    def __init__(self, plan: dict):
+        super().__init__()
+        self.plan = plan
+
+    def __missing__(self, combo_name: str):
+        reduced_name = self.plan["aliases"].get(combo_name, combo_name)
+        if reduced_name == combo_name:
+            raise KeyError(combo_name)
+        return self[reduced_name]
+
+
+@instrumentation.instrument()
+def superpose_case_arrays(case_arrays: dict, load_combos: dict) -> dict:
+    """
+    Returns the factored result arrays for every combo in 'load_combos', keyed by combo name, built
+    by superposition of the unfactored load case results in 'case_arrays'.
+
+    'case_arrays': a dict of result arrays keyed by load case name, in the same format as
+        beams.extract_arrays_all_combos (each value is a 2xN array with the x-coordinates in index 0
+        and the results in index 1), e.g. from a model built with combos_bool=False
+
+    All combos are computed in one matrix product of the (combos x cases) factor matrix and the
+    (cases x points) array of case results, which is exact for a linear analysis.
+    """
+    load_cases = list(case_arrays.keys())
+    x_array = np.asarray(case_arrays[load_cases[0]][0])
+    case_results = np.array([np.asarray(case_arrays[case][1]) for case in load_cases])
+    combo_results = combo_factor_matrix(load_combos, load_cases) @ case_results
+
+    acc = {}
+    for combo_name, combo_result in zip(load_combos.keys(), combo_results):
+        acc.update({combo_name: np.array([x_array, combo_result])})
+    return acc
+
+
+def alpha_factor_permutations(material_type: str = "M2", earth_pressure_type: str = "E1", L_span_type: str = "Normal", L_vehicle_vessle: int = 0) -> dict[str, dict]:
+    """
+    Returns the alpha factors (see get_alpha_factors) for every max/min permutation of the dead load,
+    earth pressure and prestress factors (2^3 = 8), keyed by a label such as "D max, E min, P max"
+    """
+    acc = {}
+    for alpha_D_max_min in (0, 1):
+        for alpha_E_max_min in (0, 1):
+            for alpha_P_max_min in (0, 1):
+                label = ", ".join(f"{case} {('max', 'min')[max_min]}" for case, max_min in (("D", alpha_D_max_min), ("E", alpha_E_max_min), ("P", alpha_P_max_min)))
+                acc.update({label: get_alpha_factors(material_type=material_type, alpha_D_max_min=alpha_D_max_min,
+                                                     earth_pressure_type=earth_pressure_type, alpha_E_max_min=alpha_E_max_min,
+                                                     alpha_P_max_min=alpha_P_max_min, L_span_type=L_span_type, L_vehicle_vessle=L_vehicle_vessle)})
+    return acc
+
+
+def permutation_combos(permutations: dict[str, dict], exclude: tuple[str, ...] = ("unfactored",)) -> tuple[dict, dict[str, tuple[str, str]]]:
+    """
+    Returns the CSA S6 combos for every alpha factor permutation in 'permutations' (e.g. from
+    alpha_factor_permutations) as one set of load combos keyed "{combo} ({permutation})", and a dict
+    mapping each of these keys to its (combo, permutation). Combos in 'exclude' are left out and
+    combos whose factors do not depend on the alpha factors (e.g. SLS1) are only included once.
+    """
+    combos = {}
+    labels = {}
+    seen = set()
+    for permutation, alpha_factors in permutations.items():
+        for combo_name, factors in CSA_S6_2019_combos(**alpha_factors).items():
+            signature = (combo_name, tuple(sorted(factors.items())))
+            if combo_name in exclude or signature in seen:
+                continue
+            seen.add(signature)
+            key = f"{combo_name} ({permutation})"
+            combos.update({key: factors})
+            labels.update({key: (combo_name, permutation)})
+    return combos, labels
+
+
+@instrumentation.instrument()
+def permutation_envelope(case_arrays: dict, permutations: dict[str, dict] | None = None, **kwargs) -> dict:
+    """
+    Returns the envelope (see envelope) over every CSA S6 combo and every alpha factor permutation,
+    computed by superposition of the unfactored load case results in 'case_arrays' in a single
+    (permutations x combos) x cases matrix product.
+
+    'permutations': the alpha factor permutations (default: alpha_factor_permutations(**kwargs))
+
+    In addition to the envelope keys, "max_permutation", "min_permutation" and "governing_permutation"
+    give the governing alpha factor permutation, and "max_combo" etc. are the combined "{combo} ({permutation})" keys.
+    """
+    permutations = permutations or alpha_factor_permutations(**kwargs)
+    combos, labels = permutation_combos(permutations)
+    enveloped = envelope(superpose_case_arrays(case_arrays, combos))
+    for key in ("max", "min", "governing"):
+        enveloped.update({f"{key}_permutation": labels[enveloped[f"{key}_combo"]][1]})
+    enveloped.update({"labels": labels})
+    return enveloped
+
+
 def load_combo_array(results_arrays:dict, target_combo):
     """
     Outputs the Outputs the X-coordinates and the Factored load at each coord for a specivfic load combo, each in their own list
@@ -257,33 +502,18 @@ def load_combo_array(results_arrays:dict, target_combo):
     return [x_points, values]
 
 
+@instrumentation.instrument()
 def get_max_combo(array, **kwargs):
     """
     Determines which load combo will produce the highest absolute shear/moment
-    """
-    max_positive = float('-inf')
-    max_negative = float('inf')
-    max_combo = "There is no max"
-    max_array = []
 
-    load_combos = CSA_S6_2019_combos(**kwargs)  # Assuming this function returns a dictionary of load combos
+    Returns the governing combo name and its array (X-coordinates and factored load at each coord, each in their own list)
+    """
+    load_combos = CSA_S6_2019_combos(**kwargs)
     del load_combos["unfactored"]
-    for load_combo in load_combos.keys():
-        env_x_y = load_combo_array(array, load_combo)
-        max_env = max(env_x_y[1])  # Extracting the maximum value from the envelope result
-        min_env = min(env_x_y[1])  # Extracting the minimum value from the envelope result
-
-        if max_env > max_positive:
-            max_positive = max_env
-            max_combo = load_combo
-            max_array = env_x_y
-
-        if min_env < max_negative:
-            max_negative = min_env
-            max_combo = load_combo
-            max_array = env_x_y
-
-    return max_combo, max_array
+    factored_arrays = {load_combo: array[load_combo] for load_combo in load_combos if load_combo in array}
+    max_combo = envelope(factored_arrays)["governing_combo"]
+    return max_combo, load_combo_array(array, max_combo)
     # S6_combos = CSA_S6_2019_combos()
     # used_combo = S6_combos[target_combo] #{'D': 1.2, 'E': 1.25, 'P': 1.05, 'L': 1.7, 'K': 0, 'W': 0, 'V': 0, 'S': 0, 'EQ': 0, 'F': 0, 'A': 0, 'H': 0}
     # all_cases = {"D": "D_load", "E": "E_load", "P": "P_load", "L": "L_load", "K": "K_load", "W": "W_load", "V": "V_load", "S": "S_load", "EQ": "EQ_load", "F": "F_load", "A": "A_load", "H": "H_load"}
@@ -0,0 +1,191 @@
+import math
+import numpy as np
+import loadfactors
+
+
+class PiecewisePolynomial:
+    """
+    A piecewise polynomial on [breakpoints[0], breakpoints[-1]]. On interval i the value is
+        sum(coefs[i, j] * (x - breakpoints[i])**j)
+
+    Intervals are closed on the left (values are right-continuous at the breakpoints) and the last
+    interval is also closed on the right, matching the sampling convention of the beam diagrams.
+    """
+    __slots__ = ("breakpoints", "coefs")
+
+    def __init__(self, breakpoints: np.ndarray, coefs: np.ndarray):
+        self.breakpoints = np.asarray(breakpoints, dtype=float)
+        self.coefs = np.asarray(coefs, dtype=float)
+
+    @classmethod
+    def from_terms(cls, c: np.ndarray, a: np.ndarray, p: np.ndarray, breakpoints: np.ndarray) -> "PiecewisePolynomial":
+        """
+        Returns the piecewise polynomial of the singularity function terms sum(c * <x - a>^p / p!) with
+        p >= 0, on 'breakpoints' (which must include every 'a' inside the domain). Terms starting at or
+        beyond the last breakpoint are ignored.
+        """
+        breakpoints = np.asarray(breakpoints, dtype=float)
+        c, a, p = np.asarray(c, dtype=float), np.asarray(a, dtype=float), np.asarray(p, dtype=int)
+        span = breakpoints[-1] - breakpoints[0]
+        tol = 1e-10 * max(span, 1.0)
+        keep = (p >= 0) & (a < breakpoints[-1] - tol)
+        c, a, p = c[keep], a[keep], p[keep]
+        degree = int(p.max()) if len(p) else 0
+        n_intervals = len(breakpoints) - 1
+
+        # Each term is added (as a Taylor expansion) to the interval it starts in, then carried to the
+        # following intervals by shifting the local coefficients
+        start_interval = np.clip(np.searchsorted(breakpoints, a + tol, side="right") - 1, 0, n_intervals - 1)
+        powers = np.arange(degree + 1)
+        binomials = np.array([[math.comb(k, j) for k in powers] for j in powers], dtype=float)
+        factorials = np.array([math.factorial(k) for k in powers], dtype=float)
+        new_terms = np.zeros((n_intervals, degree + 1))
+        d = np.maximum(breakpoints[start_interval] - a, 0.0)
+        for j in powers:
+            active = p >= j
+            np.add.at(new_terms[:, j], start_interval[active],
+                      c[active] * binomials[j, p[active]] * d[active] ** (p[active] - j) / factorials[p[active]])
+
+        coefs = np.zeros((n_intervals, degree + 1))
+        current = np.zeros(degree + 1)
+        exponents = powers[None, :] - powers[:, None]
+        for idx in range(n_intervals):
+            if idx:
+                h = breakpoints[idx] - breakpoints[idx - 1]
+                current = (binomials * np.where(exponents >= 0, h ** np.maximum(exponents, 0), 0.0)) @ current
+            current = current + new_terms[idx]
+            coefs[idx] = current
+        return cls(breakpoints, coefs)
+
+    def _locate(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        tol = 1e-10 * max(self.breakpoints[-1] - self.breakpoints[0], 1.0)
+        idx = np.clip(np.searchsorted(self.breakpoints, x + tol, side="right") - 1, 0, len(self.coefs) - 1)
+        return idx, x - self.breakpoints[idx]
+
+    def __call__(self, x):
+        """
+        Returns the value at 'x' (scalar or array)
+        """
+        x = np.asarray(x, dtype=float)
+        idx, local = self._locate(np.atleast_1d(x))
+        values = np.zeros(local.shape)
+        for j in range(self.coefs.shape[1] - 1, -1, -1):
+            values = values * local + self.coefs[idx, j]
+        return values if x.ndim else float(values[0])
+
+    def refine(self, breakpoints: np.ndarray) -> "PiecewisePolynomial":
+        """
+        Returns the same piecewise polynomial on 'breakpoints', which must include this one's breakpoints
+        """
+        breakpoints = np.asarray(breakpoints, dtype=float)
+        idx, shift = self._locate(breakpoints[:-1])
+        degree = self.coefs.shape[1] - 1
+        coefs = np.zeros((len(breakpoints) - 1, degree + 1))
+        for j in range(degree + 1):
+            for k in range(j, degree + 1):
+                coefs[:, j] += self.coefs[idx, k] * math.comb(k, j) * shift ** (k - j)
+        return PiecewisePolynomial(breakpoints, coefs)
+
+    def scaled_sum(self, others: list["PiecewisePolynomial"], factors: np.ndarray) -> "PiecewisePolynomial":
+        """
+        Returns sum(factors[i] * others[i]) for piecewise polynomials sharing this one's breakpoints
+        """
+        degree = max(other.coefs.shape[1] for other in others)
+        coefs = np.zeros((len(self.coefs), degree))
+        for factor, other in zip(factors, others):
+            coefs[:, :other.coefs.shape[1]] += factor * other.coefs
+        return PiecewisePolynomial(self.breakpoints, coefs)
+
+    def critical_points(self) -> np.ndarray:
+        """
+        Returns the x-coordinates strictly inside the intervals where the derivative is zero
+        """
+        h = np.diff(self.breakpoints)
+        degree = self.coefs.shape[1] - 1
+        if degree < 2:
+            return np.zeros(0)
+        deriv = self.coefs[:, 1:] * np.arange(1, degree + 1)[None, :]
+        # Effective degree of each interval's derivative, ignoring negligible leading coefficients
+        scaled = np.abs(deriv) * h[:, None] ** np.arange(degree)[None, :]
+        significant = scaled > 1e-12 * scaled.max(axis=1, keepdims=True)
+        eff_degree = np.where(significant.any(axis=1), degree - 1 - np.argmax(significant[:, ::-1], axis=1), 0)
+
+        acc = []
+        for d in range(1, degree):
+            rows = np.flatnonzero(eff_degree == d)
+            if not len(rows):
+                continue
+            monic = deriv[rows, :d] / deriv[rows, d:d + 1]
+            companion = np.zeros((len(rows), d, d))
+            companion[:, 0, :] = -monic[:, ::-1]
+            companion[:, np.arange(1, d), np.arange(d - 1)] = 1.0
+            roots = np.linalg.eigvals(companion)
+            real = np.abs(roots.imag) <= 1e-9 * np.maximum(np.abs(roots.real), h[rows, None])
+            inside = real & (roots.real > 0) & (roots.real < h[rows, None])
+            acc.append((self.breakpoints[rows, None] + roots.real)[inside])
+        return np.concatenate(acc) if acc else np.zeros(0)
+
+    def extrema(self) -> dict[str, float]:
+        """
+        Returns the exact maximum and minimum values and their locations: "max_value", "max_loc",
+        "min_value" and "min_loc". Both sides of every discontinuity are considered.
+        """
+        h = np.diff(self.breakpoints)
+        left_x = self.breakpoints[:-1]
+        right_values = (self.coefs * h[:, None] ** np.arange(self.coefs.shape[1])[None, :]).sum(axis=1)
+        critical = self.critical_points()
+        x = np.concatenate([left_x, self.breakpoints[1:], critical])
+        values = np.concatenate([self.coefs[:, 0], right_values, self(critical)])
+        max_idx = int(np.argmax(values))
+        min_idx = int(np.argmin(values))
+        return {"max_value": float(values[max_idx]), "max_loc": float(x[max_idx]),
+                "min_value": float(values[min_idx]), "min_loc": float(x[min_idx])}
+
+    def to_array(self, points_per_interval: int = 8) -> np.ndarray:
+        """
+        Returns a compact result array (2xN: x-coordinates in index 0, results in index 1) that is exact
+        at the breakpoints: both sides of each discontinuity are included (the x-coordinate is repeated)
+        and intervals of degree 1 or less are represented by their end points only.
+        """
+        degree = np.array([np.flatnonzero(row)[-1] if row.any() else 0 for row in self.coefs != 0.0])
+        n_points = np.where(degree <= 1, 2, points_per_interval)
+        x_acc = []
+        value_acc = []
+        for idx, n in enumerate(n_points):
+            local = np.linspace(0.0, self.breakpoints[idx + 1] - self.breakpoints[idx], n)
+            x_acc.append(self.breakpoints[idx] + local)
+            value_acc.append(np.polynomial.polynomial.polyval(local, self.coefs[idx]))
+        x_array = np.concatenate(x_acc)
+        values = np.concatenate(value_acc)
+        # Drop repeated points where the diagram is continuous
+        scale = max(float(np.abs(values).max()), 1e-300) if len(values) else 1.0
+        repeated = np.append(False, (np.diff(x_array) == 0) & (np.abs(np.diff(values)) <= 1e-12 * scale))
+        return np.array([x_array[~repeated], values[~repeated]])
+
+
+def superpose_polynomials(case_polys: dict[str, PiecewisePolynomial], load_combos: dict) -> dict[str, PiecewisePolynomial]:
+    """
+    Returns the factored piecewise polynomial of every combo in 'load_combos' (combo name: {load case: factor})
+    from the load case polynomials in 'case_polys', which must share their breakpoints
+    """
+    load_cases = list(case_polys.keys())
+    factors = loadfactors.combo_factor_matrix(load_combos, load_cases)
+    polys = list(case_polys.values())
+    return {combo_name: polys[0].scaled_sum(polys, combo_factors) for combo_name, combo_factors in zip(load_combos, factors)}
+
+
+def polynomial_envelope(combo_polys: dict[str, PiecewisePolynomial]) -> dict:
+    """
+    Returns the exact max/min over all combos in 'combo_polys' with the same scalar keys as loadfactors.envelope:
+    "max_value", "max_loc", "max_combo" (and the same for "min" and "governing")
+    """
+    combo_extrema = {combo_name: poly.extrema() for combo_name, poly in combo_polys.items()}
+    max_combo = max(combo_extrema, key=lambda combo_name: combo_extrema[combo_name]["max_value"])
+    min_combo = min(combo_extrema, key=lambda combo_name: combo_extrema[combo_name]["min_value"])
+    max_value = combo_extrema[max_combo]["max_value"]
+    min_value = combo_extrema[min_combo]["min_value"]
+    return {"max_value": max_value, "max_loc": combo_extrema[max_combo]["max_loc"], "max_combo": max_combo,
+            "min_value": min_value, "min_loc": combo_extrema[min_combo]["min_loc"], "min_combo": min_combo,
+            "governing_value": max_value if abs(max_value) >= abs(min_value) else min_value,
+            "governing_loc": combo_extrema[max_combo]["max_loc"] if abs(max_value) >= abs(min_value) else combo_extrema[min_combo]["min_loc"],
+            "governing_combo": max_combo if abs(max_value) >= abs(min_value) else min_combo}
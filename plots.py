@@ -1,29 +1,84 @@
+from __future__ import annotations
+import io
 import beams
+import beam_parser
+import instrumentation
+import lazy_imports
 import loadfactors
-from matplotlib.figure import Figure
-import matplotlib.patches as patches
-import matplotlib.pyplot as plt
+import result_cache
 import numpy as np
-import plotly.graph_objects as go
 
-def beam_2D_plot_plotly(x_y_array, force_type:str, direction:str, force_units: str, length_units:str) -> go.Figure:
-    coor = x_y_array[0]
-    val = x_y_array[1]
-    max_val = max(val)
-    max_val_idx = val.index(max_val)
-    max_val_loc = coor[max_val_idx]
-    min_val = min(val)
-    min_val_idx = val.index(min_val)
-    min_val_loc = coor[min_val_idx]
+go = lazy_imports.lazy_import("plotly.graph_objects")
+matplotlib_figure = lazy_imports.lazy_import("matplotlib.figure")
+
+
+# Rendered static images keyed by content hash (see beam_visual_image). Matplotlib figures are only ever
+# created as standalone Figure objects (no pyplot), so nothing is registered globally and rendering is
+# safe from worker threads.
+IMAGE_CACHE = result_cache.ResultCache(max_entries=64, cache_dir=None)
+
+MAX_PLOT_POINTS = 2000  # Point budget of each plotly diagram trace
+WEBGL_THRESHOLD = 1000  # Traces with more points than this are drawn with WebGL (go.Scattergl)
+
+
+def downsample_min_max(x, y, max_points: int | None = MAX_PLOT_POINTS) -> np.ndarray:
+    """
+    Returns the sorted indices of the points of (x, y) to plot with at most about 'max_points' points.
+    The points are split into max_points / 2 buckets and the min and max of each bucket are kept
+    (plus the first and last points), so every peak and the ends of every discontinuity jump survive.
+    All the indices are returned if there are already few enough points or 'max_points' is None.
+    """
+    n = len(y)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    n_buckets = max(max_points // 2 - 1, 1)
+    edges = np.unique(np.linspace(1, n - 1, n_buckets + 1).astype(int))
+    inner = np.arange(edges[0], edges[-1])
+    bucket_id = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+    # Sorted by bucket, then value: the first and last point of each bucket are its min and max
+    by_value = inner[np.lexsort((y[inner], bucket_id))]
+    bucket_min = by_value[edges[:-1] - edges[0]]
+    bucket_max = by_value[edges[1:] - edges[0] - 1]
+    return np.unique(np.concatenate([[0, n - 1], bucket_min, bucket_max]))
+
+
+def scatter_trace(x, y, max_points: int | None = MAX_PLOT_POINTS, customdata=None, **kwargs) -> go.Scatter | go.Scattergl:
+    """
+    Returns a plotly line trace of (x, y) downsampled by downsample_min_max (with 'customdata' kept in step),
+    drawn with WebGL (go.Scattergl) if it still has more than WEBGL_THRESHOLD points
+    """
+    idx = downsample_min_max(x, y, max_points)
+    trace_class = go.Scattergl if len(idx) > WEBGL_THRESHOLD else go.Scatter
+    if customdata is not None:
+        kwargs.update(customdata=np.asarray(customdata)[idx])
+    return trace_class(x=np.asarray(x, dtype=float)[idx], y=np.asarray(y, dtype=float)[idx], **kwargs)
+
+
+@instrumentation.instrument()
+def beam_2D_plot_plotly(x_y_array, force_type:str, direction:str, force_units: str, length_units:str, extrema: dict | None = None, max_points: int | None = MAX_PLOT_POINTS) -> go.Figure:
+    """
+    Returns a plotly figure of the result array 'x_y_array' with its max and min annotated.
+    'extrema': exact peaks (e.g. piecewise.PiecewisePolynomial.extrema()) to annotate instead of the sampled ones
+    'max_points': point budget of the diagram trace (see downsample_min_max); None to plot every point
+    """
+    coor = np.asarray(x_y_array[0], dtype=float)
+    val = np.asarray(x_y_array[1], dtype=float)
+    if extrema is None:
+        max_val_idx = int(np.argmax(val))
+        min_val_idx = int(np.argmin(val))
+        extrema = {"max_value": val[max_val_idx], "max_loc": coor[max_val_idx], "min_value": val[min_val_idx], "min_loc": coor[min_val_idx]}
+    max_val, max_val_loc = extrema["max_value"], extrema["max_loc"]
+    min_val, min_val_loc = extrema["min_value"], extrema["min_loc"]
 
     if force_type == "moment":
         force_units = force_units+length_units
 
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(x=coor, y=[0]*len(coor), mode='lines', line=dict(color='black', width=5), name='Beam'))
+    fig.add_trace(go.Scatter(x=[coor[0], coor[-1]], y=[0, 0], mode='lines', line=dict(color='black', width=5), name='Beam'))
 
-    fig.add_trace(go.Scatter(x=coor, y=val, mode='lines', fill='tozeroy', fillcolor='rgba(0,0,255,0.3)', line=dict(color='blue'), name=force_type))
+    fig.add_trace(scatter_trace(coor, val, max_points, mode='lines', fill='tozeroy', fillcolor='rgba(0,0,255,0.3)', line=dict(color='blue'), name=force_type))
 
     fig.update_layout(title=f"{force_type.title()} ({direction}) in beam [{force_units}]",
                       xaxis=dict(title=f"Beam length [{length_units}]"),
@@ -36,20 +91,53 @@ def beam_2D_plot_plotly(x_y_array, force_type:str, direction:str, force_units: s
     return fig
 
 
-def beam_2D_plot_matplotlib(x_y_array, force_type:str, direction:str, force_units: str, length_units:str) -> Figure:
+@instrumentation.instrument()
+def beam_2D_envelope_plotly(envelope: dict, force_type:str, direction:str, force_units: str, length_units:str, max_points: int | None = MAX_PLOT_POINTS) -> go.Figure:
+    """
+    Returns a plotly figure of the max/min envelope in 'envelope' (the output of loadfactors.envelope),
+    with the governing combo shown on hover at every point and marked at the overall max and min.
+    'max_points': point budget of each envelope trace (see downsample_min_max); None to plot every point
+    """
+    coor = envelope["x"]
+    combos = np.array(envelope["combos"])
+
+    if force_type == "moment":
+        force_units = force_units+length_units
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(x=[coor[0], coor[-1]], y=[0, 0], mode='lines', line=dict(color='black', width=5), name='Beam'))
+
+    for key, color, fillcolor in (("max", "blue", "rgba(0,0,255,0.3)"), ("min", "red", "rgba(255,0,0,0.3)")):
+        fig.add_trace(scatter_trace(coor, envelope[key], max_points, customdata=combos[envelope[f"{key}_idx"]], mode='lines', fill='tozeroy', fillcolor=fillcolor,
+                                    line=dict(color=color), hovertemplate="%{y:.0f} (%{customdata})", name=f"{force_type} {key}"))
+
+    fig.update_layout(title=f"{force_type.title()} ({direction}) envelope in beam [{force_units}]",
+                      xaxis=dict(title=f"Beam length [{length_units}]"),
+                      yaxis=dict(title=f"{force_type.title()} [{force_units}]"),
+                      plot_bgcolor='white')
+
+    for key in ("max", "min"):
+        fig.add_annotation(x=envelope[f"{key}_loc"], y=envelope[f"{key}_value"], text=f"{round(envelope[f'{key}_value'])} [{force_units}] ({envelope[f'{key}_combo']})", showarrow=True, arrowhead=1, font=dict(color='black'))
+
+    return fig
+
+
+@instrumentation.instrument()
+def beam_2D_plot_matplotlib(x_y_array, force_type:str, direction:str, force_units: str, length_units:str) -> matplotlib_figure.Figure:
     coor = x_y_array[0]
     val = x_y_array[1]
-    max_val = max(val)
-    max_val_idx = val.index(max_val)
+    max_val_idx = int(np.argmax(val))
+    max_val = val[max_val_idx]
     max_val_loc = coor[max_val_idx]
-    min_val = min(val)
-    min_val_idx = val.index(min_val)
+    min_val_idx = int(np.argmin(val))
+    min_val = val[min_val_idx]
     min_val_loc = coor[min_val_idx]
 
     if force_type == "moment":
         force_units = force_units+length_units
-    fig = Figure()
-    ax = fig.gca()
+    fig = matplotlib_figure.Figure()
+    ax = fig.subplots()
    
     ax.set_title(f"{force_type.title()} ({direction}) in beam [{force_units}]")
     ax.set_xlabel(f"Beam length [{length_units}]")
@@ -59,27 +147,35 @@ def beam_2D_plot_matplotlib(x_y_array, force_type:str, direction:str, force_unit
 
     ax.annotate(f"{round(max_val)} [{force_units}]", (max_val_loc, max_val))
     ax.annotate(f"{round(min_val)} [{force_units}]", (min_val_loc, min_val))
-    fig.savefig("test")
     return fig
 
 
 # beam_2D_plot(env_moment_x_y, "M_test.png", "moment", "Mz", "Nmm", "mm")
 # beam_2D_plot(env_shear_x_y, "V_test.png", "shear", "Fy", "kN", "mm")
 
-def plot_beam_visualization(beam_data):
-    fig, ax = plt.subplots()
+@instrumentation.instrument()
+def plot_beam_visualization(beam_data) -> matplotlib_figure.Figure:
+    fig = matplotlib_figure.Figure()
+    ax = fig.subplots()
     
     # Plot the beam line
     ax.plot([0, beam_data['L']], [0, 0], color='black', linestyle='-', linewidth=2)
     
     # Plot supports
     for pos, support_type in beam_data['Supports'].items():
-        if support_type == 'P':
+        support = beam_parser.parse_support_type(support_type)
+        if support['restraint'] == 'P':
             ax.plot(pos, 0, marker='^', color='blue', markersize=10)
-        elif support_type == 'R':
+        elif support['restraint'] == 'R':
             ax.plot(pos, 0, marker='o', color='green', markersize=10)
-        elif support_type == 'F':  # Plot "F" support as a square
+        elif support['restraint'] == 'F':  # Plot "F" support as a square
             ax.plot(pos, 0, marker='s', color='purple', markersize=10)
+        if any(support[spring] > 0 for spring in beam_parser.SPRING_TYPES):  # Plot springs as a diamond below the beam
+            ax.plot(pos, 0, marker='d', color='saddlebrown', markersize=8, markerfacecolor='none')
+
+    # Plot the Winkler foundation as a band along the beam
+    for start, end, _ in beam_parser.foundation_regions(beam_data['Supports'], beam_data['L']):
+        ax.plot([start, end], [0, 0], color='saddlebrown', linewidth=8, alpha=0.3, solid_capstyle='butt')
     
     # Plot loads
     max_load_magnitude = 0
@@ -117,6 +213,25 @@ def plot_beam_visualization(beam_data):
     
     return fig
 
+@instrumentation.instrument()
+def render_figure(fig: matplotlib_figure.Figure, image_format: str = "png", dpi: int = 100) -> bytes:
+    """
+    Returns the matplotlib figure 'fig' rendered in memory as 'image_format' ("png" or "svg") bytes
+    """
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=image_format, dpi=dpi)
+    return buffer.getvalue()
+
+
+def beam_visual_image(beam_data, image_format: str = "png", dpi: int = 100) -> bytes:
+    """
+    Returns plot_beam_visualization of 'beam_data' rendered as 'image_format' bytes (see render_figure),
+    cached in IMAGE_CACHE by content hash of the beam data
+    """
+    key = result_cache.beam_data_key(beam_data, image="beam_visualization", image_format=image_format, dpi=dpi, name=beam_data["Name"])
+    return IMAGE_CACHE.get_or_compute(key, lambda: render_figure(plot_beam_visualization(beam_data), image_format, dpi))
+
+
 def plot_beam_visualization_plotly(beam_data):
     """
     Not properly implemented yet
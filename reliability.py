@@ -0,0 +1,137 @@
+"""
+Monte Carlo reliability of a beam: the load case magnitudes (D, L, W, ...) and the resistance are sampled from
+their distributions and the probability of failure (|load effect| > resistance) and the reliability index
+beta = -Phi^-1(pf) are estimated at every station and for the member as a whole.
+
+The beam is analyzed once: every trial is a superposition of the unfactored load case result arrays (as from
+beams.extract_arrays_all_combos with combos_bool=False), so a trial costs one (cases x stations) product.
+Trials run in chunks of at most CHUNK_ELEMENTS (trials x stations) values to keep memory bounded, and each chunk
+draws from its own random stream spawned from 'seed', so the results do not depend on the number of workers.
+
+Each random variable is described by a dict: "distribution" ("normal", "lognormal", "gumbel" or "deterministic"),
+"bias" (mean / nominal) and "cov" (coefficient of variation). Load case samples are multipliers of the nominal
+case results. The resistance also has a "nominal" value (scalar or one per station) and is fully correlated
+along the beam (one sample per trial), as for a member of uniform section.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import beams
+import instrumentation
+import lazy_imports
+
+scipy_special = lazy_imports.lazy_import("scipy.special")
+
+
+CHUNK_ELEMENTS = 2_000_000
+EULER_GAMMA = 0.5772156649015329
+DISTRIBUTIONS = ("normal", "lognormal", "gumbel", "deterministic")
+
+# Typical bridge code calibration statistics (bias, coefficient of variation); override them for the structure at hand
+DEFAULT_STATISTICS = {
+    "D": {"distribution": "normal", "bias": 1.05, "cov": 0.10},
+    "E": {"distribution": "normal", "bias": 1.0, "cov": 0.15},
+    "L": {"distribution": "gumbel", "bias": 1.10, "cov": 0.18},
+    "W": {"distribution": "gumbel", "bias": 0.85, "cov": 0.25},
+}
+DEFAULT_RESISTANCE = {"distribution": "lognormal", "bias": 1.12, "cov": 0.10}
+
+
+def sample(variable: dict, size: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Returns 'size' samples of the random 'variable' ({"distribution", "bias", "cov"}, see the module docstring)
+    """
+    distribution = variable.get("distribution", "normal")
+    mean = float(variable.get("bias", 1.0))
+    std = mean * float(variable.get("cov", 0.0))
+    if distribution == "deterministic" or std == 0.0:
+        return np.full(size, mean)
+    if distribution == "normal":
+        return rng.normal(mean, std, size)
+    if distribution == "lognormal":
+        sigma = np.sqrt(np.log1p((std / mean) ** 2))
+        return rng.lognormal(np.log(mean) - sigma**2 / 2, sigma, size)
+    if distribution == "gumbel":
+        scale = std * np.sqrt(6) / np.pi
+        return rng.gumbel(mean - EULER_GAMMA * scale, scale, size)
+    raise ValueError(f"Unknown distribution '{distribution}', expected one of {', '.join(DISTRIBUTIONS)}.")
+
+
+def reliability_index(pf: np.ndarray) -> np.ndarray:
+    """
+    Returns beta = -Phi^-1(pf) (inf where pf is 0)
+    """
+    return -scipy_special.ndtri(np.asarray(pf, dtype=float))
+
+
+def _run_chunk(responses: np.ndarray, nominal_resistance: np.ndarray, statistics: list[dict], resistance: dict,
+               n_trials: int, seed: np.random.SeedSequence) -> tuple[np.ndarray, int, np.ndarray, np.ndarray]:
+    # Returns the failures at each station, the failed trials (any station) and the sums of the effects and their squares
+    rng = np.random.default_rng(seed)
+    multipliers = np.column_stack([sample(variable, n_trials, rng) for variable in statistics]) if statistics else np.zeros((n_trials, 0))
+    effects = multipliers @ responses  # (trials x stations)
+    sums = effects.sum(axis=0)
+    squares = np.einsum("ij,ij->j", effects, effects)
+    np.abs(effects, out=effects)
+    effects /= sample(resistance, n_trials, rng)[:, None]
+    failed = effects > nominal_resistance
+    return failed.sum(axis=0), int(failed.any(axis=1).sum()), sums, squares
+
+
+@instrumentation.instrument()
+def reliability_analysis(case_arrays: dict, resistance: dict, statistics: dict | None = None, n_trials: int = 100_000,
+                         seed: int = 0, workers: int = 1, chunk_elements: int = CHUNK_ELEMENTS) -> dict:
+    """
+    Returns the Monte Carlo reliability of the load effect in 'case_arrays' (unfactored result arrays keyed by
+    load case, all at the same x-coordinates) against 'resistance' ({"nominal", "distribution", "bias", "cov"},
+    missing keys from DEFAULT_RESISTANCE).
+
+    'statistics': random variables keyed by load case (default: DEFAULT_STATISTICS); load cases without one
+        are deterministic at their nominal value.
+    'workers': number of worker processes for the chunks (1 runs them in this process). The chunks and
+        their random streams only depend on 'seed', 'n_trials' and 'chunk_elements', so the results are
+        the same for any number of workers.
+
+    Returns a dict with "x", "pf" and "beta" (at each station), "pf_system" and "beta_system" (probability that
+    the member fails anywhere), "mean" and "std" (of the load effect at each station) and "n_trials".
+    """
+    statistics = DEFAULT_STATISTICS if statistics is None else statistics
+    load_cases = list(case_arrays)
+    x_array = np.asarray(case_arrays[load_cases[0]][0], dtype=float)
+    responses = np.array([np.asarray(case_arrays[case][1], dtype=float) for case in load_cases]).reshape(len(load_cases), len(x_array))
+    variables = [statistics.get(case, {"distribution": "deterministic"}) for case in load_cases]
+    resistance_variable = {**DEFAULT_RESISTANCE, **{key: value for key, value in resistance.items() if key != "nominal"}}
+    nominal_resistance = np.broadcast_to(np.asarray(resistance["nominal"], dtype=float), x_array.shape)
+
+    chunk_size = max(1, chunk_elements // max(len(x_array), 1))
+    sizes = [min(chunk_size, n_trials - start) for start in range(0, n_trials, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(responses, nominal_resistance, variables, resistance_variable, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(args))) as executor:
+            chunks = list(executor.map(_run_chunk, *zip(*args)))
+    else:
+        chunks = [_run_chunk(*chunk_args) for chunk_args in args]
+
+    failures = np.sum([chunk[0] for chunk in chunks], axis=0)
+    system_failures = sum(chunk[1] for chunk in chunks)
+    mean = np.sum([chunk[2] for chunk in chunks], axis=0) / n_trials
+    variance = np.sum([chunk[3] for chunk in chunks], axis=0) / n_trials - mean**2
+    pf = failures / n_trials
+    pf_system = system_failures / n_trials
+    return {"x": x_array, "pf": pf, "beta": reliability_index(pf), "pf_system": pf_system, "beta_system": float(reliability_index(pf_system)),
+            "mean": mean, "std": np.sqrt(np.maximum(variance, 0.0)), "n_trials": n_trials}
+
+
+def beam_reliability(beam_data: dict, resistance: dict, result_type: str = "moment", direction: str = "Mz", n_points: int = 200,
+                     backend: str = "auto", **kwargs) -> dict:
+    """
+    Analyzes 'beam_data' once (one result array per load case) and returns reliability_analysis of its
+    'result_type' in 'direction' against 'resistance'. 'kwargs' are passed to reliability_analysis.
+    """
+    model = beams.build_beam(beam_data, False, backend)
+    model.analyze(check_statics=False)
+    case_arrays = beams.extract_arrays_all_combos(model, result_type, direction, n_points)
+    return reliability_analysis(case_arrays, resistance, **kwargs)
+
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+# Per user (never the working directory): cached results are pickles, and loading a pickle can run arbitrary code
+USER_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "beam_results")
+DEFAULT_CACHE_DIR = os.environ.get("BEAM_RESULT_CACHE_DIR") or USER_CACHE_DIR
+DEFAULT_MAX_DISK_ENTRIES = int(os.environ.get("BEAM_RESULT_CACHE_MAX_FILES", "2048"))
+# Part of every key: bump it whenever the solvers or the shape of cached results change, so entries
+# written by older code are never served (they are left on disk until evicted)
+CACHE_VERSION = 2
+
+
+def canonical_beam_data(beam_data: dict) -> dict:
+    """
+    Returns a JSON-serializable copy of 'beam_data' where equivalent beams have identical content:
+    numbers are floats, supports are a list of [location, type] sorted by location and the
+    load dicts have their keys sorted (load order is kept). The free-text "Name" is left out, so
+    identical beams share entries whatever they are called.
+    """
+    acc = {}
+    for key, value in beam_data.items():
+        if key == "Name":
+            continue
+        if key == "Supports":
+            acc.update({key: sorted([float(loc), str(sup_type)] for loc, sup_type in value.items())})
+        elif key == "Loads":
+            acc.update({key: [{k: (float(v) if isinstance(v, (int, float)) else str(v)) for k, v in sorted(load.items())} for load in value]})
+        elif isinstance(value, (int, float)):
+            acc.update({key: float(value)})
+        else:
+            acc.update({key: str(value)})
+    return acc
+
+
+def beam_data_key(beam_data: dict, **params) -> str:
+    """
+    Returns a content hash (hex str) of 'beam_data' plus any other parameters the cached value
+    depends on (e.g. alpha factors, backend, n_points), passed as keyword arguments.
+    The beam name is not part of the key (pass it as a parameter if the cached value shows it).
+    """
+    payload = {"version": CACHE_VERSION, "beam_data": canonical_beam_data(beam_data), "params": {k: params[k] for k in sorted(params)}}
+    text = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    A thread-safe cache of solved beam results keyed by content hash.
+
+    Entries are held in memory (least recently used entries are evicted beyond 'max_entries')
+    and, if 'cache_dir' is not None, pickled to disk so they survive process restarts. The disk
+    cache holds at most 'max_disk_entries' files: beyond that the least recently used files
+    (oldest modification time; disk hits refresh it) are deleted. 'cache_dir' is created private to
+    the current user, and a directory that other users can write to is not used (memory only),
+    since they could plant pickles in it.
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 128, cache_dir: str | None = DEFAULT_CACHE_DIR, max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._disk_entries = None  # Number of files on disk, counted on the first put
+        self._private = None  # Whether cache_dir is only writable by the current user, checked on first use
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _use_disk(self) -> bool:
+        # Creates cache_dir (owner only) if needed and checks that no other user can write to it
+        if self.cache_dir is None:
+            return False
+        if self._private is None:
+            try:
+                os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+                info = os.stat(self.cache_dir)
+                self._private = not hasattr(os, "getuid") or (info.st_uid == os.getuid() and not info.st_mode & 0o022)
+            except OSError:
+                self._private = False
+        return self._private
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def _remember(self, key: str, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str, default=None):
+        """
+        Returns the cached value for 'key' (from memory, then disk) or 'default' if there is none
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        value = default
+        found = False
+        if self._use_disk():
+            try:
+                with open(self._path(key), "rb") as cache_file:
+                    value = pickle.load(cache_file)
+                found = True
+                os.utime(self._path(key))
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+
+        with self._lock:
+            if found:
+                self.hits += 1
+                self.disk_hits += 1
+                self._remember(key, value)
+            else:
+                self.misses += 1
+        return value
+
+    def put(self, key: str, value):
+        """
+        Stores 'value' under 'key' in memory and on disk
+        """
+        with self._lock:
+            self._remember(key, value)
+        if not self._use_disk():
+            return
+        path = self._path(key)
+        try:
+            existed = os.path.exists(path)
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(path), delete=False) as tmp_file:
+                pickle.dump(value, tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file.name, path)
+        except OSError:
+            return  # The disk cache is best effort; the value is still cached in memory
+        with self._lock:
+            if self._disk_entries is None:
+                self._disk_entries = len(self._disk_files())
+            elif not existed:
+                self._disk_entries += 1
+            if self._disk_entries > self.max_disk_entries:
+                self._evict_disk()
+
+    def _disk_files(self) -> list[str]:
+        acc = []
+        for root, _, files in os.walk(self.cache_dir):
+            acc.extend(os.path.join(root, file_name) for file_name in files if file_name.endswith(".pkl"))
+        return acc
+
+    def _evict_disk(self):
+        # Deletes the oldest files down to 90% of max_disk_entries, so eviction does not run on every put
+        files = []
+        for path in self._disk_files():
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        files.sort()
+        excess = len(files) - int(0.9 * self.max_disk_entries)
+        for _, path in files[:max(excess, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._disk_entries = len(files) - max(excess, 0)
+
+    def get_or_compute(self, key: str, func):
+        """
+        Returns the cached value for 'key', calling func() and caching its result on a miss
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = func()
+            self.put(key, value)
+        return value
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the hit/miss counters and the number of entries held in memory
+        """
+        with self._lock:
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def clear(self, disk: bool = False):
+        """
+        Empties the in-memory cache (and the disk cache if 'disk') and resets the counters
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+            if disk and self.cache_dir is not None and os.path.isdir(self.cache_dir):
+                for path in self._disk_files():
+                    os.remove(path)
+                self._disk_entries = 0
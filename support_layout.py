@@ -0,0 +1,174 @@
+"""
+Support layout optimization: moves the supports of a beam within given bounds to minimize the peak factored
+moment, shear or service deflection over the CSA S6 combos.
+
+Every layout is solved with the native 2D engine (one banded factorization, one result per load case) and
+the combos are superposed from the case results, so an evaluation takes a few milliseconds. The search is
+in two stages: first coordinate-wise, where a grid over the bounds of each movable support in turn brackets its
+best location and a golden-section search refines it; then all movable supports together by a bounded Nelder-Mead
+search, since the peak is the max of several effects (e.g. span and overhang moments) and at the optimum moving any
+one support alone makes it worse. Both stop when the peak stops improving or the time budget runs out.
+Peaks are taken on a uniform grid plus both sides of every support and load discontinuity, so peaks over the
+(moving) supports are exact.
+"""
+import math
+import time
+
+import numpy as np
+
+import beams
+import lazy_imports
+import loadfactors
+
+scipy_optimize = lazy_imports.lazy_import("scipy.optimize")
+
+
+RESULT_DIRECTIONS = {"moment": "Mz", "shear": "Fy", "deflection": "dy"}
+GOLDEN = (math.sqrt(5) - 1) / 2
+
+
+def layout_combos(result_type: str, **kwargs) -> dict:
+    """
+    Returns the CSA S6 combos (alpha factors in 'kwargs') that govern 'result_type': the ULS combos for
+    "moment" and "shear", the SLS combos for "deflection"
+    """
+    prefix = "SLS" if result_type == "deflection" else "ULS"
+    return {name: factors for name, factors in loadfactors.CSA_S6_2019_combos(**kwargs).items() if name.startswith(prefix)}
+
+
+def peak_effect(beam_data: dict, result_type: str = "moment", n_points: int = 200, load_combos: dict | None = None) -> float:
+    """
+    Returns the peak absolute factored 'result_type' ("moment", "shear" or "deflection") of 'beam_data' over
+    'load_combos' (default: layout_combos), from one 2D analysis with one result per load case. Values are taken at
+    'n_points' stations plus both sides of every discontinuity, so peaks within a span are sampled (error ~ 1 / n_points^2).
+    """
+    load_combos = layout_combos(result_type) if load_combos is None else load_combos
+    model = beams.build_beam(beam_data, False, "2d")
+    model.analyze(check_statics=False)
+    discontinuities = beams.get_discontinuities(beam_data)
+    L = float(beam_data["L"])
+    x = np.unique(np.concatenate([np.linspace(0, L, n_points), discontinuities, np.clip(discontinuities - 1e-6 * L, 0.0, L)]))
+    load_cases = list(model.LoadCombos)
+    if not load_cases:
+        return 0.0
+    responses = np.array([beams.evaluate_result(model, result_type, RESULT_DIRECTIONS[result_type], x, case) for case in load_cases])
+    return float(np.abs(loadfactors.combo_factor_matrix(load_combos, load_cases) @ responses).max(initial=0.0))
+
+
+def _golden_section(func, lo: float, hi: float, tol: float, f_best: float, x_best: float) -> tuple[float, float]:
+    # Minimizes func on [lo, hi] (assumed unimodal there) and returns the best (x, f) seen, including (x_best, f_best)
+    x1, x2 = hi - GOLDEN * (hi - lo), lo + GOLDEN * (hi - lo)
+    f1, f2 = func(x1), func(x2)
+    while hi - lo > tol:
+        if f1 <= f2:
+            hi, x2, f2 = x2, x1, f1
+            x1 = hi - GOLDEN * (hi - lo)
+            f1 = func(x1)
+        else:
+            lo, x1, f1 = x1, x2, f2
+            x2 = lo + GOLDEN * (hi - lo)
+            f2 = func(x2)
+    return min((f_best, x_best), (f1, x1), (f2, x2))[::-1]
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def optimize_supports(beam_data: dict, bounds: dict[float, tuple[float, float]], result_type: str = "moment", time_budget: float = 2.0,
+                      n_points: int = 200, grid: int = 9, tol: float | None = None, max_sweeps: int = 10, **kwargs) -> dict:
+    """
+    Returns the support layout of 'beam_data' that minimizes the peak factored 'result_type' ("moment", "shear"
+    or "deflection", see peak_effect) when the supports in 'bounds' ({current location: (min, max)}) are moved
+    within their bounds. The other supports stay put and supports keep their types; layouts where two supports
+    meet are rejected. 'kwargs' are the alpha factors passed to loadfactors.CSA_S6_2019_combos.
+
+    Each coordinate sweep brackets every movable support on a 'grid' of locations and refines it by golden-section
+    search to 'tol' (default L / 10^4), until a sweep improves the peak by less than 10^-6 (relative) or after
+    'max_sweeps'. A Nelder-Mead search over all movable supports then polishes the layout to 'tol'. Stops early
+    when 'time_budget' seconds have passed (the best layout found so far is returned, with "converged" False).
+    "converged" is only True if a sweep met the 10^-6 test and the Nelder-Mead search (if any) succeeded.
+
+    Returns a dict with "supports" (the optimal supports dict), "locations" (the moved supports' locations, in
+    the order of 'bounds'), "objective" (its peak), "initial_objective", "evaluations", "seconds", "converged"
+    and "history": one {"evaluation", "seconds", "objective", "locations"} entry per improvement of the best layout.
+    """
+    if result_type not in RESULT_DIRECTIONS:
+        raise ValueError(f"Unknown result type '{result_type}', expected one of {', '.join(RESULT_DIRECTIONS)}.")
+    L = float(beam_data["L"])
+    supports = {float(loc): sup for loc, sup in beam_data["Supports"].items()}
+    movable = [float(loc) for loc in bounds]
+    for loc, (lo, hi) in zip(movable, bounds.values()):
+        if loc not in supports:
+            raise ValueError(f"There is no support at {loc:g} to move.")
+        if not 0.0 <= lo <= hi <= L:
+            raise ValueError(f"The bounds of the support at {loc:g} must satisfy 0 <= min <= max <= {L:g}.")
+    fixed = {loc: sup for loc, sup in supports.items() if loc not in movable}
+    limits = [tuple(map(float, bounds[key])) for key in bounds]
+    load_combos = layout_combos(result_type, **kwargs)
+    tol = 1e-4 * L if tol is None else tol
+    min_gap = 1e-3 * L
+
+    def layout(locations) -> dict:
+        return {**fixed, **{location: supports[loc] for loc, location in zip(movable, locations)}}
+
+    start = time.perf_counter()
+    cache = {}
+    best = {"objective": math.inf, "locations": None}
+    history = []
+
+    def evaluate(locations: tuple) -> float:
+        key = tuple(round(location / tol) for location in locations)
+        if key in cache:
+            return cache[key]
+        if time.perf_counter() - start > time_budget and best["locations"] is not None:
+            raise _BudgetExceeded
+        all_locations = np.sort(np.concatenate([list(fixed), locations]))
+        if np.any(np.diff(all_locations) < min_gap):
+            value = math.inf
+        else:
+            value = peak_effect({**beam_data, "Supports": layout(locations)}, result_type, n_points, load_combos)
+        cache[key] = value
+        if value < best["objective"]:
+            best.update({"objective": value, "locations": tuple(locations)})
+            history.append({"evaluation": len(cache), "seconds": time.perf_counter() - start, "objective": value, "locations": tuple(locations)})
+        return value
+
+    locations = list(movable)
+    initial_objective = evaluate(tuple(locations))
+    converged = False
+    try:
+        swept = False  # Whether a sweep met the improvement tolerance (running out of sweeps is not convergence)
+        for _ in range(max_sweeps):
+            sweep_start = best["objective"]
+            for idx, (lo, hi) in enumerate(limits):
+                def along(location, idx=idx):
+                    return evaluate(tuple(locations[:idx]) + (location,) + tuple(locations[idx + 1:]))
+                candidates = np.linspace(lo, hi, grid) if hi > lo else np.array([lo])
+                values = [along(location) for location in candidates]
+                pick = int(np.argmin(values))
+                x_best, f_best = candidates[pick], values[pick]
+                if along(locations[idx]) < f_best:
+                    x_best, f_best = locations[idx], along(locations[idx])
+                if math.isfinite(f_best) and hi > lo:
+                    step = (hi - lo) / max(grid - 1, 1)
+                    x_best, f_best = _golden_section(along, max(lo, x_best - step), min(hi, x_best + step), tol, f_best, x_best)
+                locations[idx] = float(x_best)
+            if sweep_start - best["objective"] <= 1e-6 * abs(sweep_start):
+                swept = True
+                break
+        polished = True
+        if len(movable) > 1:
+            step = max(max(hi - lo for lo, hi in limits) / max(grid - 1, 1), tol)
+            x0 = np.array(best["locations"])
+            simplex = np.array([x0] + [np.clip(x0 + step * direction, [lo for lo, _ in limits], [hi for _, hi in limits]) for direction in np.eye(len(x0))])
+            polish = scipy_optimize.minimize(lambda x: evaluate(tuple(float(value) for value in x)), x0, method="Nelder-Mead", bounds=limits,
+                                             options={"initial_simplex": simplex, "xatol": tol, "fatol": 1e-6 * abs(best["objective"]), "maxfev": 1000 * len(x0)})
+            polished = bool(polish.success)
+        converged = swept and polished
+    except _BudgetExceeded:
+        pass
+
+    return {"supports": layout(best["locations"]), "locations": list(best["locations"]), "objective": best["objective"],
+            "initial_objective": initial_objective, "evaluations": len(cache), "seconds": time.perf_counter() - start,
+            "converged": converged, "history": history}
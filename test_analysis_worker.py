@@ -0,0 +1,80 @@
+import analysis_worker as analysis_worker
+import app_functions as app_functions
+import loadfactors as loadfactors
+import result_cache as result_cache
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_debounce_coalesces_inputs():
+    calls = []
+    worker = analysis_worker.AnalysisWorker(ThreadPoolExecutor(max_workers=1), debounce=0.05)
+    for value in range(5):
+        worker.submit(f"inputs {value}", calls.append, value)
+    assert worker.submit("inputs 4", calls.append, 4) == 5  # Same inputs: no new generation
+    assert worker.wait(timeout=5)
+    assert calls == [4]
+    assert worker.discarded == 4
+
+
+def test_stale_result_discarded():
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_analysis(value):
+        started.set()
+        release.wait(timeout=5)
+        return value
+
+    worker = analysis_worker.AnalysisWorker(ThreadPoolExecutor(max_workers=2), debounce=0.0)
+    worker.submit("a", slow_analysis, "a")
+    assert started.wait(timeout=5)
+    worker.submit("b", lambda: "b")
+    assert worker.wait(timeout=5)
+    assert worker.result == "b"
+    release.set()
+    worker.executor.shutdown(wait=True)
+    assert worker.result == "b"  # The superseded run finished last but was not kept
+    assert worker.discarded == 1
+
+
+def test_error_keeps_last_good_result():
+    def fail():
+        raise ValueError("unstable")
+
+    worker = analysis_worker.AnalysisWorker(ThreadPoolExecutor(max_workers=1), debounce=0.0)
+    worker.submit("a", lambda: "a")
+    worker.wait(timeout=5)
+    worker.submit("b", fail)
+    assert worker.wait(timeout=5)
+    assert not worker.pending
+    assert isinstance(worker.error, ValueError)
+    assert worker.result == "a"
+
+
+def test_get_app_results(monkeypatch, tmp_path):
+    monkeypatch.setattr(app_functions, "RESULT_CACHE", result_cache.ResultCache(cache_dir=str(tmp_path)))  # Keep pickles out of the repo and never hit stale ones
+    attributes = ["Beam", 1000.0, 1, 1, 1, 1, 1, 1, 1]
+    supports = {0.0: "P", 1000.0: "R"}
+    loads = [{"Type": "Point", "Direction": "Fy", "Magnitude": -100, "Location": 500.0, "Case": "L"}]
+    worker = analysis_worker.AnalysisWorker(ThreadPoolExecutor(max_workers=1), debounce=0.0)
+    key = app_functions.get_app_results_key(attributes, supports, loads, target_combo="max")
+    worker.submit(key, app_functions.get_app_results, attributes, supports, loads, target_combo="max")
+    assert worker.wait(timeout=30)
+    assert worker.error is None
+    assert worker.result["moment_plot"][1] == "ULS1"
+
+
+def test_get_moment_plots_exact_peaks(monkeypatch, tmp_path):
+    monkeypatch.setattr(app_functions, "RESULT_CACHE", result_cache.ResultCache(cache_dir=str(tmp_path)))
+    attributes = ["Beam", 1000.0, 1, 1, 1, 1, 1, 1, 1]
+    supports = {0.0: "P", 1000.0: "R"}
+    loads = [{"Type": "Point", "Direction": "Fy", "Magnitude": -100, "Location": 400.0, "Case": "L"}]
+    # Stations at 0, 500 and 1000 only: the sampled peak would be 100 * 400 * 500 / 1000
+    case_results = app_functions.get_case_results(attributes, supports, loads, n_points=3)
+    plot, _ = app_functions.get_moment_plots(attributes, supports, loads, target_combo="unfactored", case_results=case_results)
+    assert max(abs(annotation.y) for annotation in plot.layout.annotations) == pytest.approx(100 * 400 * 600 / 1000)
+    plot, _ = app_functions.get_moment_plots(attributes, supports, loads, target_combo="ULS1")  # Analyzed here, at 500 points
+    factor = loadfactors.CSA_S6_2019_combos()["ULS1"]["L"]
+    assert max(abs(annotation.y) for annotation in plot.layout.annotations) == pytest.approx(factor * 100 * 400 * 600 / 1000)
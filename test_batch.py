@@ -0,0 +1,89 @@
+import batch as batch
+import json
+import math
+import multiprocessing
+import os
+import pytest
+
+
+BEAM_FILE = """Girder {idx}
+20e3,200e3,6480e6,390e6,43900,11900e3,0.3
+0.0:P,17e3:R
+DIST:Fy,-3.6,-3.6,0.0,20e3,case:D
+POINT:Fy,-145e3,8e3,case:L
+POINT:Fy,-145e3,{location},case:L
+"""
+
+
+def write_beam_files(directory, n_files: int) -> list[str]:
+    acc = []
+    for idx in range(n_files):
+        path = directory / f"beam_{idx}.txt"
+        path.write_text(BEAM_FILE.format(idx=idx, location=10e3 + 500 * idx))
+        acc.append(str(path))
+    return acc
+
+
+def test_iter_beam_files(tmp_path):
+    file_names = write_beam_files(tmp_path, 3)
+    (tmp_path / "notes.md").write_text("not a beam")
+    assert batch.iter_beam_files([str(tmp_path)]) == file_names
+    assert batch.iter_beam_files([str(tmp_path / "beam_[01].txt"), file_names[0]]) == file_names[:2]
+
+
+def test_analyze_beam_file(tmp_path):
+    file_name = write_beam_files(tmp_path, 1)[0]
+    summaries = batch.analyze_beam_file(file_name, backend="2d", n_points=101)
+    assert len(summaries) == 1
+    summary = summaries[0]
+    assert summary["status"] == "ok"
+    assert summary["name"] == "Girder 0"
+    assert summary["moment"]["governing_combo"] == "ULS1"
+    assert math.isclose(summary["moment"]["min_loc"], 8e3)
+    assert summary["moment"]["max_combo"] == "ULS9"  # Cantilever hogging from dead load only
+    assert math.isclose(summary["moment"]["max_loc"], 17e3)
+
+    (tmp_path / "multi.txt").write_text(BEAM_FILE.format(idx=1, location=12e3) + "\nBad beam\n20e3\n0.0:Q\n\n" + BEAM_FILE.format(idx=2, location=13e3))
+    summaries = batch.analyze_beam_file(str(tmp_path / "multi.txt"), backend="2d", n_points=101)
+    assert [summary["status"] for summary in summaries] == ["ok", "error", "ok"]
+    assert [summary["line"] for summary in summaries] == [1, 8, 12]
+    assert summaries[1]["error"].startswith("BeamParseError")
+    assert ":10:5:" in summaries[1]["error"]
+
+
+def test_main(tmp_path):
+    write_beam_files(tmp_path, 5)
+    (tmp_path / "bad.txt").write_text("Bad beam\n20e3\n0.0:Q\n")
+    output = tmp_path / "results.jsonl"
+    exit_code = batch.main([str(tmp_path), "-o", str(output), "-j", "2", "--max-in-flight", "2", "--quiet"])
+    summaries = [json.loads(line) for line in output.read_text().splitlines()]
+    assert exit_code == 1
+    assert len(summaries) == 6
+    assert sorted(summary["status"] for summary in summaries) == ["error"] + ["ok"] * 5
+
+    output = tmp_path / "results.csv"
+    assert batch.main([str(tmp_path / "beam_*.txt"), "-o", str(output), "-j", "1", "--backend", "2d", "--quiet"]) == 0
+    lines = output.read_text().splitlines()
+    assert lines[0].split(",") == batch.CSV_FIELDS
+    assert len(lines) == 6
+
+
+def _crash_on_bad_file(file_name: str) -> list[dict]:
+    if file_name.endswith("crash.txt"):
+        os._exit(1)  # Kills the worker process, which breaks the pool
+    return batch.analyze_beam_file(file_name, **batch._worker_settings)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="the patched worker function is only inherited by forked workers")
+def test_run_batch_survives_a_crashed_worker(tmp_path, monkeypatch):
+    file_names = write_beam_files(tmp_path, 2)
+    (tmp_path / "crash.txt").write_text(BEAM_FILE.format(idx=9, location=12e3))
+    monkeypatch.setattr(batch, "_analyze_in_worker", _crash_on_bad_file)  # Inherited by the forked workers
+    output = tmp_path / "results.jsonl"
+    writer = batch.ResultWriter(str(output))
+    counts = batch.run_batch([file_names[0], str(tmp_path / "crash.txt"), file_names[1]], writer, workers=1, max_in_flight=1, progress=False, backend="2d", n_points=51)
+    writer.close()
+    summaries = [json.loads(line) for line in output.read_text().splitlines()]
+    assert counts == {"ok": 2, "error": 1}
+    assert [summary["status"] for summary in summaries] == ["ok", "error", "ok"]
+    assert summaries[1]["file"].endswith("crash.txt") and summaries[1]["error"].startswith("BrokenProcessPool")
@@ -0,0 +1,182 @@
+import beams as beams
+import beam2d as beam2d
+import functools
+import pytest
+import math
+
+
+@pytest.fixture
+def get_beam_data(make_beam_data):
+    # A 20 long beam with a unit section
+    return functools.partial(make_beam_data, L=20.0, Name='Test beam', E=1.0, Iz=1.0, A=1.0)
+
+
+def test_get_node_coords():
+    assert list(beam2d.get_node_coords([1000.0, 4000.0, 8000.0], 10000)) == [0.0, 1000.0, 4000.0, 8000.0, 10000.0]
+    assert list(beam2d.get_node_coords([0, 100], 100)) == [0.0, 100.0]
+
+
+def test_two_span_udl(get_beam_data):
+    # Two equal spans with a UDL: R_mid = 1.25wL, M_mid = -wL^2/8 (hogging)
+    beam_data = get_beam_data({0.0: 'P', 10.0: 'R', 20.0: 'R'},
+                              [{'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -1.0, 'End Magnitude': -1.0,
+                                'Start Location': 0.0, 'End Location': 20.0, 'Case': 'D'}])
+    model = beams.build_beam(beam_data, False, "2d")
+    model.analyze()
+    member = model.Members['Test beam']
+    assert math.isclose(model.reactions['D'][10.0][1], 12.5)
+    assert math.isclose(member.moment('Mz', 10.0, 'D'), 12.5)
+    assert math.isclose(member.shear('Fy', 0.0, 'D'), 3.75)
+    assert math.isclose(member.deflection('dy', 10.0, 'D'), 0.0, abs_tol=1e-9)
+
+
+def test_varying_load_equilibrium(get_beam_data):
+    beam_data = get_beam_data({3.0: 'P', 10.0: 'R', 20.0: 'R'},
+                              [{'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -1.0, 'End Magnitude': -2.0,
+                                'Start Location': 2.0, 'End Location': 17.0, 'Case': 'D'}])
+    model = beams.build_beam(beam_data, False, "2d")
+    model.analyze()
+    reactions = model.reactions['D']
+    assert math.isclose(sum(rxn[1] for rxn in reactions.values()), 22.5)
+    assert math.isclose(sum(rxn[1] * loc + rxn[2] for loc, rxn in reactions.items()), 232.5)
+
+
+def test_extract_arrays_all_combos_matches_pynite(get_beam_data):
+    beam_data = get_beam_data({0.0: 'P', 7.5: 'R', 14.0: 'F'},
+                              [{'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -3.0, 'End Magnitude': -3.0,
+                                'Start Location': 2.0, 'End Location': 18.0, 'Case': 'D'},
+                               {'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -10.0, 'Location': 20.0, 'Case': 'L'},
+                               {'Type': 'Point', 'Direction': 'Mz', 'Magnitude': 4.0, 'Location': 5.0, 'Case': 'L'},
+                               {'Type': 'Point', 'Direction': 'Fx', 'Magnitude': 6.0, 'Location': 9.0, 'Case': 'W'}])
+    pynite_model = beams.build_beam(beam_data, True)
+    pynite_model.analyze(check_statics=False)
+    model_2d = beams.build_beam(beam_data, True, "2d")
+    model_2d.analyze()
+
+    for result_type, direction in [("shear", "Fy"), ("moment", "Mz"), ("axial", None), ("deflection", "dy"), ("deflection", "dx")]:
+        pynite_arrays = beams.extract_arrays_all_combos(pynite_model, result_type, direction, 41)
+        arrays_2d = beams.extract_arrays_all_combos(model_2d, result_type, direction, 41)
+        assert list(arrays_2d.keys()) == list(pynite_arrays.keys())
+        for combo in pynite_arrays:
+            for expected, actual in zip(pynite_arrays[combo][1], arrays_2d[combo][1]):
+                assert math.isclose(actual, expected, rel_tol=1e-6, abs_tol=1e-6)
+
+
+def test_unstable_beam(get_beam_data):
+    beam_data = get_beam_data({0.0: 'P'},
+                              [{'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -10.0, 'Location': 20.0, 'Case': 'L'}])
+    model = beams.build_beam(beam_data, False, "2d")
+    with pytest.raises(ValueError):
+        model.analyze()
+
+
+def test_unsupported_direction(get_beam_data):
+    beam_data = get_beam_data({0.0: 'F'},
+                              [{'Type': 'Point', 'Direction': 'Fz', 'Magnitude': -10.0, 'Location': 20.0, 'Case': 'L'}])
+    model = beams.build_beam(beam_data, False, "2d")
+    with pytest.raises(ValueError):
+        model.analyze()
+
+
+def test_is_statically_determinate():
+    assert beam2d.is_statically_determinate({0.0: 'F'})
+    assert beam2d.is_statically_determinate({2.0: 'R', 15.0: 'R'})
+    assert not beam2d.is_statically_determinate({2.0: 'R', 15.0: 'R'}, has_axial_load=True)
+    assert beam2d.is_statically_determinate({2.0: 'P', 15.0: 'R', 20.0: 'Free'}, has_axial_load=True)
+    assert not beam2d.is_statically_determinate({0.0: 'P', 10.0: 'R', 20.0: 'R'})
+    assert not beam2d.is_statically_determinate({0.0: 'F', 20.0: 'R'})
+
+
+def test_determinate_model_matches_stiffness_solution(get_beam_data):
+    loads = [{'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -1.0, 'End Magnitude': -3.0,
+              'Start Location': 1.0, 'End Location': 18.0, 'Case': 'D'},
+             {'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -10.0, 'Location': 20.0, 'Case': 'L'},
+             {'Type': 'Point', 'Direction': 'Mz', 'Magnitude': 4.0, 'Location': 5.0, 'Case': 'L'},
+             {'Type': 'Point', 'Direction': 'Fx', 'Magnitude': 6.0, 'Location': 9.0, 'Case': 'W'}]
+    for supports in ({3.0: 'P', 15.0: 'R'}, {4.0: 'R', 12.0: 'P'}, {0.0: 'F'}, {20.0: 'F'}, {8.0: 'F'}):
+        beam_data = get_beam_data(supports, loads)
+        model = beams.build_beam(beam_data, False, "auto")
+        assert isinstance(model, beam2d.DeterminateBeamModel)
+        model.analyze()
+        reference = beam2d.BeamModel2D(beam_data)
+        for load_case in reference.case_names:
+            reference.add_load_combo(load_case, {load_case: 1.0})
+        reference.analyze()
+        for result_type, direction in [("shear", "Fy"), ("moment", "Mz"), ("axial", None), ("deflection", "dy"), ("deflection", "dx")]:
+            expected = beams.extract_arrays_all_combos(reference, result_type, direction, 41)
+            actual = beams.extract_arrays_all_combos(model, result_type, direction, 41)
+            for case in expected:
+                for expected_value, actual_value in zip(expected[case][1], actual[case][1]):
+                    assert math.isclose(actual_value, expected_value, rel_tol=1e-9, abs_tol=1e-9)
+
+    # Indeterminate beams fall back to PyNite
+    model = beams.build_beam(get_beam_data({0.0: 'P', 10.0: 'R', 20.0: 'R'}, loads[:2]), False, "auto")
+    assert not isinstance(model, beam2d.BeamModel2D)
+
+
+def test_session_reuses_factorization(get_beam_data):
+    supports = {0.0: 'P', 8.0: 'R', 20.0: 'R'}
+    session = beam2d.BeamSession2D()
+    model = session.build(get_beam_data(supports, [{'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -10.0, 'Location': 4.0, 'Case': 'L'}]), False)
+    model.analyze()
+    factorizations = session.factorizations
+    assert len(factorizations) == 1
+
+    # Load-only edit: no new factorization, same results as a fresh model
+    loads = [{'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -7.0, 'Location': 13.0, 'Case': 'L'},
+             {'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -1.0, 'End Magnitude': -2.0,
+              'Start Location': 2.0, 'End Location': 17.0, 'Case': 'D'}]
+    model = session.build(get_beam_data(supports, loads), False)
+    model.analyze()
+    assert session.reused == 1 and session.factorizations is factorizations
+    fresh = beams.build_beam(get_beam_data(supports, loads), False, "2d")
+    fresh.analyze()
+    for case in ('L', 'D'):
+        for loc, rxn in fresh.reactions[case].items():
+            assert all(math.isclose(a, b, abs_tol=1e-9) for a, b in zip(model.reactions[case][loc], rxn))
+
+    # Support edit: the factorizations are dropped
+    model = session.build(get_beam_data({0.0: 'P', 10.0: 'R', 20.0: 'R'}, loads), False)
+    model.analyze()
+    assert session.factorizations is not factorizations and session.reused == 1
+
+
+def test_spring_supports(get_beam_data):
+    # Simple span with a spring at one end: the spring compresses by R / k on top of the bending deflection
+    loads = [{'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -10.0, 'Location': 10.0, 'Case': 'L'}]
+    model = beams.build_beam(get_beam_data({0.0: 'P', 20.0: 'Ky=2.0'}, loads), False, "auto")
+    assert not beam2d.is_determinate_beam(get_beam_data({0.0: 'P', 20.0: 'Ky=2.0'}, loads))
+    model.analyze()
+    member = model.Members['Test beam']
+    assert math.isclose(model.reactions['L'][20.0][1], 5.0)
+    assert math.isclose(member.deflection('dy', 10.0, 'L'), -10.0 * 20.0**3 / 48 - 5.0 / 2.0 / 2)
+    assert math.isclose(member.deflection('dy', 20.0, 'L'), -2.5)
+
+    # Cantilever on a pin with a rotational spring: tip deflection adds the rotation P * L / Kr times L
+    loads = [{'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -1.0, 'Location': 20.0, 'Case': 'L'}]
+    model = beams.build_beam(get_beam_data({0.0: 'P+Kr=400'}, loads), False, "auto")
+    model.analyze()
+    assert math.isclose(model.Members['Test beam'].deflection('dy', 20.0, 'L'), -20.0**3 / 3 - 20.0 * 20.0 / 400)
+    with pytest.raises(ValueError):
+        beams.build_beam(get_beam_data({0.0: 'P+Kr=400'}, loads), False, "pynite")
+
+
+def test_winkler_foundation(get_beam_data):
+    # Long beam on an elastic foundation (lambda * L = 20) with a central point load: the centre matches the
+    # infinite beam (v = P * lambda / (2k), M = P / (4 * lambda)) and a UDL just settles the beam uniformly
+    L, k, P = 40000.0, 50.0, -1e4
+    beam_data = {**get_beam_data({0.0: 'W=50'}, [{'Type': 'Point', 'Direction': 'Fy', 'Magnitude': P, 'Location': L / 2, 'Case': 'L'},
+                                                {'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -5.0, 'End Magnitude': -5.0,
+                                                 'Start Location': 0.0, 'End Location': L, 'Case': 'D'}], L=L), 'E': 200000.0, 'Iz': 1e9}
+    lam = (k / (4 * 200000.0 * 1e9)) ** 0.25
+    model = beams.build_beam(beam_data, False, "auto")
+    model.analyze()
+    member = model.Members['Test beam']
+    assert math.isclose(member.deflection('dy', L / 2, 'L'), P * lam / (2 * k), rel_tol=1e-5)
+    assert math.isclose(member.moment('Mz', L / 2, 'L'), P / (4 * lam), rel_tol=1e-5)
+    assert math.isclose(member.shear('Fy', L, 'L'), 0.0, abs_tol=1e-6)
+    assert all(math.isclose(member.deflection('dy', x, 'D'), -5.0 / k, rel_tol=1e-6) for x in (0.0, L / 3, L))
+    assert max(abs(member.moment('Mz', x, 'D')) for x in (0.0, L / 3, L)) < 1.0
+
+    polys = model.case_polynomials('moment', 'Mz')
+    assert math.isclose(polys['L'](L / 2), P / (4 * lam), rel_tol=1e-5)
@@ -0,0 +1,74 @@
+import beam_parser as bp
+import beams
+import numpy as np
+import pytest
+
+
+BEAM_TEXT = """Balcony transfer
+4800, 24500, 1200000000, 10
+1000:P,3800:R,4800:Free
+POINT:Fy,-10000,4800,case:Live
+DIST:Fy,30,20,0,4800,case:Dead
+POINT:Mz,5e5,2000,case:Live
+"""
+
+
+def test_parse_beam():
+    beam = bp.parse_beam(BEAM_TEXT.splitlines())
+    assert beam.name == "Balcony transfer"
+    assert (beam.L, beam.E, beam.Iz, beam.Iy, beam.A, beam.rho) == (4800.0, 24500.0, 1.2e9, 10.0, 1.0, 1.0)
+    assert beam.supports == {1000.0: "P", 3800.0: "R", 4800.0: "Free"}
+    loads = beam.loads
+    assert len(loads) == 3
+    assert loads.case_names == ["Live", "Dead"]
+    assert loads.load_type.tolist() == [0, 1, 0]
+    assert loads.direction.tolist() == ["Fy", "Fy", "Mz"]
+    assert np.allclose(loads.start_magnitude, [-10000, 30, 5e5])
+    assert np.allclose(loads.end_magnitude, [-10000, 20, 5e5])
+    assert np.allclose(loads.end_location, [4800, 4800, 2000])
+    assert loads.case_id.tolist() == [0, 1, 0]
+    with pytest.raises(AttributeError):
+        beam.color = "red"
+
+
+def test_to_beam_data(tmp_path):
+    path = tmp_path / "beam.txt"
+    path.write_text(BEAM_TEXT)
+    expected = beams.get_structured_beam_data(beams.read_beam_file(str(path)))
+    assert bp.read_beam_definition(str(path)).to_beam_data() == expected
+
+
+def test_parse_errors():
+    lines = BEAM_TEXT.splitlines()
+    with pytest.raises(bp.BeamParseError) as err:
+        bp.parse_beam(lines[:3] + ["POINT:Fy,-10000,4.8e3x,case:Live"], first_line=11, file_name="girders.txt")
+    assert (err.value.line, err.value.column) == (14, 17)
+    assert str(err.value).startswith("girders.txt:14:17: expected a number")
+    with pytest.raises(bp.BeamParseError) as err:
+        bp.parse_beam(lines[:2] + ["1000:P, 3800:Q"])
+    assert (err.value.line, err.value.column) == (3, 14)
+    with pytest.raises(bp.BeamParseError) as err:
+        bp.parse_beam(lines[:3] + ["DIST:Fy,30,20,0,case:Dead"])
+    assert err.value.line == 4
+    with pytest.raises(ValueError):
+        bp.parse_beam(["Only a name"])
+
+
+def test_spring_and_foundation_supports():
+    beam = bp.parse_beam(["Grade beam", "8000", "0:P+W=0.05, 3000:W=0, 8000:R+Kr=1e+9, 5000:Ky=5e4"])
+    assert beam.supports == {0.0: "P+W=0.05", 3000.0: "W=0", 8000.0: "R+Kr=1e+9", 5000.0: "Ky=5e4"}
+    assert bp.parse_support_type("R+Kr=1e+9") == {"restraint": "R", "Kx": 0.0, "Ky": 0.0, "Kr": 1e9, "W": None}
+    assert bp.foundation_regions(beam.supports, beam.L) == [(0.0, 3000.0, 0.05)]
+    for support_type in ("Ky=-1", "Ky=x", "P+F", "Kz=1"):
+        with pytest.raises(ValueError):
+            bp.parse_support_type(support_type)
+    with pytest.raises(bp.BeamParseError) as err:
+        bp.parse_beam(["Grade beam", "8000", "0:P, 8000:Ky=abc"])
+    assert (err.value.line, err.value.column) == (3, 11)
+
+
+def test_iter_beam_file(tmp_path):
+    path = tmp_path / "beams.txt"
+    path.write_text(BEAM_TEXT + "\n\n" + BEAM_TEXT.replace("Balcony transfer", "Second"))
+    assert [beam.name for beam in bp.iter_beam_file(str(path))] == ["Balcony transfer", "Second"]
+    assert [first_line for first_line, _ in bp.iter_beam_blocks(str(path))] == [1, 9]
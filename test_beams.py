@@ -1,4 +1,5 @@
 import beams as beams
+import loadfactors
 from PyNite import FEModel3D
 import pytest
 import math
@@ -218,4 +219,57 @@ def test_parse_beam_attributes():
     ex_data_2 = [4800, 24500, 1200000000, 10]
 
     assert beams.parse_beam_attributes(ex_data_1) == {"L": 20e3, "E": 200e3, "Iz": 6480e6, "Iy": 390e6, "A": 43900, "J": 11900e3, "nu": 0.3, "rho": 1}
-    assert beams.parse_beam_attributes(ex_data_2) == {"L": 4800, "E": 24500, "Iz": 1200000000, "Iy": 10, "A": 1, "J": 1, "nu": 1, "rho": 1}
\ No newline at end of file
+    assert beams.parse_beam_attributes(ex_data_2) == {"L": 4800, "E": 24500, "Iz": 1200000000, "Iy": 10, "A": 1, "J": 1, "nu": 1, "rho": 1}
+
+
+def test_extract_arrays_adaptive():
+    beam_data = {"Name": "Adaptive", "L": 10e3, "E": 200e3, "Iz": 400e6, "Iy": 1, "A": 10e3, "J": 1, "nu": 0.3, "rho": 1,
+                 "Supports": {0.0: "P", 8e3: "R"},
+                 "Loads": [{"Type": "Point", "Direction": "Fy", "Magnitude": -50e3, "Location": 3333.3, "Case": "L"},
+                           {"Type": "Dist", "Direction": "Fy", "Start Magnitude": -5.0, "End Magnitude": -5.0, "Start Location": 0.0, "End Location": 10e3, "Case": "D"}]}
+    assert list(beams.get_discontinuities(beam_data)) == [0.0, 3333.3, 8e3, 10e3]
+    model = beams.build_beam(beam_data, False, "2d")
+    model.analyze()
+    arrays = beams.extract_arrays_adaptive(model, beam_data, "shear", "Fy", max_points=40)
+    x_array, shear = arrays["L"]
+    assert len(x_array) <= 40
+    assert list(arrays.keys()) == ["L", "D"] and (arrays["D"][0] == x_array).all()
+    # Both sides of the point load and the support are sampled exactly
+    jump_idx = list(x_array).index(3333.3)
+    assert math.isclose(shear[jump_idx - 1] - shear[jump_idx], 50e3)
+    assert math.isclose(shear[list(x_array).index(8e3)], 0.0, abs_tol=1e-6)
+    moments = beams.extract_arrays_adaptive(model, beam_data, "moment", "Mz", max_points=60)["D"]
+    exact = model.Members["Adaptive"].moment("Mz", moments[0], "D")
+    assert len(moments[0]) <= 60 and max(abs(moments[1] - exact)) < 1e-6
+
+
+def test_build_beam_planned_combos():
+    beam_data = {"Name": "Planned", "L": 6e3, "E": 200e3, "Iz": 400e6, "Iy": 1, "A": 10e3, "J": 1, "nu": 0.3, "rho": 1,
+                 "Supports": {0.0: "P", 5e3: "R"},
+                 "Loads": [{"Type": "Point", "Direction": "Fy", "Magnitude": -50e3, "Location": 6e3, "Case": "L"},
+                           {"Type": "Dist", "Direction": "Fy", "Start Magnitude": -5.0, "End Magnitude": -5.0, "Start Location": 0.0, "End Location": 6e3, "Case": "D"}]}
+    planned = beams.build_beam(beam_data, True)
+    full = beams.build_beam(beam_data, True, plan_combos=False)
+    assert len(planned.LoadCombos) == 8 and len(full.LoadCombos) == 13
+    planned.analyze(check_statics=False)
+    full.analyze(check_statics=False)
+    planned_arrays = beams.extract_arrays_all_combos(planned, "moment", "Mz", 20)
+    full_arrays = beams.extract_arrays_all_combos(full, "moment", "Mz", 20)
+    assert list(planned_arrays) == list(full_arrays)
+    for combo_name in full_arrays:
+        assert max(abs(planned_arrays[combo_name][1] - full_arrays[combo_name][1])) < 1e-6
+
+
+def test_build_beam_resolves_every_combo_name():
+    beam_data = {"Name": "G", "L": 6e3, "E": 200e3, "Iz": 400e6, "Iy": 1, "A": 10e3, "J": 1, "nu": 0.3, "rho": 1,
+                 "Supports": {0.0: "P", 6e3: "R"},
+                 "Loads": [{"Type": "Dist", "Direction": "Fy", "Start Magnitude": -5.0, "End Magnitude": -5.0, "Start Location": 0.0, "End Location": 6e3, "Case": "D"}]}
+    for backend in ("pynite", "2d"):
+        model = beams.build_beam(beam_data, True, backend)
+        model.analyze(check_statics=False)
+        assert len(model.combo_plan["aliases"]) == 13 and len(model.LoadCombos) < 13
+        # ULS2 (D = 1.2) is planned away as an alias of ULS1, but can still be looked up by name
+        assert "ULS2" not in model.LoadCombos
+        assert math.isclose(abs(model.Members["G"].moment("Mz", 3e3, "ULS2")), 1.2 * 5.0 * 6e3**2 / 8, rel_tol=1e-6)
+        arrays = beams.extract_arrays_all_combos(model, "moment", "Mz", 11)
+        assert math.isclose(abs(loadfactors.load_combo_array(arrays, "ULS6")[1][5]), 1.2 * 5.0 * 6e3**2 / 8, rel_tol=1e-6)
@@ -0,0 +1,30 @@
+import benchmark as benchmark
+import beams as beams
+import json
+
+
+def test_synthetic_beam_rows():
+    beam_data = beams.get_structured_beam_data(benchmark.synthetic_beam_rows(n_supports=3, n_loads=7, n_cases=3))
+    assert list(beam_data["Supports"].values()) == ["P", "R", "R"]
+    assert len(beam_data["Loads"]) == 7
+    assert [load["Case"] for load in beam_data["Loads"][:4]] == ["D", "E", "P", "D"]
+    assert benchmark.synthetic_beam_rows(seed=3) == benchmark.synthetic_beam_rows(seed=3)
+    assert len(benchmark.synthetic_combos(40, ["D", "L"])) == 40
+
+
+def test_run_benchmarks(tmp_path):
+    scenarios = {"tiny": {"n_supports": 2, "n_loads": 2, "n_cases": 2, "n_points": 50, "n_combos": None},
+                 "tiny_combos": {"n_supports": 3, "n_loads": 2, "n_cases": 2, "n_points": 50, "n_combos": 5}}
+    results = benchmark.run_benchmarks(scenarios, backend="2d", repeat=1)
+    assert list(results["results"]["tiny"]["stages"]) == benchmark.STAGES
+    reliability_stages = benchmark.run_scenario(n_points=50, backend="2d", repeat=1, n_trials=1000)
+    assert list(reliability_stages) == benchmark.STAGES + [benchmark.RELIABILITY_STAGE]
+
+    output = tmp_path / "bench.json"
+    assert benchmark.main(["--scenario", "small", "--backend", "2d", "--repeat", "1", "--output", str(output)]) == 0
+    assert list(json.loads(output.read_text())["results"]) == ["small"]
+
+    slower = json.loads(json.dumps(results))
+    slower["results"]["tiny"]["stages"]["analyze"]["min"] *= 2
+    rows = benchmark.compare_to_baseline(slower, results, tolerance=0.5)
+    assert [(row["scenario"], row["stage"]) for row in rows if row["regression"]] == [("tiny", "analyze")]
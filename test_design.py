@@ -0,0 +1,59 @@
+import design as design
+import beams as beams
+import functools
+import io
+import math
+import numpy as np
+import pytest
+
+
+CATALOG_CSV = """Designation,Mass,A,Ix,Zx,d,w
+W410x39,39.0,4990,126e6,733e3,399,6.4
+W310x39,39.0,4940,84.9e6,610e3,310,5.8
+W410x46,46.1,5890,156e6,885e3,403,7.0
+W460x52,52.0,6630,212e6,1100e3,450,7.6
+W530x66,66.0,8370,351e6,1560e3,525,8.9
+"""
+
+
+@pytest.fixture
+def get_beam_data(make_beam_data):
+    loads = [{'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -10.0, 'End Magnitude': -10.0, 'Start Location': 0.0, 'End Location': 8000.0, 'Case': 'D'},
+             {'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -40e3, 'Location': 4000.0, 'Case': 'L'}]
+    return functools.partial(make_beam_data, loads=loads, L=8000.0, Name='Floor beam', E=1.0, Iz=1.0, A=1.0)
+
+
+def test_read_section_catalog():
+    catalog = design.read_section_catalog(io.StringIO(CATALOG_CSV))
+    assert list(catalog["Designation"]) == ["W410x39", "W310x39", "W410x46", "W460x52", "W530x66"]
+    assert catalog["Ix"][1] == 84.9e6
+
+
+def test_section_checks_simple_span(get_beam_data):
+    catalog = design.read_section_catalog(io.StringIO(CATALOG_CSV))
+    beam_data = get_beam_data({0.0: 'P', 8000.0: 'R'})
+    checks = design.section_checks(beam_data, catalog, n_points=201)
+    w = 10.0 + catalog["Mass"] * design.GRAVITY
+    expected_Mf = 1.2 * w * 8000.0 ** 2 / 8 + 1.7 * 40e3 * 8000.0 / 4  # ULS1
+    assert np.allclose(checks["Mf"], expected_Mf, rtol=1e-9)
+    assert np.allclose(checks["Vf"], 1.2 * w * 4000.0 + 1.7 * 20e3, rtol=1e-9)
+    # SLS2 deflection: 0.9 L at midspan
+    expected_deflection = 0.9 * 40e3 * 8000.0 ** 3 / (48 * design.STEEL_E * catalog["Ix"])
+    assert np.allclose(checks["deflection"], expected_deflection, rtol=1e-6)
+
+    selected = design.select_section(beam_data, catalog, n_points=201)
+    assert selected["Designation"] == "W410x46"
+    assert selected["ok"] and selected["utilization"] <= 1.0
+    assert design.select_section(beam_data, catalog, n_points=201, Fy=100.0) is None
+
+
+def test_section_checks_indeterminate(get_beam_data):
+    # Forces of a uniform continuous beam do not depend on EI; deflections scale with 1/EI
+    catalog = design.read_section_catalog(io.StringIO(CATALOG_CSV))
+    beam_data = get_beam_data({0.0: 'P', 3000.0: 'R', 8000.0: 'R'})
+    checks = design.section_checks(beam_data, catalog, n_points=201, self_weight=False)
+    section_beam = {**beam_data, 'E': design.STEEL_E, 'Iz': catalog["Ix"][3]}
+    model = beams.build_beam(section_beam, False, "2d")
+    model.analyze()
+    deflection = beams.extract_arrays_all_combos(model, "deflection", "dy", 201)["L"][1]
+    assert math.isclose(checks["deflection"][3], 0.9 * np.abs(deflection).max(), rel_tol=1e-9)
@@ -0,0 +1,124 @@
+import beams as beams
+import influence as influence
+import loadfactors as loadfactors
+import numpy as np
+import math
+
+
+def test_influence_lines_simple_span(make_beam_data):
+    beam_data = make_beam_data({0.0: 'P', 20000.0: 'R'})
+    lines = influence.influence_lines(beam_data, [5000.0, 10000.0], [0.0, 5000.0, 10000.0, 15000.0])
+    # Moment at midspan for a unit load at a: -a(L - x)/L (sagging is negative)
+    assert np.allclose(lines["moment"][1], [0.0, -2500.0, -5000.0, -2500.0])
+    # Shear at x = 5000: left reaction minus the unit load when it is left of (or at) the station
+    assert np.allclose(lines["shear"][0], [0.0, -0.25, 0.5, 0.25])
+
+
+def test_influence_lines_match_static_analysis(make_beam_data):
+    beam_data = make_beam_data({0.0: 'P', 8000.0: 'R', 20000.0: 'F'}, L=25000.0)
+    positions = np.array([3000.0, 12000.0, 24000.0])
+    stations = np.linspace(0, 25000.0, 11)
+    lines = influence.influence_lines(beam_data, stations, positions)
+    for idx, position in enumerate(positions):
+        loads = [{'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -1.0, 'Location': position, 'Case': 'L'}]
+        model = beams.build_beam({**beam_data, 'Loads': loads}, False, "2d")
+        model.analyze()
+        assert np.allclose(lines["shear"][:, idx], beams.extract_arrays_all_combos(model, "shear", "Fy", 11)["L"][1])
+        assert np.allclose(lines["moment"][:, idx], beams.extract_arrays_all_combos(model, "moment", "Mz", 11)["L"][1])
+
+
+def test_moving_load_envelope_single_axle(make_beam_data):
+    beam_data = make_beam_data({0.0: 'P', 20000.0: 'R'})
+    vehicle = {"Name": "Axle", "Axle Loads": [100e3], "Axle Spacings": []}
+    live_envelope = influence.moving_load_envelope(beam_data, [vehicle], n_points=101)
+    assert math.isclose(live_envelope["moment_min"].min(), -100e3 * 20000.0 / 4)
+    assert math.isclose(live_envelope["shear_max"].max(), 100e3 * (1 - 200.0 / 20000.0))  # Axle one step (L / 100) past the support
+    assert math.isclose(live_envelope["moment_max"].max(), 0.0, abs_tol=1e-6)
+
+
+def test_moving_load_envelope_two_axles(make_beam_data):
+    # Two equal axles P at spacing s on a simple span: M_max = P(L - s/2)^2 / (2L)
+    beam_data = make_beam_data({0.0: 'P', 20000.0: 'R'})
+    vehicle = {"Name": "Tandem", "Axle Loads": [100e3, 100e3], "Axle Spacings": [4000.0]}
+    live_envelope = influence.moving_load_envelope(beam_data, [vehicle], n_points=401, step=50.0)
+    assert math.isclose(-live_envelope["moment_min"].min(), 100e3 * (20000.0 - 2000.0)**2 / (2 * 20000.0), rel_tol=1e-6)
+
+
+def test_superpose_moving_load(make_beam_data):
+    beam_data = make_beam_data({0.0: 'P', 20000.0: 'R'})
+    live_envelope = influence.moving_load_envelope(beam_data, [influence.CL_625_TRUCK], n_points=51)
+    dead_model = beams.build_beam({**beam_data, 'Loads': [{'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -10.0, 'End Magnitude': -10.0,
+                                                           'Start Location': 0.0, 'End Location': 20000.0, 'Case': 'D'}]}, False, "2d")
+    dead_model.analyze()
+    case_arrays = beams.extract_arrays_all_combos(dead_model, "moment", "Mz", 51)
+    load_combos = loadfactors.CSA_S6_2019_combos()
+    combo_arrays = influence.superpose_moving_load(case_arrays, live_envelope, "moment", load_combos)
+    assert len(combo_arrays) == 2 * len(load_combos)
+    expected = 1.2 * case_arrays["D"][1] + 1.7 * live_envelope["moment_min"]
+    assert np.allclose(combo_arrays["ULS1 (L min)"][1], expected)
+    assert loadfactors.envelope(combo_arrays)["min_combo"] == "ULS1 (L min)"
+
+
+def test_span_load_cases(make_beam_data):
+    beam_data = make_beam_data({0.0: 'P', 10000.0: 'R', 20000.0: 'R', 25000.0: 'Free'}, L=25000.0)
+    beam_data["Loads"] = [{'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -10.0, 'End Magnitude': -30.0, 'Start Location': 5000.0, 'End Location': 25000.0, 'Case': 'L'},
+                          {'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -50e3, 'Location': 10000.0, 'Case': 'L'},
+                          {'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -80e3, 'Location': 2000.0, 'Case': 'D'}]
+    assert np.allclose(influence.span_boundaries(beam_data["Supports"], beam_data["L"]), [0.0, 10000.0, 20000.0, 25000.0])
+    loads = influence.span_load_cases(beam_data)
+    assert [load["Case"] for load in loads] == ["L span 1", "L span 2", "L span 2", "L span 3"]
+    assert math.isclose(loads[0]["End Magnitude"], -15.0) and math.isclose(loads[1]["Start Magnitude"], -15.0)
+    assert loads[2]["Type"] == "Point"  # On the support: belongs to the span on its right
+    assert math.isclose(loads[3]["Start Location"], 20000.0) and math.isclose(loads[3]["End Magnitude"], -30.0)
+    uniform = influence.span_load_cases(beam_data, w=5.0)
+    assert [(load["Start Location"], load["End Location"]) for load in uniform] == [(0.0, 10000.0), (10000.0, 20000.0), (20000.0, 25000.0)]
+
+
+def test_pattern_load_envelope_two_spans(make_beam_data):
+    beam_data = make_beam_data({0.0: 'P', 10000.0: 'R', 20000.0: 'R'})
+    w, span = 10.0, 10000.0
+    live_envelope = influence.pattern_load_envelope(beam_data, n_points=201, w=w)
+    support = 100
+    # Hogging over the middle support: both spans loaded (wL^2/8)
+    assert math.isclose(live_envelope["moment_max"][support], w * span**2 / 8, rel_tol=1e-9)
+    assert live_envelope["moment_max_pattern"][support] == "1+2"
+    # Sagging in span 1: only span 1 loaded (0.0957 wL^2 instead of 0.0703 wL^2 with both spans loaded)
+    assert math.isclose(live_envelope["moment_min"][:support].min(), -w * span**2 * 49 / 512, rel_tol=1e-3)
+    assert live_envelope["moment_min_pattern"][live_envelope["moment_min"][:support].argmin()] == "1"
+
+
+def test_pattern_load_envelope_matches_enumeration(make_beam_data):
+    beam_data = make_beam_data({0.0: 'P', 6000.0: 'R', 14000.0: 'R', 20000.0: 'R', 23000.0: 'Free'}, L=23000.0)
+    beam_data["Loads"] = [{'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -10.0, 'End Magnitude': -20.0, 'Start Location': 0.0, 'End Location': 23000.0, 'Case': 'L'},
+                          {'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -40e3, 'Location': 17000.0, 'Case': 'L'}]
+    exact = influence.pattern_load_envelope(beam_data, n_points=116)
+    enumerated = influence.pattern_load_envelope(beam_data, n_points=116, patterns=influence.all_patterns(4))
+    for result_type in ("shear", "moment", "deflection"):
+        assert np.allclose(exact[f"{result_type}_max"], np.maximum(enumerated[f"{result_type}_max"], 0.0))
+        assert np.allclose(exact[f"{result_type}_min"], np.minimum(enumerated[f"{result_type}_min"], 0.0))
+    standard = influence.pattern_load_envelope(beam_data, n_points=116, patterns=influence.standard_patterns(4))
+    assert np.all(standard["moment_max"] <= exact["moment_max"] + 1e-6)
+    # The pattern envelope superposes like a moving load envelope
+    combos = {"ULS1": {"D": 1.2, "L": 1.7}}
+    arrays = influence.superpose_moving_load({}, exact, "moment", combos)
+    assert np.allclose(arrays["ULS1 (L max)"][1], 1.7 * exact["moment_max"])
+
+
+def test_standard_patterns():
+    patterns = influence.standard_patterns(3).astype(int).tolist()
+    assert sorted(patterns) == [[0, 1, 0], [0, 1, 1], [1, 0, 1], [1, 1, 0], [1, 1, 1]]
+    assert influence.all_patterns(3).shape == (7, 3)
+
+
+def test_influence_lines_cached_per_geometry(make_beam_data, monkeypatch):
+    cache = influence.result_cache.ResultCache(cache_dir=None)
+    monkeypatch.setattr(influence, "INFLUENCE_CACHE", cache)
+    beam_data = make_beam_data({0.0: 'P', 20000.0: 'R'})
+    vehicle = {"Name": "Axle", "Axle Loads": [100e3], "Axle Spacings": []}
+    first = influence.moving_load_envelope(beam_data, [vehicle], n_points=51)
+    loaded = {**beam_data, 'Name': 'Other', 'Loads': [{'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -1.0, 'Location': 100.0, 'Case': 'D'}]}
+    second = influence.moving_load_envelope(loaded, [vehicle], n_points=51)
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 1
+    assert np.array_equal(first["moment_min"], second["moment_min"])
+    influence.moving_load_envelope(make_beam_data({0.0: 'P', 15000.0: 'R'}), [vehicle], n_points=51)
+    assert cache.stats()["misses"] == 2
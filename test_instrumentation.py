@@ -0,0 +1,43 @@
+import instrumentation as instrumentation
+import beams as beams
+import loadfactors as loadfactors
+import json
+
+
+def test_disabled_records_nothing():
+    instrumentation.disable()
+    instrumentation.reset()
+    loadfactors.envelope_max({"ULS1": [[0.0, 1.0], [1.0, 2.0]]})
+    with instrumentation.stage("analyze"):
+        pass
+    assert instrumentation.summary() == {}
+
+
+def test_stage_records(tmp_path):
+    log_file = tmp_path / "stages.jsonl"
+    instrumentation.reset()
+    instrumentation.enable(memory=True, log_file=str(log_file))
+    try:
+        beam_data = {'Name': 'Test beam', 'L': 20.0, 'E': 1.0, 'Iz': 1.0, 'Iy': 1.0, 'A': 1.0, 'J': 1.0, 'nu': 0.3, 'rho': 1.0,
+                     'Supports': {0.0: 'P', 20.0: 'R'},
+                     'Loads': [{'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -10.0, 'Location': 5.0, 'Case': 'L'}]}
+        model = beams.build_beam(beam_data, True, "2d")
+        with instrumentation.stage("analyze"):
+            model.analyze()
+        arrays = beams.extract_arrays_all_combos(model, "moment", "Mz", 50)
+        loadfactors.get_max_combo(arrays)
+        with instrumentation.stage("outer"):
+            big = [0.0] * 200000
+            with instrumentation.stage("inner"):
+                small = [0.0] * 1000
+    finally:
+        instrumentation.disable()
+
+    stats = instrumentation.summary()
+    assert stats["beams.build_beam"]["calls"] == 1
+    assert stats["analyze"]["calls"] == 1
+    assert stats["loadfactors.envelope"]["calls"] >= 1  # Also called by get_max_combo
+    assert stats["outer"]["peak_bytes"] >= 1.6e6 > stats["inner"]["peak_bytes"]
+    records = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [record["stage"] for record in records] == [record["stage"] for record in instrumentation.recent()]
+    assert len(big) + len(small) == 201000
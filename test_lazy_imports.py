@@ -0,0 +1,23 @@
+import lazy_imports as lazy_imports
+import subprocess
+import sys
+
+
+def test_lazy_import():
+    sys.modules.pop("colorsys", None)
+    colorsys = lazy_imports.lazy_import("colorsys")
+    assert "colorsys" not in sys.modules
+    assert lazy_imports.import_report()["colorsys"] == {"loaded": False, "seconds": None}
+    assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert "colorsys" in sys.modules
+    assert lazy_imports.import_report()["colorsys"]["loaded"]
+    assert lazy_imports.lazy_import("colorsys") is sys.modules["colorsys"]
+    assert lazy_imports.prewarm(["colorsys"]) == {"colorsys": 0.0}
+
+
+def test_light_modules_defer_heavy_imports():
+    code = ("import sys, loadfactors, beam_parser; loaded = [m for m in ('numpy', 'scipy', 'PyNite', 'plotly', 'matplotlib') if m in sys.modules]; "
+            "loadfactors.factor_loads(D_load=1.0, D=1.2); import app_functions; "
+            "loaded += [m for m in ('PyNite', 'plotly', 'matplotlib') if m in sys.modules]; print(loaded)")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
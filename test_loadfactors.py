@@ -0,0 +1,131 @@
+import beams as beams
+import loadfactors as loadfactors
+import math
+import pytest
+
+
+def test_combo_factor_matrix():
+    combos = loadfactors.CSA_S6_2019_combos()
+    factors = loadfactors.combo_factor_matrix(combos, ["D", "L", "Dead"])
+    assert factors.shape == (len(combos), 3)
+    assert list(factors[list(combos).index("ULS1")]) == [1.2, 1.7, 0]
+    assert list(factors[list(combos).index("SLS2")]) == [0, 0.9, 0]
+
+
+def test_superpose_case_arrays():
+    beam_data = {'Name': 'Test beam', 'L': 4800.0, 'E': 24500.0, 'Iz': 1200000000.0, 'Iy': 1.0, 'A': 1.0, 'J': 1.0, 'nu': 1.0, 'rho': 1.0,
+                 'Supports': {1000.0: 'P', 3800.0: 'R'},
+                 'Loads': [{'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -10000.0, 'Location': 4800.0, 'Case': 'L'},
+                           {'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -30.0, 'End Magnitude': -30.0,
+                            'Start Location': 0.0, 'End Location': 4800.0, 'Case': 'D'},
+                           {'Type': 'Point', 'Direction': 'Fy', 'Magnitude': 2000.0, 'Location': 2000.0, 'Case': 'W'}]}
+    alpha_factors = loadfactors.get_alpha_factors("M1", 1)
+    combo_model = beams.build_beam(beam_data, True, **alpha_factors)
+    combo_model.analyze(check_statics=False)
+    case_model = beams.build_beam(beam_data, False)
+    case_model.analyze(check_statics=False)
+
+    combo_arrays = beams.extract_arrays_all_combos(combo_model, "moment", "Mz", 50)
+    superposed = loadfactors.superpose_case_arrays(beams.extract_arrays_all_combos(case_model, "moment", "Mz", 50),
+                                                   loadfactors.CSA_S6_2019_combos(**alpha_factors))
+    assert list(superposed.keys()) == list(combo_arrays.keys())
+    for combo in combo_arrays:
+        assert list(superposed[combo][0]) == list(combo_arrays[combo][0])
+        for expected, actual in zip(combo_arrays[combo][1], superposed[combo][1]):
+            assert math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-6)
+
+
+def test_envelope():
+    result_arrays = {"ULS1": [[0.0, 1.0, 2.0], [1.0, -4.0, 2.0]],
+                     "ULS2": [[0.0, 1.0, 2.0], [3.0, -1.0, 0.0]],
+                     "SLS1": [[0.0, 1.0, 2.0], [-2.0, 0.5, 5.0]]}
+    enveloped = loadfactors.envelope(result_arrays)
+    assert list(enveloped["max"]) == [3.0, 0.5, 5.0]
+    assert list(enveloped["min"]) == [-2.0, -4.0, 0.0]
+    assert [enveloped["combos"][idx] for idx in enveloped["max_idx"]] == ["ULS2", "SLS1", "SLS1"]
+    assert [enveloped["combos"][idx] for idx in enveloped["min_idx"]] == ["SLS1", "ULS1", "ULS2"]
+    assert (enveloped["max_value"], enveloped["max_loc"], enveloped["max_combo"]) == (5.0, 2.0, "SLS1")
+    assert (enveloped["min_value"], enveloped["min_loc"], enveloped["min_combo"]) == (-4.0, 1.0, "ULS1")
+    assert enveloped["governing_combo"] == "SLS1"
+
+    assert loadfactors.envelope_max(result_arrays) == [[0.0, 1.0, 2.0], [3.0, 0.5, 5.0]]
+    assert loadfactors.envelope_min(result_arrays) == [[0.0, 1.0, 2.0], [-2.0, -4.0, 0.0]]
+
+
+def test_get_max_combo():
+    combos = loadfactors.CSA_S6_2019_combos()
+    result_arrays = {combo: [[0.0, 1.0], [0.0, 0.0]] for combo in combos}
+    result_arrays["unfactored"] = [[0.0, 1.0], [0.0, 100.0]]
+    result_arrays["ULS3"] = [[0.0, 1.0], [0.0, -7.0]]
+    result_arrays["ULS5"] = [[0.0, 1.0], [6.0, 0.0]]
+    assert loadfactors.get_max_combo(result_arrays) == ("ULS3", [[0.0, 1.0], [0.0, -7.0]])
+
+
+def test_alpha_factor_permutations():
+    permutations = loadfactors.alpha_factor_permutations(material_type="M3")
+    assert len(permutations) == 8
+    assert permutations["D min, E max, P min"]["alpha_D"] == 0.65
+    assert permutations["D min, E max, P min"]["alpha_P"] == 0.95
+    combos, labels = loadfactors.permutation_combos(permutations)
+    assert "unfactored (D max, E max, P max)" not in combos
+    assert sum(combo == "SLS1" for combo, _ in labels.values()) == 1  # No alpha factors in SLS1
+    assert sum(combo == "ULS1" for combo, _ in labels.values()) == 8
+    assert labels["ULS1 (D min, E max, P max)"] == ("ULS1", "D min, E max, P max")
+
+
+def test_permutation_envelope():
+    x_array = [0.0, 2.5, 5.0, 7.5, 10.0]
+    # Dead load relieves the live load effect: the min dead load factor governs the max
+    case_arrays = {"D": [x_array, [-1.0] * 5], "L": [x_array, [2.0] * 5]}
+    enveloped = loadfactors.permutation_envelope(case_arrays)
+    assert enveloped["max_combo"] == "ULS1 (D min, E max, P max)"
+    assert enveloped["max_permutation"] == "D min, E max, P max"
+    assert math.isclose(enveloped["max_value"], 1.7 * 2 - 0.9)
+    assert enveloped["min_combo"] == "ULS9 (D max, E max, P max)"
+    assert math.isclose(enveloped["min_value"], -1.35)
+
+
+def test_factored_extremes():
+    load_combos = loadfactors.CSA_S6_2019_combos()
+    effects = {"D": [-1.0, 2.0, 0.5], "L": [3.0, -1.0, 0.0], "W": [0.0, 1.0, -2.0]}
+    factored = loadfactors.factor_effects(effects, load_combos)
+    assert factored.shape == (len(load_combos), 3)
+    extremes = loadfactors.factored_extremes(effects, load_combos)
+    for idx in range(3):
+        scalar_loads = {f"{case}_load": values[idx] for case, values in effects.items()}
+        expected = [loadfactors.factor_loads(**scalar_loads, **combo) for combo in load_combos.values()]
+        assert math.isclose(extremes["max"][idx], max(expected))
+        assert math.isclose(extremes["min"][idx], min(expected))
+        assert extremes["combos"][extremes["max_idx"][idx]] == loadfactors.max_factored_load(scalar_loads, load_combos)[1]
+        assert extremes["combos"][extremes["min_idx"][idx]] == loadfactors.min_factored_load(scalar_loads, load_combos)[1]
+
+    with pytest.raises(ValueError):
+        loadfactors.factored_extremes(effects, {})
+
+    # Cases x N array input gives the same result
+    stacked = [effects["D"], effects["L"], effects["W"]]
+    assert (loadfactors.factored_extremes(stacked, load_combos, ["D", "L", "W"])["max_idx"] == extremes["max_idx"]).all()
+    max_values, max_combos = loadfactors.max_factored_load({"D_load": effects["D"], "L_load": effects["L"]}, load_combos)
+    assert len(max_values) == 3 and max_combos[0] == "ULS1"
+
+
+def test_plan_load_combos():
+    load_combos = loadfactors.CSA_S6_2019_combos()
+    plan = loadfactors.plan_load_combos(load_combos, ["D", "L"])
+    assert list(plan["aliases"]) == list(load_combos)
+    assert plan["aliases"]["ULS7"] == "ULS4" and plan["aliases"]["FLS1"] == "unfactored"
+    assert plan["combos"]["ULS4"] == {"D": 1.2, "L": 0.0}
+    assert len(plan["combos"]) == 8 and not plan["dominated"]
+
+    plan = loadfactors.plan_load_combos(load_combos, ["D", "L"], drop_dominated=True)
+    assert list(plan["combos"]) == ["unfactored", "SLS1", "ULS1", "ULS9"]
+    assert plan["dominated"]["ULS5"] == "ULS1" and plan["aliases"]["ULS5"] == "ULS1"
+    results = loadfactors.expand_combo_results({name: name for name in plan["combos"]}, plan)
+    assert list(results) == list(load_combos)
+    assert results["FLS1"] == "unfactored" and results["ULS4"] == plan["dominated"]["ULS4"]
+
+    combos = loadfactors.PlannedCombos(plan)
+    combos.update(plan["combos"])
+    assert list(combos) == list(plan["combos"]) and combos["ULS5"] is combos["ULS1"]
+    with pytest.raises(KeyError):
+        combos["ULS10"]
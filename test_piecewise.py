@@ -0,0 +1,54 @@
+import piecewise as pw
+import beams
+import functools
+import math
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def get_beam_data(make_beam_data):
+    return functools.partial(make_beam_data, L=10e3, Name="Test", E=200e3, Iz=400e6, Iy=1, A=10e3, J=1, rho=1)
+
+
+def test_from_terms():
+    # <x - 0>^2 / 2 - <x - 2>^1 on [0, 4], jump of -1 at x = 3 (point term)
+    poly = pw.PiecewisePolynomial.from_terms([1.0, -1.0, -1.0], [0.0, 2.0, 3.0], [2, 1, 0], [0.0, 2.0, 3.0, 4.0])
+    x = np.array([0.0, 1.0, 2.5, 3.0, 4.0])
+    expected = x**2 / 2 - np.maximum(x - 2, 0) - (x >= 3)
+    assert np.allclose(poly(x), expected)
+    assert math.isclose(poly(2.9999999), 2.9999999**2 / 2 - 0.9999999)
+    extrema = poly.extrema()
+    assert math.isclose(extrema["max_value"], 5.0) and math.isclose(extrema["max_loc"], 4.0)
+    assert math.isclose(extrema["min_value"], 0.0, abs_tol=1e-12)
+
+
+def test_exact_peak_between_samples(get_beam_data):
+    # Simply supported span with a UDL over part of the span: the peak moment falls between samples
+    loads = [{"Type": "Dist", "Direction": "Fy", "Start Magnitude": -10.0, "End Magnitude": -10.0, "Start Location": 0.0, "End Location": 7e3, "Case": "D"}]
+    model = beams.build_beam(get_beam_data({0.0: "P", 10e3: "R"}, loads), False, "2d")
+    model.analyze()
+    poly = beams.extract_polynomials_all_combos(model, "moment", "Mz")["D"]
+    R1 = 10.0 * 7e3 * (10e3 - 3.5e3) / 10e3
+    extrema = poly.extrema()
+    assert math.isclose(extrema["min_loc"], R1 / 10.0)
+    assert math.isclose(extrema["min_value"], -R1**2 / (2 * 10.0))
+    sampled = beams.extract_arrays_all_combos(model, "moment", "Mz", 11)["D"]
+    assert sampled[1].min() > extrema["min_value"]
+    assert np.allclose(poly(sampled[0]), sampled[1])
+
+
+def test_shear_jump_and_envelope(get_beam_data):
+    loads = [{"Type": "Point", "Direction": "Fy", "Magnitude": -100e3, "Location": 3333.3, "Case": "L"},
+             {"Type": "Dist", "Direction": "Fy", "Start Magnitude": -5.0, "End Magnitude": -5.0, "Start Location": 0.0, "End Location": 10e3, "Case": "D"}]
+    model = beams.build_beam(get_beam_data({0.0: "P", 10e3: "R"}, loads), False, "2d")
+    model.analyze()
+    case_polys = model.case_polynomials("shear", "Fy")
+    compact = case_polys["L"].to_array()
+    assert compact.shape[1] == 4  # Both sides of the jump plus the ends
+    combos = {"ULS1": {"D": 1.2, "L": 1.7}, "SLS1": {"D": 1.0, "L": 0.9}}
+    enveloped = pw.polynomial_envelope(pw.superpose_polynomials(case_polys, combos))
+    R1 = 1.2 * 5.0 * 5e3 + 1.7 * 100e3 * (10e3 - 3333.3) / 10e3
+    assert enveloped["max_combo"] == "ULS1"
+    assert math.isclose(enveloped["max_value"], R1) and enveloped["max_loc"] == 0.0
+    assert math.isclose(enveloped["min_value"], -(1.2 * 5.0 * 10e3 + 1.7 * 100e3 - R1))
@@ -0,0 +1,39 @@
+import plots as plots
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_downsample_min_max():
+    x = np.linspace(0, 10, 10001)
+    y = np.sin(x)
+    y[7000:] -= 3.0  # Discontinuity
+    y[1234] = 5.0  # Narrow peak
+    idx = plots.downsample_min_max(x, y, 200)
+    assert len(idx) <= 200
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert 1234 in idx
+    assert y[idx].min() == y.min() and y[idx].max() == y.max()
+    assert np.abs(np.diff(y[idx])).max() > 2.5  # The jump is kept
+    assert list(plots.downsample_min_max(x[:50], y[:50], 200)) == list(range(50))
+
+
+def test_beam_2D_plot_plotly():
+    x = np.linspace(0, 1000, 5001)
+    fig = plots.beam_2D_plot_plotly([x, -x * (1000 - x)], "moment", "Mz", "kN", "mm", max_points=1500)
+    beam, diagram = fig.data
+    assert list(beam.x) == [0.0, 1000.0]
+    assert diagram.type == "scattergl" and len(diagram.x) <= 1500
+    fig = plots.beam_2D_plot_plotly([x, -x * (1000 - x)], "moment", "Mz", "kN", "mm", max_points=500)
+    assert fig.data[1].type == "scatter"
+
+
+def test_beam_visual_image():
+    beam_data = {'Name': 'Test beam', 'L': 1000.0, 'E': 1.0, 'Iz': 1.0, 'Iy': 1.0, 'A': 1.0, 'J': 1.0, 'nu': 1.0, 'rho': 1.0,
+                 'Supports': {0.0: 'P', 1000.0: 'R'},
+                 'Loads': [{'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -100.0, 'Location': 500.0, 'Case': 'L'}]}
+    plots.IMAGE_CACHE.clear()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        images = list(executor.map(lambda fmt: plots.beam_visual_image(beam_data, fmt), ["png", "svg", "png", "svg"]))
+    assert images[0].startswith(b"\x89PNG") and b"<svg" in images[1]
+    assert plots.beam_visual_image(beam_data) == images[0]
+    assert plots.IMAGE_CACHE.stats()["entries"] == 2
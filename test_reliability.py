@@ -0,0 +1,42 @@
+import math
+import numpy as np
+import reliability as reliability
+
+
+def get_case_arrays() -> dict:
+    x = np.linspace(0, 10000.0, 11)
+    moment = 1000.0 * x * (10000.0 - x) / 10000.0
+    return {"D": np.array([x, moment]), "L": np.array([x, 0.5 * moment])}
+
+
+def test_sample_moments():
+    rng = np.random.default_rng(1)
+    for distribution in ("normal", "lognormal", "gumbel"):
+        values = reliability.sample({"distribution": distribution, "bias": 1.1, "cov": 0.2}, 400_000, rng)
+        assert math.isclose(values.mean(), 1.1, rel_tol=5e-3)
+        assert math.isclose(values.std(), 0.22, rel_tol=1e-2)
+    assert np.all(reliability.sample({"distribution": "deterministic", "bias": 2.0}, 3, rng) == 2.0)
+
+
+def test_reliability_matches_normal_closed_form():
+    case_arrays = get_case_arrays()
+    peak = case_arrays["D"][1].max()
+    statistics = {"D": {"distribution": "normal", "bias": 1.0, "cov": 0.1}}
+    resistance = {"nominal": 1.3 * peak, "distribution": "deterministic", "bias": 1.0}
+    results = reliability.reliability_analysis({"D": case_arrays["D"]}, resistance, statistics, n_trials=400_000, seed=3)
+    # (R - D) / sigma_D = 3 at midspan
+    assert math.isclose(results["pf"][5], 0.5 * math.erfc(3 / math.sqrt(2)), rel_tol=0.1)
+    assert math.isclose(results["beta"][5], 3.0, rel_tol=0.02)
+    assert results["pf"][0] == 0.0 and math.isinf(results["beta"][0])
+    assert math.isclose(results["pf_system"], results["pf"][5])
+    assert np.allclose(results["mean"], case_arrays["D"][1], rtol=1e-3)
+
+
+def test_reliability_is_reproducible_across_workers():
+    case_arrays = get_case_arrays()
+    resistance = {"nominal": 1.6 * case_arrays["D"][1].max(), "cov": 0.1}
+    kwargs = {"n_trials": 50_000, "seed": 7, "chunk_elements": 100_000}
+    serial = reliability.reliability_analysis(case_arrays, resistance, **kwargs)
+    parallel = reliability.reliability_analysis(case_arrays, resistance, workers=2, **kwargs)
+    assert np.array_equal(serial["pf"], parallel["pf"])
+    assert serial["pf_system"] == parallel["pf_system"] > 0.0
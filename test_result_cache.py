@@ -0,0 +1,89 @@
+import functools
+import pytest
+import result_cache as result_cache
+import threading
+
+
+@pytest.fixture
+def get_beam_data(make_beam_data):
+    loads = [{'Type': 'Point', 'Direction': 'Fy', 'Magnitude': -10000.0, 'Location': 4800.0, 'Case': 'Live'}]
+    return functools.partial(make_beam_data, loads=loads, L=4800, Name='Balcony transfer', E=24500.0, Iz=1200000000.0, A=1.0, nu=1.0)
+
+
+def test_beam_data_key(get_beam_data):
+    key_1 = result_cache.beam_data_key(get_beam_data({1000.0: 'P', 3800.0: 'R'}), alpha_D=1.2)
+    key_2 = result_cache.beam_data_key(get_beam_data({3800: 'R', 1000: 'P'}), alpha_D=1.2)
+    key_3 = result_cache.beam_data_key(get_beam_data({1000.0: 'P', 3800.0: 'R'}), alpha_D=1.25)
+    key_4 = result_cache.beam_data_key(get_beam_data({1000.0: 'P', 3800.0: 'F'}), alpha_D=1.2)
+    assert key_1 == key_2
+    assert key_1 != key_3
+    assert key_1 != key_4
+    assert key_1 == result_cache.beam_data_key({**get_beam_data({1000.0: 'P', 3800.0: 'R'}), 'Name': 'Other'}, alpha_D=1.2)
+
+
+def test_beam_data_key_version(get_beam_data, monkeypatch):
+    key = result_cache.beam_data_key(get_beam_data({1000.0: 'P'}))
+    monkeypatch.setattr(result_cache, "CACHE_VERSION", result_cache.CACHE_VERSION + 1)
+    assert result_cache.beam_data_key(get_beam_data({1000.0: 'P'})) != key
+
+
+def test_result_cache_lru(tmp_path):
+    cache = result_cache.ResultCache(max_entries=2, cache_dir=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # "b" is the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {"hits": 2, "disk_hits": 0, "misses": 1, "entries": 2}
+
+
+def test_result_cache_disk(tmp_path):
+    cache = result_cache.ResultCache(cache_dir=str(tmp_path))
+    assert cache.get_or_compute("abcd", lambda: {"shear": [1, 2, 3]}) == {"shear": [1, 2, 3]}
+
+    new_cache = result_cache.ResultCache(cache_dir=str(tmp_path))
+    assert new_cache.get_or_compute("abcd", lambda: None) == {"shear": [1, 2, 3]}
+    assert new_cache.stats() == {"hits": 1, "disk_hits": 1, "misses": 0, "entries": 1}
+
+    new_cache.clear(disk=True)
+    assert result_cache.ResultCache(cache_dir=str(tmp_path)).get("abcd") is None
+
+
+def test_result_cache_skips_shared_dir(tmp_path):
+    shared = tmp_path / "shared"
+    result_cache.ResultCache(cache_dir=str(shared)).put("abcd", 1)
+    assert shared.stat().st_mode & 0o777 == 0o700
+    assert result_cache.ResultCache(cache_dir=str(shared)).get("abcd") == 1
+    shared.chmod(0o777)  # Anyone could plant a pickle here: it is not loaded
+    assert result_cache.ResultCache(cache_dir=str(shared)).get("abcd") is None
+    assert result_cache.DEFAULT_CACHE_DIR != ".beam_cache"
+
+
+def test_result_cache_disk_limit(tmp_path):
+    cache = result_cache.ResultCache(cache_dir=str(tmp_path), max_disk_entries=10)
+    for idx in range(25):
+        cache.put(f"{idx:04d}", idx)
+    files = cache._disk_files()
+    assert len(files) <= 10
+    assert result_cache.ResultCache(cache_dir=str(tmp_path)).get("0024") == 24
+    assert result_cache.ResultCache(cache_dir=str(tmp_path)).get("0000") is None
+
+
+def test_result_cache_threads():
+    cache = result_cache.ResultCache(max_entries=8, cache_dir=None)
+    results = []
+
+    def worker(idx):
+        for _ in range(200):
+            results.append(cache.get_or_compute(f"key {idx % 4}", lambda: idx % 4))
+
+    threads = [threading.Thread(target=worker, args=(idx,)) for idx in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 1600
+    assert stats["entries"] == 4
+    assert len(results) == 1600
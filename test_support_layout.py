@@ -0,0 +1,47 @@
+import math
+import pytest
+import support_layout as support_layout
+
+
+@pytest.fixture
+def get_beam_data(make_beam_data):
+    def girder(supports: dict, L: float = 20000.0, w: float = 10.0) -> dict:
+        loads = [{'Type': 'Dist', 'Direction': 'Fy', 'Start Magnitude': -w, 'End Magnitude': -w, 'Start Location': 0.0, 'End Location': L, 'Case': 'D'}]
+        return make_beam_data(supports, loads, L)
+    return girder
+
+
+def test_peak_effect_simple_span(get_beam_data):
+    beam_data = get_beam_data({0.0: 'P', 20000.0: 'R'})
+    dead_factor = max(combo["D"] for combo in support_layout.layout_combos("moment").values())
+    assert math.isclose(support_layout.peak_effect(beam_data, "moment"), dead_factor * 10.0 * 20000.0**2 / 8, rel_tol=1e-4)  # Sampled peak
+    assert math.isclose(support_layout.peak_effect(beam_data, "shear"), dead_factor * 10.0 * 20000.0 / 2, rel_tol=1e-9)
+
+
+def test_optimize_supports_double_overhang(get_beam_data):
+    L = 20000.0
+    beam_data = get_beam_data({2000.0: 'P', 15000.0: 'R'}, L)
+    result = support_layout.optimize_supports(beam_data, {2000.0: (0.0, L / 2), 15000.0: (L / 2, L)}, "moment", time_budget=10.0)
+    # Equal overhang and span moments: overhangs of (sqrt(2) - 1) / 2 L
+    overhang = (math.sqrt(2) - 1) / 2 * L
+    assert result["converged"]
+    assert result["locations"] == pytest.approx([overhang, L - overhang], abs=5e-3 * L)
+    assert result["objective"] < result["initial_objective"]
+    assert result["objective"] == result["history"][-1]["objective"]
+    assert sorted(result["supports"]) == pytest.approx([overhang, L - overhang], abs=5e-3 * L)
+    assert list(result["supports"].values()) == ['P', 'R']
+
+    shear = support_layout.optimize_supports(beam_data, {2000.0: (0.0, L / 2), 15000.0: (L / 2, L)}, "shear", time_budget=10.0)
+    assert shear["locations"] == pytest.approx([L / 4, 3 * L / 4], abs=5e-3 * L)
+
+    # A single sweep keeps improving the layout, so running out of sweeps is not convergence
+    one_sweep = support_layout.optimize_supports(beam_data, {2000.0: (0.0, L / 2), 15000.0: (L / 2, L)}, "moment", time_budget=10.0, max_sweeps=1)
+    assert not one_sweep["converged"]
+
+
+def test_optimize_supports_bounds(get_beam_data):
+    beam_data = get_beam_data({0.0: 'P', 20000.0: 'R'})
+    result = support_layout.optimize_supports(beam_data, {20000.0: (15000.0, 20000.0)}, "deflection")
+    assert 15000.0 <= result["locations"][0] <= 20000.0
+    with pytest.raises(ValueError):
+        support_layout.optimize_supports(beam_data, {5000.0: (0.0, 10000.0)})